@@ -0,0 +1,175 @@
+# benchmarks/fast_path_compat.py
+"""
+Совместимость быстрого пути приёма (api/fast_path.py) с обычным путём FastAPI.
+
+Каждое тело из набора отправляется дважды — с FAST_PATH выключенным и
+включённым — и сравниваются: код ответа, заголовок Idempotent-Replayed, JSON
+ответа (без timestamp) и то, что дошло до постановки в очередь (данные
+сигнала, символ из URL, ttl). Сигналы идут на инструмент с заглушкой вебхука
+(по умолчанию FUSDT), поэтому в Finandy ничего не уходит.
+
+    python benchmarks/fast_path_compat.py
+
+Код выхода 1, если хоть один случай разошёлся.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SIGNAL = {
+    "name": "FUSDT", "secret": "compat", "side": "buy", "symbol": "FUSDT",
+    "close": {"action": "decrease", "decrease": {"type": "posAmountPct", "amount": "1"}, "checkProfit": True, "price": ""},
+    "open": {"amountType": "sumUsd", "amount": "6", "enabled": True},
+    "dca": {"amountType": "sumUsd", "amount": "6", "checkProfit": False},
+    "sl": {"price": "", "update": False},
+}
+JSON = {"Content-Type": "application/json"}
+DELETE = object()
+
+
+def signal(**changes) -> dict:
+    data = json.loads(json.dumps(SIGNAL))
+    for path, value in changes.items():
+        *parents, key = path.split("__")
+        target = data
+        for parent in parents:
+            target = target[parent]
+        if value is DELETE:
+            del target[key]
+        else:
+            target[key] = value
+    return data
+
+
+def cases(symbol: str):
+    """(название, путь, тело, заголовки)"""
+    def body(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    base = signal(name=symbol, symbol=symbol)
+    yield "valid", "/webhook", body(base), JSON
+    yield "valid with url symbol", f"/webhook/{symbol}", body(base), JSON
+    yield "unknown symbol", "/webhook", body(dict(base, name="NOSUCHSYMBOL")), JSON
+    yield "no content-type", "/webhook", body(base), {}
+    yield "json with charset", "/webhook", body(base), {"Content-Type": "application/json; charset=utf-8"}
+    yield "vendor +json", "/webhook", body(base), {"Content-Type": "application/vnd.tv+json"}
+    yield "text/plain", "/webhook", body(base), {"Content-Type": "text/plain"}
+    yield "tp object", "/webhook", body(dict(base, tp={"price": "1.5", "levels": [1, 2.5, None]})), JSON
+    yield "tp list", "/webhook", body(dict(base, tp=[1, 2])), JSON
+    yield "tp null", "/webhook", body(dict(base, tp=None)), JSON
+    yield "extra fields", "/webhook", body(dict(base, comment="hi", strategy={"id": 7})), JSON
+    yield "ttl int", "/webhook", body(dict(base, ttl=30)), JSON
+    yield "ttl float", "/webhook", body(dict(base, ttl=0.5)), JSON
+    yield "ttl string", "/webhook", body(dict(base, ttl="30")), JSON
+    yield "ttl negative", "/webhook", body(dict(base, ttl=-1)), JSON
+    yield "ttl null", "/webhook", body(dict(base, ttl=None)), JSON
+    yield "ttl huge", "/webhook", body(base)[:-1] + b',"ttl":1e400}', JSON
+    yield "enabled string true", "/webhook", body(signal(name=symbol, open__enabled="true")), JSON
+    yield "enabled yes", "/webhook", body(signal(name=symbol, open__enabled="yes")), JSON
+    yield "enabled int 1", "/webhook", body(signal(name=symbol, open__enabled=1)), JSON
+    yield "enabled int 2", "/webhook", body(signal(name=symbol, open__enabled=2)), JSON
+    yield "checkProfit null", "/webhook", body(signal(name=symbol, dca__checkProfit=None)), JSON
+    yield "amount number", "/webhook", body(signal(name=symbol, open__amount=6)), JSON
+    yield "side number", "/webhook", body(signal(name=symbol, side=1)), JSON
+    yield "no secret", "/webhook", body(signal(name=symbol, secret=DELETE)), JSON
+    yield "no close", "/webhook", body(signal(name=symbol, close=DELETE)), JSON
+    yield "no decrease", "/webhook", body(signal(name=symbol, close__decrease=DELETE)), JSON
+    yield "no close price", "/webhook", body(signal(name=symbol, close__price=DELETE)), JSON
+    yield "no sl price", "/webhook", body(signal(name=symbol, sl__price=DELETE)), JSON
+    yield "no sl update", "/webhook", body(signal(name=symbol, sl__update=DELETE)), JSON
+    yield "sl null", "/webhook", body(signal(name=symbol, sl=None)), JSON
+    yield "duplicate key", "/webhook", body(base)[:-1] + b',"side":"sell"}', JSON
+    yield "unicode", "/webhook", body(dict(base, secret="секрет ✓")), JSON
+    yield "escaped unicode", "/webhook", json.dumps(dict(base, secret="é✓")).encode(), JSON
+    yield "lone surrogate", "/webhook", body(base).replace(b'"compat"', b'"\\ud800"'), JSON
+    yield "utf-8 bom", "/webhook", b"\xef\xbb\xbf" + body(base), JSON
+    yield "whitespace", "/webhook", b"\n  " + body(base) + b"  \n", JSON
+    yield "trailing garbage", "/webhook", body(base) + b"x", JSON
+    yield "invalid json", "/webhook", b'{"name": ', JSON
+    yield "empty body", "/webhook", b"", JSON
+    yield "array", "/webhook", b"[]", JSON
+    yield "string", "/webhook", b'"FUSDT"', JSON
+    yield "null", "/webhook", b"null", JSON
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", default="FUSDT")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="fast-path-compat-")
+    os.environ.update(
+        DB_PATH=os.path.join(data_dir, "signals.db"),
+        STORAGE_BACKEND="memory",
+        IDEMPOTENCY_TTL_S="0",
+        HTTP_WARM_CONNECTIONS="0",
+    )
+    sys.path.insert(0, SRC)
+    from fastapi.testclient import TestClient
+    from api import endpoints, fast_path
+    from config.settings import settings
+    import main as server
+
+    if fast_path.msgspec is None:
+        print("msgspec не установлен: быстрый путь недоступен, сравнивать нечего")
+        return 1
+
+    accepted = []
+    accept_signal = endpoints.accept_signal
+
+    async def recording_accept(original_data, url_symbol, idempotency_key, body, *rest):
+        accepted.append((dict(original_data), url_symbol, rest[4] if len(rest) > 4 else None))
+        return await accept_signal(original_data, url_symbol, idempotency_key, body, *rest)
+
+    endpoints.accept_signal = recording_accept
+
+    # encode_model вызывается только быстрым путём — считаем, сколько случаев он обработал сам
+    fast_answers = []
+    encode_model = fast_path.encode_model
+
+    def counting_encode(model):
+        fast_answers.append(model)
+        return encode_model(model)
+
+    fast_path.encode_model = counting_encode
+
+    def run(client, fast: bool, path: str, body: bytes, headers: dict):
+        settings.fast_path = fast
+        accepted.clear()
+        response = client.post(f"/api/v1{path}", content=body, headers=headers)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.text
+        if isinstance(payload, dict):
+            payload.pop("timestamp", None)
+        return (
+            response.status_code,
+            response.headers.get("Idempotent-Replayed"),
+            payload,
+            list(accepted),
+        )
+
+    failures = 0
+    total = 0
+    with TestClient(server.app, raise_server_exceptions=False) as client:
+        for name, path, body, headers in cases(args.symbol):
+            total += 1
+            slow = run(client, False, path, body, headers)
+            fast = run(client, True, path, body, headers)
+            if slow == fast:
+                print(f"  ok    {name:<24} {slow[0]}")
+            else:
+                failures += 1
+                print(f"  DIFF  {name:<24}\n        slow: {slow}\n        fast: {fast}")
+
+    print(f"{total - failures}/{total} совпадают, быстрым путём обработано {len(fast_answers)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# benchmarks/fast_path_cpu.py
+"""
+Процессорное время на запрос: быстрый путь приёма (msgspec) против FastAPI + Pydantic.
+
+Два замера:
+  validation — только разбор тела, валидация, словарь для очереди и JSON ответа;
+  endpoint   — POST /api/v1/webhook целиком через ASGI-приложение в одном
+               цикле событий (без сети), включая журнал и постановку в очередь.
+
+Сигналы идут на инструмент с заглушкой вебхука (по умолчанию FUSDT), поэтому
+в Finandy ничего не уходит; журнал — хранилище null.
+
+    python benchmarks/fast_path_cpu.py --requests 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SIGNAL = {
+    "secret": "benchmark", "side": "buy",
+    "close": {"action": "decrease", "decrease": {"type": "posAmountPct", "amount": "1"}, "checkProfit": True, "price": ""},
+    "open": {"amountType": "sumUsd", "amount": "6", "enabled": True},
+    "dca": {"amountType": "sumUsd", "amount": "6", "checkProfit": False},
+    "sl": {"price": "", "update": False},
+}
+
+
+def cpu_per_call(fn, count: int, rounds: int) -> float:
+    """Лучшее из rounds процессорное время одного вызова, микросекунды"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.process_time()
+        for _ in range(count):
+            fn()
+        best = min(best, time.process_time() - started)
+    return best / count * 1e6
+
+
+def bench_validation(body: bytes, count: int, rounds: int) -> dict:
+    from api import fast_path
+    from core.models import TradingSignal, WebhookResponse
+
+    response = dict(
+        status="accepted", target_symbol="FUSDT", queue_symbol="FUSDT", queued=True,
+        webhook="https://hook.finandy.com/x", timestamp=time.time(), destinations=["queued"],
+    )
+    result = WebhookResponse(**response)
+
+    def pydantic_path():
+        signal = TradingSignal.model_validate(json.loads(body))
+        signal.model_dump()
+        WebhookResponse.model_validate(result).model_dump_json()
+
+    def msgspec_path():
+        signal = fast_path.decode_signal(body, "application/json")
+        signal.model_dump()
+        fast_path.encode_model(result)
+
+    return {
+        "pydantic": cpu_per_call(pydantic_path, count, rounds),
+        "msgspec": cpu_per_call(msgspec_path, count, rounds),
+    }
+
+
+async def post(app, body: bytes) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/v1/webhook", "raw_path": b"/api/v1/webhook",
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def bench_endpoint(symbol: str, count: int, rounds: int) -> dict:
+    import main as server
+    from config.settings import settings
+
+    results = {"pydantic": float("inf"), "msgspec": float("inf")}
+    async with server.lifespan(server.app):
+        queue_manager = server.app.state.queue_manager
+        for round_no in range(rounds):
+            for label, fast in (("pydantic", False), ("msgspec", True)):
+                settings.fast_path = fast
+                bodies = [
+                    json.dumps(dict(SIGNAL, name=symbol, symbol=symbol, secret=f"b-{label}-{round_no}-{i}")).encode()
+                    for i in range(count)
+                ]
+                started = time.process_time()
+                for body in bodies:
+                    status = await post(server.app, body)
+                    if status != 200:
+                        raise RuntimeError(f"Unexpected status {status}")
+                results[label] = min(results[label], (time.process_time() - started) / count * 1e6)
+                # Воркер разбирает очередь вне замера
+                while queue_manager.get_pending_count():
+                    await asyncio.sleep(0.05)
+    return results
+
+
+def report(title: str, result: dict) -> None:
+    saved = result["pydantic"] - result["msgspec"]
+    print(
+        f"{title:<12} pydantic {result['pydantic']:>8.1f} µs  msgspec {result['msgspec']:>8.1f} µs  "
+        f"saved {saved:>7.1f} µs/req ({saved / result['pydantic'] * 100:.0f}%)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--symbol", default="FUSDT")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="fast-path-cpu-")
+    os.environ.update(
+        DB_PATH=os.path.join(data_dir, "signals.db"),
+        STORAGE_BACKEND="null",
+        IDEMPOTENCY_TTL_S="0",
+        QUEUE_MAX_PER_SYMBOL="0",
+        QUEUE_MAX_TOTAL="0",
+        HTTP_WARM_CONNECTIONS="0",
+    )
+    sys.path.insert(0, SRC)
+    from api import fast_path
+
+    if fast_path.msgspec is None:
+        print("msgspec не установлен: быстрый путь недоступен")
+        sys.exit(1)
+
+    body = json.dumps(dict(SIGNAL, name=args.symbol, symbol=args.symbol)).encode()
+    report("validation", bench_validation(body, args.requests, args.rounds))
+    # Сервер печатает каждый сигнал — вывод в замер не входит
+    with contextlib.redirect_stdout(io.StringIO()):
+        endpoint = asyncio.run(bench_endpoint(args.symbol, args.requests, args.rounds))
+    report("endpoint", endpoint)
+
+
+if __name__ == "__main__":
+    main()
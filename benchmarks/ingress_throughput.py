@@ -0,0 +1,186 @@
+# benchmarks/ingress_throughput.py
+"""
+Пропускная способность приёма вебхуков: один процесс против launcher.py.
+
+Запускает сервер в отдельном каталоге данных, в течение --duration секунд
+шлёт сигналы с --concurrency параллельными соединениями и печатает число
+принятых запросов в секунду и задержки. Сигналы идут на инструмент с
+заглушкой вебхука (по умолчанию FUSDT), поэтому в Finandy ничего не уходит.
+Лимиты очередей и дедупликация отключены, чтобы мерить только приём.
+
+Кроме req/s печатается процессорное время на запрос по процессам (Linux,
+/proc): в режиме multi отдельно диспетчер и ingress-процессы. Диспетчер один,
+поэтому 1e6 / (его µs на запрос) — потолок пропускной способности режима multi
+при любом числе ядер; на машине с одним ядром сам req/s выигрыша не покажет.
+
+    python benchmarks/ingress_throughput.py --mode both --workers 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SIGNAL = {
+    "secret": "benchmark", "side": "buy",
+    "close": {"action": "decrease", "decrease": {"type": "posAmountPct", "amount": "1"}, "checkProfit": True, "price": ""},
+    "open": {"amountType": "sumUsd", "amount": "6", "enabled": True},
+    "dca": {"amountType": "sumUsd", "amount": "6", "checkProfit": False},
+    "sl": {"price": "", "update": False},
+}
+
+
+def start_server(mode: str, port: int, workers: int, data_dir: str, storage: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        DISPATCHER_PORT=str(port + 1),
+        INGRESS_WORKERS=str(workers),
+        DB_PATH=os.path.join(data_dir, "signals.db"),
+        DISPATCH_SOCKET=os.path.join(data_dir, "dispatch.sock"),
+        STORAGE_BACKEND=storage,
+        IDEMPOTENCY_TTL_S="0",
+        QUEUE_MAX_PER_SYMBOL="0",
+        QUEUE_MAX_TOTAL="0",
+        PYTHONPATH=SRC,
+    )
+    if mode == "single":
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                   "--log-level", "warning", "--no-access-log"]
+    else:
+        command = [sys.executable, "launcher.py"]
+    return subprocess.Popen(command, cwd=SRC, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not become ready: {url}")
+
+
+def _children(pid: int) -> list:
+    """Процессы, запущенные launcher (без resource_tracker multiprocessing)"""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    spawned = []
+    for child in children:
+        with open(f"/proc/{child}/cmdline", "rb") as f:
+            if b"spawn_main" in f.read():
+                spawned.append(child)
+    return spawned
+
+
+def _stat(pid: int) -> tuple:
+    """(время старта, utime + stime в секундах) процесса"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return int(fields[19]), (int(fields[11]) + int(fields[12])) / ticks
+
+
+def cpu_by_role(pid: int) -> dict:
+    """Процессорное время процессов сервера: single, либо dispatcher и ingress (сумма)"""
+    children = _children(pid)
+    if not children:
+        return {"single": _stat(pid)[1]}
+    stats = sorted(_stat(child) for child in children)
+    # launcher запускает диспетчер первым
+    return {"dispatcher": stats[0][1], "ingress": sum(cpu for _, cpu in stats[1:])}
+
+
+async def load(port: int, symbol: str, duration: float, concurrency: int, pid: int) -> dict:
+    base = f"http://127.0.0.1:{port}/api/v1"
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=False)
+    latencies = []
+    statuses = {}
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_ready(session, f"{base}/health")
+        deadline = time.monotonic() + duration
+        counter = iter(range(10 ** 9))
+
+        async def client() -> None:
+            while time.monotonic() < deadline:
+                body = dict(SIGNAL, name=symbol, symbol=symbol, secret=f"benchmark-{next(counter)}")
+                started = time.perf_counter()
+                async with session.post(f"{base}/webhook", json=body) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        cpu_before = cpu_by_role(pid)
+        started = time.monotonic()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+        cpu_after = cpu_by_role(pid)
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "statuses": statuses,
+        "cpu_us": {
+            role: (cpu_after[role] - cpu_before[role]) / max(1, len(latencies)) * 1e6
+            for role in cpu_after
+        },
+    }
+
+
+def run(mode: str, args) -> dict:
+    data_dir = tempfile.mkdtemp(prefix=f"bench-{mode}-")
+    server = start_server(mode, args.port, args.workers, data_dir, args.storage)
+    try:
+        return asyncio.run(load(args.port, args.symbol, args.duration, args.concurrency, server.pid))
+    finally:
+        server.terminate()
+        server.wait(15)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("single", "multi", "both"), default="both")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--symbol", default="FUSDT")
+    parser.add_argument("--storage", default="sqlite")
+    args = parser.parse_args()
+
+    modes = ("single", "multi") if args.mode == "both" else (args.mode,)
+    results = {}
+    for mode in modes:
+        results[mode] = result = run(mode, args)
+        label = mode if mode == "single" else f"multi ({args.workers} ingress)"
+        cpu = "  ".join(f"{role} {us:.0f}" for role, us in result["cpu_us"].items())
+        print(
+            f"{label:<20} {result['rps']:>9.1f} req/s  p50 {result['p50_ms']:.1f} ms  "
+            f"p99 {result['p99_ms']:.1f} ms  cpu µs/req: {cpu}  statuses {result['statuses']}"
+        )
+        if "dispatcher" in result["cpu_us"]:
+            print(f"{'':<20} потолок multi (диспетчер на одном ядре): {1e6 / result['cpu_us']['dispatcher']:.0f} req/s")
+    if len(results) == 2 and results["single"]["rps"]:
+        print(f"gain: x{results['multi']['rps'] / results['single']['rps']:.2f} (cpu: {os.cpu_count()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# src/api/batch.py
+"""
+Разбор тела пакетного приёма /webhook/batch: JSON-массив сигналов или NDJSON
+(по сигналу на строку). Каждый сигнал проверяется отдельно — ошибка одного
+не отменяет остальные.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from api import fast_path
+from core.models import TradingSignal
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+@dataclass
+class BatchItem:
+    """Сигнал пакета: проверенный signal или ошибка (status_code, error)"""
+    index: int
+    signal: Any = None
+    # Исходные байты сигнала (строка NDJSON) — для passthrough; у элементов массива их нет
+    raw: Optional[bytes] = None
+    status_code: int = 200
+    error: Any = None
+
+
+def _is_ndjson(body: bytes, content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return True
+    return not body.lstrip().startswith(b"[")
+
+
+def _validate(index: int, obj: Any, raw: Optional[bytes]) -> BatchItem:
+    if raw is not None and fast_path.enabled():
+        signal = fast_path.decode_signal(raw)
+        if signal is not None:
+            return BatchItem(index, signal, raw)
+    try:
+        signal = TradingSignal.model_validate(obj)
+    except ValidationError as e:
+        errors = [
+            {**error, "loc": ["body", index, *error["loc"]]}
+            for error in e.errors(include_url=False)
+        ]
+        return BatchItem(index, status_code=422, error=jsonable_encoder(errors))
+    return BatchItem(index, signal, raw)
+
+
+def parse_batch(body: bytes, content_type: Optional[str], max_items: int) -> List[BatchItem]:
+    """Сигналы пакета в порядке запроса; неразборчивое тело целиком — 400, слишком большой пакет — 413"""
+    items: List[BatchItem] = []
+    if _is_ndjson(body, content_type):
+        lines = [line for line in body.splitlines() if line.strip()]
+        if len(lines) > max_items:
+            raise HTTPException(status_code=413, detail=f"Batch too large: {len(lines)} signals, max {max_items}")
+        for index, line in enumerate(lines):
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                items.append(BatchItem(index, status_code=422, error=[{
+                    "type": "json_invalid",
+                    "loc": ["body", index],
+                    "msg": "JSON decode error",
+                    "ctx": {"error": getattr(e, "msg", str(e))},
+                }]))
+                continue
+            items.append(_validate(index, obj, line))
+    else:
+        try:
+            signals = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {e}")
+        if not isinstance(signals, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON")
+        if len(signals) > max_items:
+            raise HTTPException(status_code=413, detail=f"Batch too large: {len(signals)} signals, max {max_items}")
+        items = [_validate(index, obj, None) for index, obj in enumerate(signals)]
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    return items
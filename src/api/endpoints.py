@@ -1,14 +1,39 @@
 # src/api/endpoints.py
+import asyncio
+import html
 import time
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
-from fastapi.responses import HTMLResponse
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from api import export, fast_path
+from api.batch import BatchItem, parse_batch
 from config import webhooks
-from database.repository import SignalRepository
-from services.queue_service import QueueManager
-from services.webhook_service import WebhookClient
-from core.models import TradingSignal, WebhookResponse, HealthStatus
-from core.exceptions import QueueNotFoundException
+from config.settings import settings
+from database.backends import StorageBackend
+from database.dead_letters import DeadLetterStore
+from database import rollups
+from database.query import decode_cursor
+from services.circuit_breaker import CircuitBreakers
+from services.deadlines import DeadlinePolicy
+from services.idempotency import IdempotencyCache
+from services.queue_service import QueueManager, lane_key
+from services.webhook_service import WebhookClient, combined_pool_stats
+from core.models import (
+    TradingSignal,
+    WebhookResponse,
+    BatchItemResult,
+    BatchResponse,
+    HealthStatus,
+    SignalStatus,
+    ErrorClass,
+    LogFilter,
+    LogPage,
+    QueuedSignal,
+    RawPayload,
+    RedriveRequest,
+)
+from core.exceptions import QueueFullException, QueueNotFoundException
 
 
 router = APIRouter()
@@ -16,7 +41,7 @@ router = APIRouter()
 
 # === Зависимости: используются общие экземпляры из состояния приложения ===
 
-def get_repository(request: Request) -> SignalRepository:
+def get_repository(request: Request) -> StorageBackend:
     return request.app.state.repository
 
 def get_queue_manager(request: Request) -> QueueManager:
@@ -25,36 +50,164 @@ def get_queue_manager(request: Request) -> QueueManager:
 def get_webhook_client(request: Request) -> WebhookClient:
     return request.app.state.webhook_client
 
+def get_http_clients(request: Request) -> List[WebhookClient]:
+    return request.app.state.http_clients
+
+def get_breakers(request: Request) -> Optional[CircuitBreakers]:
+    return request.app.state.breakers
+
+def get_dead_letters(request: Request) -> DeadLetterStore:
+    return request.app.state.dead_letters
+
+def get_idempotency(request: Request) -> Optional[IdempotencyCache]:
+    return request.app.state.idempotency
+
+def get_deadlines(request: Request) -> Optional[DeadlinePolicy]:
+    return request.app.state.deadlines
+
 
 # === Эндпоинты ===
 
-@router.post("/webhook", response_model=WebhookResponse)
+async def _fast_webhook(request: Request, signal: Any, body: bytes) -> Response:
+    """Быстрый путь приёма (api/fast_path.py): те же шаги, ответ кодируется сразу в байты"""
+    result, replayed = await accept_signal(
+        signal_payload(signal, body),
+        request.path_params.get("symbol"),
+        request.headers.get("Idempotency-Key"),
+        body,
+        get_repository(request),
+        get_queue_manager(request),
+        get_idempotency(request),
+        get_deadlines(request),
+        signal.ttl,
+    )
+    return Response(
+        content=fast_path.encode_model(result),
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+# Вебхуки — через маршрут с быстрым путём; без msgspec или при FAST_PATH=0 — обычный FastAPI
+webhook_router = APIRouter(route_class=fast_path.route_class(_fast_webhook))
+
+
+@webhook_router.post("/webhook", response_model=WebhookResponse)
 async def universal_webhook(
     signal: TradingSignal,
-    repository: SignalRepository = Depends(get_repository),
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    repository: StorageBackend = Depends(get_repository),
     queue_manager: QueueManager = Depends(get_queue_manager),
+    idempotency: Optional[IdempotencyCache] = Depends(get_idempotency),
+    deadlines: Optional[DeadlinePolicy] = Depends(get_deadlines),
 ):
-    return await _process_webhook(signal, None, repository, queue_manager)
+    body = await request.body()
+    result, replayed = await accept_signal(
+        signal_payload(signal, body), None, idempotency_key, body,
+        repository, queue_manager, idempotency, deadlines, signal.ttl,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 
-@router.post("/webhook/{symbol}", response_model=WebhookResponse)
+@webhook_router.post("/webhook/{symbol}", response_model=WebhookResponse)
 async def webhook_with_symbol(
     symbol: str,
     signal: TradingSignal,
-    repository: SignalRepository = Depends(get_repository),
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    repository: StorageBackend = Depends(get_repository),
     queue_manager: QueueManager = Depends(get_queue_manager),
+    idempotency: Optional[IdempotencyCache] = Depends(get_idempotency),
+    deadlines: Optional[DeadlinePolicy] = Depends(get_deadlines),
 ):
-    return await _process_webhook(signal, symbol, repository, queue_manager)
+    body = await request.body()
+    result, replayed = await accept_signal(
+        signal_payload(signal, body), symbol, idempotency_key, body,
+        repository, queue_manager, idempotency, deadlines, signal.ttl,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 
-async def _process_webhook(
-    signal: TradingSignal,
-    url_symbol: str,
-    repository: SignalRepository,
+@router.post("/webhook/batch", response_model=BatchResponse)
+async def batch_webhook(
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    repository: StorageBackend = Depends(get_repository),
+    queue_manager: QueueManager = Depends(get_queue_manager),
+    idempotency: Optional[IdempotencyCache] = Depends(get_idempotency),
+    deadlines: Optional[DeadlinePolicy] = Depends(get_deadlines),
+):
+    """
+    Пакет сигналов: JSON-массив или NDJSON (по сигналу на строку). Каждый
+    сигнал проверяется отдельно; результаты — по сигналу, в порядке запроса.
+    """
+    result, replayed = await accept_batch(
+        await request.body(), request.headers.get("content-type"), idempotency_key,
+        repository, queue_manager, idempotency, deadlines,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+# Раньше /webhook/{symbol}, иначе "batch" будет принят за символ
+router.include_router(webhook_router)
+
+
+def signal_payload(signal: TradingSignal, body: bytes) -> Dict[str, Any]:
+    """
+    Данные сигнала для очереди. В режиме passthrough — проверенное тело
+    запроса как есть (RawPayload), иначе — словарь модели.
+    """
+    if settings.passthrough_body and signal.ttl is None:
+        return RawPayload.from_body(body)
+    return signal.model_dump()
+
+
+async def accept_signal(
+    original_data: Dict[str, Any],
+    url_symbol: Optional[str],
+    idempotency_key: Optional[str],
+    body: bytes,
+    repository: StorageBackend,
     queue_manager: QueueManager,
-) -> WebhookResponse:
-    target_symbol = signal.name
+    idempotency: Optional[IdempotencyCache],
+    deadlines: Optional[DeadlinePolicy] = None,
+    ttl: Optional[float] = None,
+    digest: Optional[str] = None,
+) -> Tuple[WebhookResponse, bool]:
+    """
+    Принять проверенный сигнал: записать в журнал и поставить в очередь.
+
+    Общая точка для HTTP-эндпоинтов и для сигналов, переданных ingress-процессами.
+    Повтор того же запроса (тот же ключ или то же тело в окне) получает
+    сохранённый ответ; второй элемент результата — был ли это повтор.
+    Без тела (body=b"") повтор ищется по digest — хешу тела от ingress-процесса.
+    """
+    handler = lambda: _process_webhook(
+        original_data, url_symbol, repository, queue_manager, deadlines, ttl,
+    )
+    if idempotency is None:
+        return await handler(), False
+
+    keys = idempotency.keys_for(idempotency_key, body, url_symbol or "", digest=digest)
+    result, replayed = await idempotency.run(keys, handler)
+    if replayed:
+        print(f"🔂 Повтор запроса {result.target_symbol} — ответ из кэша, в очередь не ставим")
+    return result, replayed
+
 
+def _target_symbol(original_data: Dict[str, Any]) -> str:
+    """Инструмент из name; неизвестный — 404"""
+    target_symbol = original_data["name"]
     if target_symbol not in webhooks.FINANDY_WEBHOOKS:
         supported_symbols = webhooks.get_supported_instruments()[:10]
         raise HTTPException(
@@ -65,48 +218,246 @@ async def _process_webhook(
                 "total_supported": len(webhooks.get_supported_instruments()),
             },
         )
+    return target_symbol
+
+
+def _queue_symbol(target_symbol: str, url_symbol: Optional[str], queue_manager: QueueManager) -> Optional[str]:
+    if queue_manager.accepts(target_symbol):
+        return target_symbol
+    print(f"⚠️ Очередь для {target_symbol} не найдена, используем {url_symbol}")
+    return url_symbol if queue_manager.accepts(url_symbol) else None
+
+
+def _log_entries(log_symbol: str, target_symbol: str, original_data: Dict[str, Any],
+                 created_at: float) -> List[tuple]:
+    """Строки журнала по получателям: первому — log_symbol, остальным — "log_symbol#N" """
+    return [
+        (lane_key(log_symbol, destination), target_symbol, original_data, SignalStatus.RECEIVED, created_at)
+        for destination in range(len(webhooks.get_destinations(target_symbol)))
+    ]
+
+
+def _queue_items(queue_symbol: str, entries: List[tuple], signal_ids: List[int],
+                 deadline: Optional[float]) -> List[Tuple[str, QueuedSignal]]:
+    """По сигналу в очередь каждого получателя; результат отправки пишется в его строку журнала"""
+    return [
+        (lane_key(queue_symbol, destination), QueuedSignal(
+            name=name,
+            data=data,
+            created_at=created_at,
+            log_symbol=log_symbol,
+            signal_id=signal_id,
+            deadline=deadline,
+        ))
+        for destination, ((log_symbol, name, data, _, created_at), signal_id)
+        in enumerate(zip(entries, signal_ids))
+    ]
+
+
+async def _put_all(queue_manager: QueueManager, items: List[Tuple[str, QueuedSignal]]) -> List[Any]:
+    """
+    Поставить сигналы в очереди: разные очереди — параллельно, в одну — по
+    порядку. Результаты (или исключения) — в порядке items.
+    """
+    results: List[Any] = [None] * len(items)
+    lanes: Dict[str, List[int]] = {}
+    for position, (key, _) in enumerate(items):
+        lanes.setdefault(key, []).append(position)
+
+    async def put_lane(positions: List[int]) -> None:
+        for position in positions:
+            key, item = items[position]
+            try:
+                results[position] = await queue_manager.put(key, item)
+            except Exception as e:
+                results[position] = e
+
+    await asyncio.gather(*(put_lane(positions) for positions in lanes.values()))
+    return results
+
+
+def _webhook_response(
+    target_symbol: str,
+    queue_symbol: str,
+    side: str,
+    created_at: float,
+    items: List[Tuple[str, QueuedSignal]],
+    results: List[Any],
+    queue_manager: QueueManager,
+) -> WebhookResponse:
+    """Ответ по итогам постановки; 429 — только если не принял ни один получатель"""
+    outcomes: List[str] = []
+    full: Optional[QueueFullException] = None
+    for (key, _), result in zip(items, results):
+        if isinstance(result, QueueNotFoundException):
+            raise HTTPException(status_code=400, detail=str(result))
+        if isinstance(result, QueueFullException):
+            full = full or result
+            outcomes.append("rejected")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            outcomes.append("queued" if result else "coalesced")
+            if result:
+                print(f"[{key}] ✅ Сигнал положен в очередь")
+
+    if full is not None and "queued" not in outcomes and "coalesced" not in outcomes:
+        raise HTTPException(
+            status_code=429,
+            detail={"error": str(full), "overflow_policy": full.policy, "retry_after": full.retry_after},
+            headers={"Retry-After": str(full.retry_after)},
+        )
+
+    queued = "queued" in outcomes
+    print(f"[{queue_symbol}] 📩 Принят сигнал: {side.upper()} для {target_symbol}")
+
+    return WebhookResponse(
+        status="accepted" if queued else "coalesced",
+        target_symbol=target_symbol,
+        queue_symbol=queue_symbol,
+        queued=queued,
+        webhook=webhooks.get_webhook_url(target_symbol),
+        timestamp=created_at,
+        destinations=outcomes,
+        overflow_policy=queue_manager.overflow_policy,
+    )
+
+
+async def accept_batch(
+    body: bytes,
+    content_type: Optional[str],
+    idempotency_key: Optional[str],
+    repository: StorageBackend,
+    queue_manager: QueueManager,
+    idempotency: Optional[IdempotencyCache],
+    deadlines: Optional[DeadlinePolicy] = None,
+) -> Tuple[BatchResponse, bool]:
+    """
+    Принять пакет сигналов — общая точка для HTTP-эндпоинта и пакетов от
+    ingress-процессов. Повтор пакета (тот же ключ или то же тело в окне)
+    получает сохранённый ответ; второй элемент результата — был ли это повтор.
+    """
+    batch = parse_batch(body, content_type, settings.batch_max_items)
+    handler = lambda: _process_batch(batch, repository, queue_manager, deadlines)
+    if idempotency is None:
+        return await handler(), False
+
+    result, replayed = await idempotency.run(idempotency.keys_for(idempotency_key, body, "batch"), handler)
+    if replayed:
+        print(f"🔂 Повтор пакета из {result.total} сигналов — ответ из кэша, в очередь не ставим")
+    return result, replayed
+
+
+async def _process_webhook(
+    original_data: Dict[str, Any],
+    url_symbol: Optional[str],
+    repository: StorageBackend,
+    queue_manager: QueueManager,
+    deadlines: Optional[DeadlinePolicy] = None,
+    ttl: Optional[float] = None,
+) -> WebhookResponse:
+    target_symbol = _target_symbol(original_data)
+    side = original_data["side"]
 
     print(f"\n📩 Получен сигнал:")
     print(f"   URL symbol: {url_symbol}")
     print(f"   Target symbol from name: {target_symbol}")
-    print(f"   Side: {signal.side}")
+    print(f"   Side: {side}")
 
     created_at = time.time()
-    original_data = signal.model_dump()
-
+    deadline = deadlines.deadline_for(target_symbol, original_data, created_at, ttl) if deadlines else None
     log_symbol = url_symbol or "universal"
-    repository.log_signal(log_symbol, target_symbol, original_data, "received", created_at)
-
-    queue_symbol = target_symbol
-    if queue_symbol not in webhooks.get_supported_instruments():
-        queue_symbol = url_symbol
-        print(f"⚠️ Очередь для {target_symbol} не найдена, используем {url_symbol}")
 
-    if not queue_symbol or queue_symbol not in webhooks.get_supported_instruments():
+    queue_symbol = _queue_symbol(target_symbol, url_symbol, queue_manager)
+    if queue_symbol is None:
         error_msg = f"No queue available for symbol: {target_symbol}"
-        repository.log_signal(log_symbol, target_symbol, original_data, f"error {error_msg}", created_at)
+        repository.log_signal(
+            log_symbol, target_symbol, original_data, SignalStatus.ERROR, created_at,
+            response_text=error_msg, error_class=ErrorClass.CONFIG,
+        )
         raise HTTPException(status_code=400, detail=error_msg)
 
-    try:
-        print(f"📥 Кладу сигнал в очередь: {queue_symbol}")
-        await queue_manager.put(
-            queue_symbol,
-            (original_data.copy(), original_data, target_symbol, created_at),
+    entries = _log_entries(log_symbol, target_symbol, original_data, created_at)
+    items = _queue_items(queue_symbol, entries, repository.log_signals(entries), deadline)
+
+    print(f"📥 Кладу сигнал в очередь: {queue_symbol} (получателей: {len(items)})")
+    results = await _put_all(queue_manager, items)
+    return _webhook_response(target_symbol, queue_symbol, side, created_at, items, results, queue_manager)
+
+
+async def _process_batch(
+    batch: List[BatchItem],
+    repository: StorageBackend,
+    queue_manager: QueueManager,
+    deadlines: Optional[DeadlinePolicy] = None,
+) -> BatchResponse:
+    """
+    Пакет сигналов: каждый проверяется и маршрутизируется отдельно, строки
+    журнала всех принятых пишутся одним пакетом, постановка — одним проходом.
+    """
+    created_at = time.time()
+    log_symbol = "batch"
+    results: List[Optional[BatchItemResult]] = [None] * len(batch)
+    planned = []
+    entries: List[tuple] = []
+
+    for entry in batch:
+        if entry.error is not None:
+            results[entry.index] = BatchItemResult(
+                index=entry.index, status_code=entry.status_code, error=entry.error,
+            )
+            continue
+        original_data = signal_payload(entry.signal, entry.raw) if entry.raw is not None else entry.signal.model_dump()
+        try:
+            target_symbol = _target_symbol(original_data)
+        except HTTPException as e:
+            results[entry.index] = BatchItemResult(index=entry.index, status_code=e.status_code, error=e.detail)
+            continue
+        queue_symbol = _queue_symbol(target_symbol, None, queue_manager)
+        if queue_symbol is None:
+            error_msg = f"No queue available for symbol: {target_symbol}"
+            entries.append((
+                log_symbol, target_symbol, original_data, SignalStatus.ERROR, created_at,
+                None, None, error_msg, ErrorClass.CONFIG,
+            ))
+            results[entry.index] = BatchItemResult(index=entry.index, status_code=400, error=error_msg)
+            continue
+        deadline = (
+            deadlines.deadline_for(target_symbol, original_data, created_at, entry.signal.ttl)
+            if deadlines else None
+        )
+        signal_entries = _log_entries(log_symbol, target_symbol, original_data, created_at)
+        planned.append((entry.index, target_symbol, queue_symbol, original_data["side"], deadline,
+                        len(entries), signal_entries))
+        entries.extend(signal_entries)
+
+    signal_ids = repository.log_signals(entries)
+
+    items: List[Tuple[str, QueuedSignal]] = []
+    spans = []
+    for index, target_symbol, queue_symbol, side, deadline, offset, signal_entries in planned:
+        signal_items = _queue_items(
+            queue_symbol, signal_entries, signal_ids[offset:offset + len(signal_entries)], deadline,
         )
-        print(f"[{queue_symbol}] ✅ Сигнал положен в очередь")
-    except QueueNotFoundException as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        spans.append((index, target_symbol, queue_symbol, side, len(items), len(signal_items)))
+        items.extend(signal_items)
 
-    print(f"[{queue_symbol}] 📩 Принят сигнал: {signal.side.upper()} для {target_symbol}")
+    print(f"\n📦 Пакет: {len(batch)} сигналов, в очередь ставим {len(planned)}")
+    put_results = await _put_all(queue_manager, items)
 
-    return WebhookResponse(
-        status="accepted",
-        target_symbol=target_symbol,
-        queue_symbol=queue_symbol,
-        queued=True,
-        webhook=webhooks.get_webhook_url(target_symbol),
-        timestamp=created_at,
-    )
+    for index, target_symbol, queue_symbol, side, start, count in spans:
+        try:
+            result = _webhook_response(
+                target_symbol, queue_symbol, side, created_at,
+                items[start:start + count], put_results[start:start + count], queue_manager,
+            )
+        except HTTPException as e:
+            results[index] = BatchItemResult(index=index, status_code=e.status_code, error=e.detail)
+            continue
+        results[index] = BatchItemResult(index=index, status_code=200, result=result)
+
+    accepted = sum(1 for result in results if result.status_code == 200)
+    return BatchResponse(total=len(batch), accepted=accepted, failed=len(batch) - accepted, results=results)
 
 
 @router.post("/test-webhook/{symbol}")
@@ -167,7 +518,8 @@ async def list_webhooks():
     placeholder_webhooks = {}
 
     for symbol, url in webhooks.FINANDY_WEBHOOKS.items():
-        if webhooks.is_valid_webhook(url):
+        urls = [url] if isinstance(url, str) else url
+        if all(webhooks.is_valid_webhook(u) for u in urls):
             valid_webhooks[symbol] = url
         else:
             placeholder_webhooks[symbol] = url
@@ -187,29 +539,100 @@ async def list_instruments():
     return {"total": len(instruments), "instruments": instruments}
 
 
+def get_log_filter(
+    symbol: Optional[str] = Query(None, description="Совпадение по symbol или name"),
+    name: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="received / sent / error"),
+    side: Optional[str] = Query(None),
+    response_code: Optional[int] = Query(None),
+    since: Optional[float] = Query(None, description="Unix-время, включительно"),
+    until: Optional[float] = Query(None, description="Unix-время, не включительно"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+) -> LogFilter:
+    status_code = None
+    if status is not None:
+        try:
+            status_code = SignalStatus[status.upper()]
+        except KeyError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown status '{status}'. Allowed: {[s.name.lower() for s in SignalStatus]}",
+            )
+
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor '{cursor}'")
+
+    return LogFilter(
+        symbol=symbol,
+        name=name,
+        status=status_code,
+        side=side,
+        response_code=response_code,
+        since=since,
+        until=until,
+        cursor=cursor,
+    )
+
+
+@router.get("/logs", response_model=LogPage)
+async def query_logs(
+    log_filter: LogFilter = Depends(get_log_filter),
+    limit: int = Query(50, ge=1, le=1000),
+    repository: StorageBackend = Depends(get_repository),
+):
+    log_filter.limit = limit
+    try:
+        items, next_cursor = await run_in_threadpool(repository.query_logs, log_filter)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving logs: {str(e)}")
+
+    return LogPage(items=items, count=len(items), next_cursor=next_cursor)
+
+
+@router.get("/logs/export")
+async def export_logs(
+    log_filter: LogFilter = Depends(get_log_filter),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    compress: bool = Query(False, description="Сжать поток gzip (Content-Encoding: gzip)"),
+    chunk_size: int = Query(1000, ge=100, le=10000, description="Строк в одном запросе к БД"),
+    max_rows: Optional[int] = Query(None, ge=1, description="Остановиться после N строк"),
+    repository: StorageBackend = Depends(get_repository),
+):
+    """
+    Потоковая выгрузка журнала в NDJSON или CSV с теми же фильтрами, что и /logs.
+
+    Строки читаются keyset-курсором пачками по chunk_size в пуле потоков,
+    поэтому память сервера постоянна, а event loop не блокируется.
+    """
+    log_filter.limit = chunk_size
+    rows = repository.iter_logs(log_filter, max_rows)
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"signals-{int(time.time())}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export.encode_stream(rows, format, compress),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 @router.get("/logs/{symbol}", response_model=List[Dict[str, Any]])
 async def get_logs_json(
     symbol: str,
     limit: int = Query(20, ge=1, le=100),
-    repository: SignalRepository = Depends(get_repository),
+    repository: StorageBackend = Depends(get_repository),
 ):
     try:
         rows = repository.get_logs(symbol, limit)
-        columns = [
-            "id",
-            "symbol",
-            "name",
-            "data",
-            "status",
-            "created_at",
-            "sent_at",
-            "response_code",
-            "response_text",
-        ]
 
         results = []
-        for row in rows:
-            result_dict = dict(zip(columns, row))
+        for result_dict in rows:
             if result_dict["created_at"]:
                 result_dict["created_at_readable"] = time.ctime(result_dict["created_at"])
             if result_dict["sent_at"]:
@@ -225,7 +648,7 @@ async def get_logs_json(
 async def get_logs_html(
     symbol: str,
     limit: int = Query(20, ge=1, le=100),
-    repository: SignalRepository = Depends(get_repository),
+    repository: StorageBackend = Depends(get_repository),
 ):
     try:
         rows = repository.get_logs(symbol, limit)
@@ -233,8 +656,10 @@ async def get_logs_html(
             "id",
             "symbol",
             "name",
+            "side",
             "data",
             "status",
+            "error_class",
             "created_at",
             "sent_at",
             "response_code",
@@ -270,7 +695,8 @@ async def get_logs_html(
 
         headers = "".join(f"<th>{col.upper()}</th>" for col in columns)
         rows_html = "".join(
-            f"<tr>{''.join(f'<td>{cell}</td>' for cell in row)}</tr>" for row in rows
+            f"<tr>{''.join(f'<td>{html.escape(str(row[col]))}</td>' for col in columns)}</tr>"
+            for row in rows
         )
 
         return HTMLResponse(
@@ -288,12 +714,60 @@ async def get_logs_html(
         return HTMLResponse(content=error_html, status_code=500)
 
 
+@router.get("/dead-letters", response_model=Dict[str, Any])
+async def list_dead_letters(
+    limit: int = Query(50, ge=1, le=1000),
+    before_id: Optional[int] = Query(None, description="Курсор: id последней записи предыдущей страницы"),
+    name: Optional[str] = Query(None),
+    include_redriven: bool = Query(False, description="Показывать уже отправленные повторно"),
+    dead_letters: DeadLetterStore = Depends(get_dead_letters),
+):
+    """Сигналы, не отправленные после всех повторов (от новых к старым)"""
+    items = await run_in_threadpool(dead_letters.list, limit, before_id, name, include_redriven)
+    pending = await run_in_threadpool(dead_letters.pending_count, name)
+    return {
+        "items": items,
+        "count": len(items),
+        "pending": pending,
+        "next_before_id": items[-1]["id"] if len(items) == limit else None,
+    }
+
+
+@router.post("/dead-letters/redrive", response_model=Dict[str, Any])
+async def redrive_dead_letters(
+    request: RedriveRequest,
+    dead_letters: DeadLetterStore = Depends(get_dead_letters),
+    queue_manager: QueueManager = Depends(get_queue_manager),
+):
+    """Вернуть сигналы из dead-letter в очереди: по списку id, по инструменту или все (до limit)"""
+    entries = await run_in_threadpool(dead_letters.pending, request.ids, request.name, request.limit)
+
+    redriven: List[int] = []
+    failed: Dict[int, str] = {}
+    for dead_letter_id, queue_symbol, item in entries:
+        try:
+            await queue_manager.put(queue_symbol, item)
+            redriven.append(dead_letter_id)
+        except (QueueNotFoundException, QueueFullException) as e:
+            failed[dead_letter_id] = str(e)
+
+    await run_in_threadpool(dead_letters.mark_redriven, redriven)
+    print(f"♻️ Из dead-letter повторно поставлено в очереди: {len(redriven)}, ошибок: {len(failed)}")
+    return {"redriven": len(redriven), "ids": redriven, "failed": failed}
+
+
 @router.get("/health", response_model=HealthStatus)
 async def health_check(
     queue_manager: QueueManager = Depends(get_queue_manager),
+    repository: StorageBackend = Depends(get_repository),
+    idempotency: Optional[IdempotencyCache] = Depends(get_idempotency),
+    deadlines: Optional[DeadlinePolicy] = Depends(get_deadlines),
+    http_clients: List[WebhookClient] = Depends(get_http_clients),
+    breakers: Optional[CircuitBreakers] = Depends(get_breakers),
 ):
     placeholder_count = sum(
-        1 for url in webhooks.FINANDY_WEBHOOKS.values() if not webhooks.is_valid_webhook(url)
+        1 for symbol in webhooks.FINANDY_WEBHOOKS
+        if not all(webhooks.is_valid_webhook(url) for url in webhooks.get_destinations(symbol))
     )
 
     return HealthStatus(
@@ -303,6 +777,17 @@ async def health_check(
         queues_active=queue_manager.get_active_queues_count(),
         placeholder_webhooks=placeholder_count,
         valid_webhooks=len(webhooks.get_supported_instruments()) - placeholder_count,
+        log_backlog=repository.log_backlog,
+        durable_queue=queue_manager.journal is not None,
+        journal_pending=queue_manager.journal.pending_count if queue_manager.journal else 0,
+        idempotency=idempotency.stats() if idempotency else None,
+        backpressure=queue_manager.backpressure_stats(),
+        event_loops=queue_manager.loop_stats(),
+        deadlines=deadlines.stats() if deadlines else None,
+        http_pool=combined_pool_stats(http_clients),
+        circuit_breakers=breakers.stats() if breakers else None,
+        storage_backend=repository.name,
+        storage_durability=repository.durability.as_dict(),
     )
 
 
@@ -315,11 +800,16 @@ async def root():
         "endpoints": {
             "universal_webhook": "POST /api/v1/webhook",
             "webhook_with_symbol": "POST /api/v1/webhook/{symbol}",
+            "batch_webhook": "POST /api/v1/webhook/batch",
             "test_webhook": "POST /api/v1/test-webhook/{symbol}",
+            "logs_query": "GET /api/v1/logs",
+            "logs_export": "GET /api/v1/logs/export",
             "logs_json": "GET /api/v1/logs/{symbol}",
             "logs_html": "GET /api/v1/logs/html/{symbol}",
             "webhooks_list": "GET /api/v1/webhooks",
             "instruments_list": "GET /api/v1/instruments",
+            "dead_letters": "GET /api/v1/dead-letters",
+            "dead_letters_redrive": "POST /api/v1/dead-letters/redrive",
             "health_check": "GET /api/v1/health",
             "docs": "/docs",
         },
@@ -328,42 +818,47 @@ async def root():
 
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_stats(
-    repository: SignalRepository = Depends(get_repository),
+    since: Optional[float] = Query(None, description="Unix-время начала (по умолчанию сутки назад)"),
+    until: Optional[float] = Query(None, description="Unix-время конца (по умолчанию сейчас)"),
+    repository: StorageBackend = Depends(get_repository),
 ):
-    try:
-        rows = repository.get_logs("all", 1000)
-
-        if not rows:
-            return {"message": "No data available for statistics"}
-
-        stats = {
-            "total_signals": len(rows),
-            "status_distribution": {},
-            "symbol_distribution": {},
-            "recent_activity": {},
-        }
+    """Статистика по минутным/часовым агрегатам (точность границ — минута)"""
+    now = time.time()
+    until = now if until is None else until
+    since = until - 86400 if since is None else since
+    if since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be less than 'until'")
 
-        for row in rows:
-            status = row[4]
-            symbol = row[1]
-            created_at = row[5]
+    try:
+        totals = await run_in_threadpool(repository.get_stats, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating stats: {str(e)}")
 
-            stats["status_distribution"][status] = stats["status_distribution"].get(status, 0) + 1
-            stats["symbol_distribution"][symbol] = stats["symbol_distribution"].get(symbol, 0) + 1
+    if not totals["total"]:
+        return {"message": "No data available for statistics", "since": since, "until": until}
 
-            if time.time() - created_at <= 86400:
-                hour = time.strftime("%H:00", time.localtime(created_at))
-                stats["recent_activity"][hour] = stats["recent_activity"].get(hour, 0) + 1
+    latency_count = totals["latency_count"]
+    histogram_labels = [f"<={bound}ms" for bound in rollups.LATENCY_BUCKETS_MS]
+    histogram_labels.append(f">{rollups.LATENCY_BUCKETS_MS[-1]}ms")
 
-        stats["status_distribution"] = dict(
-            sorted(stats["status_distribution"].items(), key=lambda x: x[1], reverse=True)
-        )
-        stats["symbol_distribution"] = dict(
-            sorted(stats["symbol_distribution"].items(), key=lambda x: x[1], reverse=True)[:10]
-        )
-        stats["recent_activity"] = dict(sorted(stats["recent_activity"].items()))
-
-        return stats
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating stats: {str(e)}")
\ No newline at end of file
+    return {
+        "since": since,
+        "until": until,
+        "total_signals": totals["total"],
+        "status_distribution": dict(
+            sorted(totals["status"].items(), key=lambda x: x[1], reverse=True)
+        ),
+        "symbol_distribution": dict(
+            sorted(totals["symbol"].items(), key=lambda x: x[1], reverse=True)[:10]
+        ),
+        "side_distribution": totals["side"],
+        "recent_activity": {
+            time.strftime("%Y-%m-%d %H:00", time.localtime(hour)): count
+            for hour, count in sorted(totals["hourly"].items())
+        },
+        "latency": {
+            "count": latency_count,
+            "avg_ms": round(totals["latency_sum_us"] / latency_count / 1000, 3) if latency_count else None,
+            "histogram": dict(zip(histogram_labels, totals["histogram"])),
+        },
+    }
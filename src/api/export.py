@@ -0,0 +1,64 @@
+# src/api/export.py
+"""Кодирование выгрузки журнала в NDJSON / CSV с опциональным gzip"""
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, List
+
+
+CSV_COLUMNS = [
+    "id",
+    "symbol",
+    "name",
+    "side",
+    "status",
+    "error_class",
+    "created_at",
+    "sent_at",
+    "response_code",
+    "response_text",
+    "data",
+]
+
+
+def _ndjson(chunk: List[dict]) -> bytes:
+    return "".join(
+        json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in chunk
+    ).encode("utf-8")
+
+
+def _csv(chunk: List[dict], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in chunk:
+        values = dict(row)
+        values["data"] = json.dumps(row["data"], ensure_ascii=False, separators=(",", ":"))
+        writer.writerow(["" if values[col] is None else values[col] for col in CSV_COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_stream(chunks: Iterable[List[dict]], fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Синхронный генератор байтов: StreamingResponse сам гоняет его в пуле
+    потоков, так что чтение БД и сжатие не блокируют event loop.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    first = True
+
+    for chunk in chunks:
+        data = _ndjson(chunk) if fmt == "ndjson" else _csv(chunk, header=first)
+        first = False
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+
+    if fmt == "csv" and first:
+        data = _csv([], header=True)
+        yield compressor.compress(data) if compressor is not None else data
+
+    if compressor is not None:
+        yield compressor.flush()
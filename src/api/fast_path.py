@@ -0,0 +1,124 @@
+# src/api/fast_path.py
+"""
+Быстрый путь приёма вебхука (FAST_PATH=1, нужен пакет msgspec).
+
+Тело запроса декодируется и проверяется за один проход msgspec-структурами,
+повторяющими модели core/models.py, а ответ кодируется msgspec сразу в байты —
+без FastAPI-разбора тела, валидации Pydantic и повторной валидации
+response_model.
+
+Быстрый путь строже обычного: принимает только то, что принял бы и Pydantic
+(строки — строками, bool — true/false, число — числом). Всё остальное — ошибки,
+нестандартный Content-Type, приводимые Pydantic значения вроде "true" —
+уходит в обычный обработчик FastAPI, поэтому ответы 422 и решения о приёме
+совпадают. Совместимость проверяет benchmarks/fast_path_compat.py.
+
+Без msgspec модуль импортируется, но быстрый путь выключен.
+"""
+from typing import Annotated, Any, Awaitable, Callable, Dict, Optional, Type
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from config.settings import settings
+
+try:
+    import msgspec
+except ImportError:  # необязательная зависимость
+    msgspec = None
+
+
+if msgspec is not None:
+    class CloseDecrease(msgspec.Struct):
+        type: str
+        amount: str
+
+    class CloseOrder(msgspec.Struct):
+        action: str
+        decrease: CloseDecrease
+        checkProfit: bool
+        price: str = ""
+
+    class OpenOrder(msgspec.Struct):
+        amountType: str
+        amount: str
+        enabled: bool
+
+    class DCAOrder(msgspec.Struct):
+        amountType: str
+        amount: str
+        checkProfit: bool
+
+    class SLConfig(msgspec.Struct, kw_only=True):
+        price: str = ""
+        update: bool
+
+    class TradingSignal(msgspec.Struct):
+        name: str
+        secret: str
+        side: str
+        symbol: str
+        close: CloseOrder
+        open: OpenOrder
+        dca: DCAOrder
+        sl: SLConfig
+        tp: Optional[Dict[str, Any]] = None
+        ttl: Optional[Annotated[float, msgspec.Meta(ge=0)]] = None
+
+        def model_dump(self) -> Dict[str, Any]:
+            """Тот же словарь, что core.models.TradingSignal.model_dump() (ttl исключён)"""
+            data = msgspec.to_builtins(self)
+            del data["ttl"]
+            return data
+
+    _decoder = msgspec.json.Decoder(TradingSignal)
+    _encoder = msgspec.json.Encoder()
+
+
+def enabled() -> bool:
+    return settings.fast_path and msgspec is not None
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() == "application/json"
+
+
+def decode_signal(body: bytes, content_type: Optional[str] = None) -> Optional["TradingSignal"]:
+    """Сигнал из тела запроса или None — тогда решает обычный путь FastAPI"""
+    if not body or not _is_json(content_type):
+        return None
+    try:
+        return _decoder.decode(body)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        return None
+
+
+def encode_model(model: Any) -> bytes:
+    """JSON ответа из полей Pydantic-модели без её сериализатора"""
+    return _encoder.encode(model.__dict__)
+
+
+def route_class(
+    fast_handler: Callable[[Request, Any, bytes], Awaitable[Response]],
+) -> Type[APIRoute]:
+    """
+    Класс маршрута: сначала быстрый путь (fast_handler(request, signal, body)),
+    если тело не прошло строгую проверку — обычный обработчик эндпоинта.
+    """
+
+    class FastSignalRoute(APIRoute):
+        def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+            handler = super().get_route_handler()
+
+            async def route_handler(request: Request) -> Response:
+                if enabled():
+                    body = await request.body()
+                    signal = decode_signal(body, request.headers.get("content-type"))
+                    if signal is not None:
+                        return await fast_handler(request, signal, body)
+                # Тело уже прочитано и закэшировано в request — FastAPI возьмёт его оттуда
+                return await handler(request)
+
+            return route_handler
+
+    return FastSignalRoute
@@ -0,0 +1,164 @@
+# src/api/ingress.py
+"""
+Многопроцессный режим: эндпоинты ingress-процесса и обработчик диспетчера.
+
+Ingress-процесс проверяет сигнал (pydantic) и передаёт его диспетчеру через
+Unix-сокет; диспетчер записывает сигнал в журнал, ставит в очередь и
+отвечает тем же WebhookResponse, что и однопроцессный сервер. Дедупликация
+повторов выполняется в диспетчере, поэтому работает между ingress-процессами.
+Пакеты /webhook/batch уходят диспетчеру телом запроса и разбираются там.
+"""
+import os
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from api.endpoints import accept_batch, accept_signal, health_check, signal_payload
+from core.exceptions import DispatcherUnavailableException
+from core.models import BatchResponse, RawPayload, TradingSignal, WebhookResponse
+from services.handoff import HandoffClient
+from services.idempotency import body_digest
+
+
+router = APIRouter()
+
+
+@router.post("/webhook", response_model=WebhookResponse)
+async def universal_webhook(
+    signal: TradingSignal,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    return await _hand_off(signal, None, request, response, idempotency_key)
+
+
+@router.post("/webhook/batch", response_model=BatchResponse)
+async def batch_webhook(
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """Пакет передаётся диспетчеру как есть: разбор и проверка сигналов — там же, где у /webhook/batch"""
+    body = await request.body()
+    reply = await _request(request, {
+        "op": "batch",
+        "body": body.decode("utf-8", "replace"),
+        "content_type": request.headers.get("content-type"),
+        "idempotency_key": idempotency_key,
+    }, "Пакет")
+    if reply.get("replayed"):
+        response.headers["Idempotent-Replayed"] = "true"
+    return reply["result"]
+
+
+# После /webhook/batch, иначе "batch" будет принят за символ
+@router.post("/webhook/{symbol}", response_model=WebhookResponse)
+async def webhook_with_symbol(
+    symbol: str,
+    signal: TradingSignal,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    return await _hand_off(signal, symbol, request, response, idempotency_key)
+
+
+@router.get("/health", response_model=Dict[str, Any])
+async def ingress_health(request: Request):
+    """Состояние диспетчера глазами этого ingress-процесса"""
+    handoff: HandoffClient = request.app.state.handoff
+    try:
+        reply = await handoff.request({"op": "health"})
+    except DispatcherUnavailableException as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {**reply["result"], "ingress_pid": os.getpid()}
+
+
+async def _hand_off(
+    signal: TradingSignal,
+    url_symbol: Optional[str],
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str],
+) -> Dict[str, Any]:
+    body = await request.body()
+    data = signal_payload(signal, body)
+    message = {
+        "op": "submit",
+        "url_symbol": url_symbol,
+        "ttl": signal.ttl,
+        "idempotency_key": idempotency_key,
+    }
+    # В кадре либо словарь, либо тело (passthrough) — диспетчер разбирает сигнал один раз
+    if isinstance(data, RawPayload):
+        message["body"] = body.decode("utf-8", "replace")
+    else:
+        message["data"] = data
+        message["digest"] = body_digest(body)
+    reply = await _request(request, message, f"Сигнал {signal.name}")
+    if reply.get("replayed"):
+        response.headers["Idempotent-Replayed"] = "true"
+    return reply["result"]
+
+
+async def _request(request: Request, message: Dict[str, Any], what: str) -> Dict[str, Any]:
+    """Запрос к диспетчеру; ошибка диспетчера становится HTTP-ошибкой ingress"""
+    handoff: HandoffClient = request.app.state.handoff
+    try:
+        reply = await handoff.request(message)
+    except DispatcherUnavailableException as e:
+        print(f"❌ {what} не передан диспетчеру: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    error = reply.get("error")
+    if error:
+        raise HTTPException(status_code=error["status_code"], detail=error["detail"], headers=error.get("headers"))
+    return reply
+
+
+def dispatch_handler(state):
+    """Обработчик запросов ingress-процессов для HandoffServer диспетчера"""
+
+    async def handle(message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get("op")
+        if op == "submit":
+            body = message.get("body", "").encode("utf-8")
+            data = message.get("data")
+            try:
+                result, replayed = await accept_signal(
+                    RawPayload.from_body(body) if data is None else data,
+                    message.get("url_symbol"),
+                    message.get("idempotency_key"),
+                    body,
+                    state.repository,
+                    state.queue_manager,
+                    state.idempotency,
+                    state.deadlines,
+                    message.get("ttl"),
+                    message.get("digest"),
+                )
+            except HTTPException as e:
+                return {"error": {"status_code": e.status_code, "detail": e.detail, "headers": e.headers}}
+            return {"result": result.model_dump(), "replayed": replayed}
+        if op == "batch":
+            try:
+                result, replayed = await accept_batch(
+                    message.get("body", "").encode("utf-8"),
+                    message.get("content_type"),
+                    message.get("idempotency_key"),
+                    state.repository,
+                    state.queue_manager,
+                    state.idempotency,
+                    state.deadlines,
+                )
+            except HTTPException as e:
+                return {"error": {"status_code": e.status_code, "detail": e.detail, "headers": e.headers}}
+            return {"result": result.model_dump(), "replayed": replayed}
+        if op == "health":
+            health = await health_check(
+                state.queue_manager, state.repository, state.idempotency, state.deadlines,
+                state.http_clients, state.breakers,
+            )
+            return {"result": health.model_dump()}
+        return {"error": {"status_code": 400, "detail": f"Unknown handoff op '{op}'"}}
+
+    return handle
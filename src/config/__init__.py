@@ -2,5 +2,6 @@ from config.webhooks import (  # ✅ Без точек
     FINANDY_WEBHOOKS,
     get_supported_instruments,
     get_webhook_url,
+    get_destinations,
     is_valid_webhook
 )
\ No newline at end of file
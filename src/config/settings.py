@@ -8,9 +8,107 @@ class Settings:
     def __init__(self):
         self.db_path = os.getenv("DB_PATH", "signals.db")
         self.port = int(os.getenv("PORT", "8001"))
+        # Ограничение отправки: одна отправка в RATE_LIMIT_MS на получателя,
+        # до RATE_LIMIT_BURST подряд без ожидания
         self.rate_limit_ms = float(os.getenv("RATE_LIMIT_MS", "300"))
+        self.rate_limit_burst = float(os.getenv("RATE_LIMIT_BURST", "1"))
+        self.rate_limit_key = os.getenv("RATE_LIMIT_KEY", "url")
+        self.rate_limit_overrides = os.getenv("RATE_LIMIT_OVERRIDES", "")
+        self.global_rate_limit_per_s = float(os.getenv("GLOBAL_RATE_LIMIT_PER_S", "0"))
+        self.global_rate_limit_burst = float(os.getenv("GLOBAL_RATE_LIMIT_BURST", "1"))
         self.request_timeout = float(os.getenv("REQUEST_TIMEOUT", "10.0"))
+        # Быстрый путь приёма вебхука на msgspec (если пакет установлен), см. api/fast_path.py
+        self.fast_path = os.getenv("FAST_PATH", "1").lower() in ("1", "true", "yes")
+        # Пакетный приём /webhook/batch: не больше стольких сигналов в запросе
+        self.batch_max_items = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+        # Passthrough: в Finandy и в журнал уходят исходные байты тела запроса
+        # (сигналы с полем ttl всё равно пересобираются — ttl в Finandy не передаётся)
+        self.passthrough_body = os.getenv("PASSTHROUGH_BODY", "0").lower() in ("1", "true", "yes")
+        # Пул соединений к Finandy: размер, предел на хост (0 — без предела), keep-alive, кэш DNS
+        self.http_pool_limit = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+        self.http_pool_limit_per_host = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "32"))
+        self.http_keepalive_s = float(os.getenv("HTTP_KEEPALIVE_S", "60"))
+        self.http_dns_cache_ttl_s = int(os.getenv("HTTP_DNS_CACHE_TTL_S", "300"))
+        # Прогрев: столько соединений открывается к каждому хосту при старте и
+        # после простоя HTTP_WARM_INTERVAL_S; 0 — без прогрева
+        self.http_warm_connections = int(os.getenv("HTTP_WARM_CONNECTIONS", "2"))
+        self.http_warm_interval_s = float(os.getenv("HTTP_WARM_INTERVAL_S", "30"))
         self.log_limit = int(os.getenv("LOG_LIMIT", "20"))
+        self.log_batch_size = int(os.getenv("LOG_BATCH_SIZE", "200"))
+        self.log_flush_interval_ms = float(os.getenv("LOG_FLUSH_INTERVAL_MS", "50"))
+        self.log_response_excerpt = int(os.getenv("LOG_RESPONSE_EXCERPT", "256"))
+        # Партиции журнала: "day" или "week"; 0 дней — хранить всё
+        self.partition_dir = os.getenv("PARTITION_DIR", "")
+        self.partition_period = os.getenv("PARTITION_PERIOD", "day")
+        self.retention_days = int(os.getenv("RETENTION_DAYS", "0"))
+        # Журнал очереди на диске: переживает перезапуск контейнера
+        self.durable_queue = os.getenv("DURABLE_QUEUE", "0").lower() in ("1", "true", "yes")
+        self.queue_journal_path = os.getenv(
+            "QUEUE_JOURNAL_PATH", os.path.join(os.path.dirname(self.db_path), "queue.journal")
+        )
+        self.journal_flush_interval_ms = float(os.getenv("JOURNAL_FLUSH_INTERVAL_MS", "2"))
+        self.journal_wait_for_sync = os.getenv("JOURNAL_WAIT_FOR_SYNC", "1").lower() in ("1", "true", "yes")
+        # Повторы отправки: таймауты, ошибки соединения и коды RETRY_STATUSES (по умолчанию 429, 5xx)
+        self.retry_max_attempts = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+        self.retry_base_delay_ms = float(os.getenv("RETRY_BASE_DELAY_MS", "200"))
+        self.retry_max_delay_ms = float(os.getenv("RETRY_MAX_DELAY_MS", "5000"))
+        self.retry_max_age_s = float(os.getenv("RETRY_MAX_AGE_S", "60"))
+        self.retry_max_block_s = float(os.getenv("RETRY_MAX_BLOCK_S", "15"))
+        self.retry_statuses = os.getenv("RETRY_STATUSES", "")
+        # Выключатель на получателя (URL или хост): размыкается при доле ошибок и медленных
+        # ответов >= CIRCUIT_ERROR_RATE за окно; пока разомкнут — fail_fast (в dead-letter)
+        # или hold (сигналы ждут пробы). CIRCUIT_BREAKER=0 — выключен. Все вебхуки Finandy
+        # на одном хосте, поэтому CIRCUIT_KEY=host даёт один выключатель на все аккаунты
+        self.circuit_breaker = os.getenv("CIRCUIT_BREAKER", "1").lower() in ("1", "true", "yes")
+        self.circuit_policy = os.getenv("CIRCUIT_POLICY", "fail_fast")
+        self.circuit_key = os.getenv("CIRCUIT_KEY", "url")
+        self.circuit_window_s = float(os.getenv("CIRCUIT_WINDOW_S", "30"))
+        self.circuit_min_requests = int(os.getenv("CIRCUIT_MIN_REQUESTS", "5"))
+        self.circuit_error_rate = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+        self.circuit_slow_ms = float(os.getenv("CIRCUIT_SLOW_MS", "5000"))
+        self.circuit_open_s = float(os.getenv("CIRCUIT_OPEN_S", "15"))
+        self.circuit_probes = int(os.getenv("CIRCUIT_PROBES", "1"))
+        self.dead_letter_path = os.getenv(
+            "DEAD_LETTER_PATH", os.path.join(os.path.dirname(self.db_path), "dead_letters.db")
+        )
+        # Воркер инструмента останавливается после такого простоя и создаётся снова по сигналу
+        self.worker_idle_timeout_s = float(os.getenv("WORKER_IDLE_TIMEOUT_S", "300"))
+        # Схлопывание ожидающих сигналов: "*=replace:sl|net,BOMEUSDT=replace:sl"; пусто — выключено
+        self.coalesce_rules = os.getenv("COALESCE_RULES", "")
+        # Приоритеты в очереди инструмента, например "BOMEUSDT=sl+close>open" — SL и закрытия
+        # вперёд входов/DCA; по умолчанию выключено (строгий FIFO). Закрытие, обогнавшее
+        # стоявший раньше вход, оставит позицию открытой — включайте для тех инструментов,
+        # где стратегия это допускает
+        self.queue_priorities = os.getenv("QUEUE_PRIORITIES", "")
+        # Срок жизни сигнала: общий (0 — без срока) и переопределения "BOMEUSDT=10,sl=120";
+        # просроченный сигнал отбрасывается (drop) или уходит в dead-letter (dead_letter)
+        self.signal_ttl_s = float(os.getenv("SIGNAL_TTL_S", "60"))
+        self.signal_ttl_overrides = os.getenv("SIGNAL_TTL_OVERRIDES", "")
+        self.expired_action = os.getenv("EXPIRED_ACTION", "drop")
+        # Ёмкость очередей (0 — без предела) и политика при переполнении:
+        # reject (429 + Retry-After), drop_oldest, drop_by_type (виды из QUEUE_SHED_KINDS по порядку)
+        self.queue_max_per_symbol = int(os.getenv("QUEUE_MAX_PER_SYMBOL", "100"))
+        self.queue_max_total = int(os.getenv("QUEUE_MAX_TOTAL", "5000"))
+        self.queue_overflow_policy = os.getenv("QUEUE_OVERFLOW_POLICY", "reject")
+        self.queue_shed_kinds = os.getenv("QUEUE_SHED_KINDS", "sl,open")
+        # Дедупликация повторов: окно (с) и размер кэша ответов; 0 секунд — выключено
+        self.idempotency_ttl_s = float(os.getenv("IDEMPOTENCY_TTL_S", "60"))
+        self.idempotency_max_entries = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+        # Потоки-диспетчеры: инструменты делятся между N циклами событий; 0 — всё в одном цикле
+        self.dispatch_threads = int(os.getenv("DISPATCH_THREADS", "0"))
+        self.loop_lag_interval_ms = float(os.getenv("LOOP_LAG_INTERVAL_MS", "500"))
+        # Многопроцессный режим (launcher.py): ingress-процессы передают сигналы
+        # диспетчеру через Unix-сокет; остальной API диспетчер обслуживает на DISPATCHER_PORT
+        self.dispatch_socket = os.getenv("DISPATCH_SOCKET", "")
+        self.ingress_workers = int(os.getenv("INGRESS_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+        self.dispatcher_port = int(os.getenv("DISPATCHER_PORT", str(self.port + 1)))
+        self.handoff_timeout_s = float(os.getenv("HANDOFF_TIMEOUT_S", "5"))
+        # Хранилище журнала: sqlite, memory (последние N записей), null, segments
+        self.storage_backend = os.getenv("STORAGE_BACKEND", "sqlite")
+        self.memory_log_capacity = int(os.getenv("MEMORY_LOG_CAPACITY", "100000"))
+        self.segment_dir = os.getenv("SEGMENT_DIR", "")
+        self.segment_max_mb = float(os.getenv("SEGMENT_MAX_MB", "16"))
+        self.segment_fsync_interval_ms = float(os.getenv("SEGMENT_FSYNC_INTERVAL_MS", "1000"))
 
 
 settings = Settings()
\ No newline at end of file
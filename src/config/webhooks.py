@@ -1,6 +1,13 @@
-"""Конфигурация вебхуков Finandy"""
+"""
+Конфигурация вебхуков Finandy.
 
-FINANDY_WEBHOOKS = {
+Значение — URL или список URL: сигнал отправляется во все получатели
+(например, зеркальные аккаунты) параллельно, у каждого своя очередь,
+свой лимит частоты и своя строка в журнале.
+"""
+from typing import List, Optional, Union
+
+FINANDY_WEBHOOKS: dict[str, Union[str, List[str]]] = {
     "1MBABYDOGEUSDT": "https://hook.finandy.com/TuaL5bAQjTO2kP4trlUK",
     "1MBABYDOGEUSDTS": "https://hook.finandy.com/09V1WmbUktZCq_8trlUK",
     "1000CATUSDT": "https://hook.finandy.com/iFh_Ic-r0LeOFkz5rlUK",
@@ -97,21 +104,31 @@ def get_supported_instruments() -> list[str]:
     return list(FINANDY_WEBHOOKS.keys())
 
 
-def get_webhook_url(symbol: str) -> str:
-    """Получить URL вебхука для символа"""
+def get_destinations(symbol: str) -> List[str]:
+    """Все URL получателей символа (заглушки нормализуются); пусто — символ неизвестен"""
     normalized = symbol.strip().upper()   # ✨ нормализация
-    url = FINANDY_WEBHOOKS.get(normalized)
+    value = FINANDY_WEBHOOKS.get(normalized)
+    if not value:
+        return []
+    urls = [value] if isinstance(value, str) else list(value)
+    return [
+        f"https://hook.finandy.com/PLACEHOLDER_{normalized}" if not is_valid_webhook(url) else url
+        for url in urls
+    ]
+
 
-    if not url:
+def get_webhook_url(symbol: str, destination: int = 0) -> Optional[str]:
+    """Получить URL вебхука для символа (destination — номер получателя)"""
+    urls = get_destinations(symbol)
+
+    if destination >= len(urls):
+        normalized = symbol.strip().upper()
         print(f"[webhooks.py] ⚠️ Символ '{symbol}' (нормализован: '{normalized}') не найден в FINANDY_WEBHOOKS")
         return None
 
-    if "PLACEHOLDER" in url or "XXXXXXXX" in url:
-        return f"https://hook.finandy.com/PLACEHOLDER_{normalized}"
-
-    return url
+    return urls[destination]
 
 
 def is_valid_webhook(url: str) -> bool:
     """Проверить, является ли вебхук валидным (не заглушкой)"""
-    return url and "PLACEHOLDER" not in url and "XXXXXXXX" not in url
+    return bool(url) and "PLACEHOLDER" not in url and "XXXXXXXX" not in url
@@ -1,11 +1,30 @@
 # src/core/__init__.py
-from core.models import TradingSignal, WebhookResponse, HealthStatus  # ✅ Без точек
-from core.exceptions import QueueNotFoundException, WebhookSendException  # ✅ Без точек
+from core.models import (  # ✅ Без точек
+    TradingSignal,
+    WebhookResponse,
+    HealthStatus,
+    SignalStatus,
+    ErrorClass,
+    QueuedSignal,
+)
+from core.exceptions import (  # ✅ Без точек
+    QueueNotFoundException,
+    QueueFullException,
+    WebhookSendException,
+    WebhookTimeoutException,
+    WebhookConnectionException,
+)
 
 __all__ = [
     "TradingSignal",
     "WebhookResponse",
     "HealthStatus",
+    "SignalStatus",
+    "ErrorClass",
+    "QueuedSignal",
     "QueueNotFoundException",
-    "WebhookSendException"
+    "QueueFullException",
+    "WebhookSendException",
+    "WebhookTimeoutException",
+    "WebhookConnectionException"
 ]
\ No newline at end of file
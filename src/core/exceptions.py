@@ -10,6 +10,26 @@ class WebhookSendException(WebhookException):
     """Исключение при отправке вебхука"""
     pass
 
+class WebhookTimeoutException(WebhookSendException):
+    """Таймаут при отправке вебхука"""
+    pass
+
+class WebhookConnectionException(WebhookSendException):
+    """Ошибка соединения при отправке вебхука"""
+    pass
+
 class QueueNotFoundException(WebhookException):
     """Исключение для отсутствующих очередей"""
-    pass
\ No newline at end of file
+    pass
+
+class DispatcherUnavailableException(WebhookException):
+    """Процесс-диспетчер недоступен или не ответил вовремя"""
+    pass
+
+class QueueFullException(WebhookException):
+    """Очередь переполнена, сигнал не принят"""
+
+    def __init__(self, message: str, retry_after: int = 1, policy: str = "reject"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.policy = policy
\ No newline at end of file
@@ -1,5 +1,33 @@
+import json
+from dataclasses import dataclass
+from enum import IntEnum
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+
+class SignalStatus(IntEnum):
+    """Статус сигнала в журнале (хранится в БД как число)"""
+    RECEIVED = 0
+    SENT = 1
+    ERROR = 2
+    DEAD_LETTER = 3    # повторы исчерпаны, сигнал в dead-letter очереди
+    COALESCED = 4      # убран из очереди правилами схлопывания (заменён или погашен)
+    DROPPED = 5        # вытеснен из переполненной очереди
+    REJECTED = 6       # не принят: очередь переполнена (ответ 429)
+    EXPIRED = 7        # истёк срок жизни до отправки, отброшен
+
+
+class ErrorClass(IntEnum):
+    """Класс ошибки доставки (хранится в БД как число)"""
+    NONE = 0
+    HTTP = 1          # Finandy ответил не 200
+    TIMEOUT = 2       # таймаут запроса
+    CONNECTION = 3    # ошибка соединения / клиента
+    CONFIG = 4        # нет вебхука или очереди для символа
+    UNEXPECTED = 5    # всё остальное
+    EXPIRED = 6       # истёк срок жизни сигнала, не отправлялся
+    CIRCUIT_OPEN = 7  # выключатель получателя разомкнут, не отправлялся
+
 
 class CloseDecrease(BaseModel):
     type: str
@@ -35,6 +63,44 @@ class TradingSignal(BaseModel):
     dca: DCAOrder
     sl: SLConfig
     tp: Optional[Dict[str, Any]] = None
+    # Срок жизни сигнала, секунды; в Finandy не передаётся
+    ttl: Optional[float] = Field(None, ge=0, exclude=True)
+
+class RawPayload(dict):
+    """
+    Данные сигнала вместе с исходными байтами тела запроса (режим passthrough).
+
+    Словарь нужен для маршрутизации, схлопывания и статистики; в Finandy,
+    журнал БД и журнал очереди уходят байты raw без повторной сериализации.
+    """
+    __slots__ = ("raw",)
+
+    def __init__(self, data: Dict[str, Any], raw: bytes):
+        super().__init__(data)
+        self.raw = raw
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "RawPayload":
+        return cls(json.loads(body), body)
+
+
+@dataclass
+class QueuedSignal:
+    """Сигнал в очереди на отправку (внутренний объект, без валидации)"""
+    name: str
+    data: Dict[str, Any]
+    created_at: float
+    log_symbol: str = "universal"
+    journal_id: Optional[int] = None
+    # id строки журнала, созданной при приёме; результат отправки пишется в неё же
+    signal_id: Optional[int] = None
+    # Текущий статус этой строки: из него агрегаты /stats переносят сигнал в статус результата
+    log_status: SignalStatus = SignalStatus.RECEIVED
+    dequeued_at: Optional[float] = None
+    # Погашен правилами схлопывания — в очередь не ставится
+    coalesced: bool = False
+    # Unix-время, после которого сигнал не отправляется (None — без срока)
+    deadline: Optional[float] = None
 
 class WebhookResponse(BaseModel):
     status: str
@@ -43,6 +109,21 @@ class WebhookResponse(BaseModel):
     queued: bool
     webhook: str
     timestamp: float
+    overflow_policy: Optional[str] = None
+    destinations: List[str] = []    # по получателям: queued, coalesced или rejected
+
+class BatchItemResult(BaseModel):
+    """Итог одного сигнала пакета; status_code — тот, что вернул бы /webhook"""
+    index: int
+    status_code: int
+    result: Optional[WebhookResponse] = None
+    error: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    total: int
+    accepted: int                   # поставлены в очередь или схлопнуты
+    failed: int
+    results: List[BatchItemResult]  # в порядке сигналов в запросе
 
 class HealthStatus(BaseModel):
     status: str
@@ -50,4 +131,37 @@ class HealthStatus(BaseModel):
     instruments_loaded: int
     queues_active: int
     placeholder_webhooks: int
-    valid_webhooks: int
\ No newline at end of file
+    valid_webhooks: int
+    log_backlog: int = 0
+    durable_queue: bool = False
+    journal_pending: int = 0
+    storage_backend: str = "sqlite"
+    storage_durability: Dict[str, Any] = {}
+    idempotency: Optional[Dict[str, int]] = None
+    backpressure: Optional[Dict[str, Any]] = None
+    deadlines: Optional[Dict[str, Any]] = None
+    http_pool: Optional[Dict[str, Any]] = None
+    circuit_breakers: Optional[List[Dict[str, Any]]] = None
+    event_loops: Optional[List[Dict[str, Any]]] = None
+class RedriveRequest(BaseModel):
+    """Повторная отправка из dead-letter: по id, по инструменту или всё подряд"""
+    ids: Optional[List[int]] = None
+    name: Optional[str] = None
+    limit: int = 1000
+
+class LogFilter(BaseModel):
+    """Фильтр журнала сигналов (все поля необязательны)"""
+    symbol: Optional[str] = None          # совпадение по symbol ИЛИ name
+    name: Optional[str] = None
+    status: Optional[SignalStatus] = None
+    side: Optional[str] = None
+    response_code: Optional[int] = None
+    since: Optional[float] = None         # unix-время, включительно
+    until: Optional[float] = None         # unix-время, не включительно
+    cursor: Optional[str] = None
+    limit: int = 50
+
+class LogPage(BaseModel):
+    items: List[Dict[str, Any]]
+    count: int
+    next_cursor: Optional[str] = None
@@ -1,4 +1,6 @@
 # src/database/__init__.py
 from database.repository import SignalRepository  # ✅ Без точек
+from database.writer import SignalLogWriter  # ✅ Без точек
+from database.backends import StorageBackend, Durability, create_backend
 
-__all__ = ["SignalRepository"]
\ No newline at end of file
+__all__ = ["SignalRepository", "SignalLogWriter", "StorageBackend", "Durability", "create_backend"]
@@ -0,0 +1,36 @@
+# src/database/backends/__init__.py
+import os
+from typing import Optional
+from config.settings import settings
+from database.backends.base import StorageBackend, Durability
+
+BACKENDS = ("sqlite", "memory", "null", "segments")
+
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Хранилище журнала по имени (по умолчанию settings.storage_backend)"""
+    name = (name or settings.storage_backend).strip().lower()
+
+    # Импорты внутри: database.repository сам импортирует этот пакет
+    if name == "sqlite":
+        from database.repository import SignalRepository
+        return SignalRepository()
+    if name == "memory":
+        from database.backends.memory import MemoryBackend
+        return MemoryBackend(settings.memory_log_capacity, settings.log_response_excerpt)
+    if name == "null":
+        from database.backends.null import NullBackend
+        return NullBackend()
+    if name == "segments":
+        from database.backends.segments import SegmentBackend
+        return SegmentBackend(
+            settings.segment_dir or os.path.join(os.path.dirname(settings.db_path), "segments"),
+            int(settings.segment_max_mb * 1024 * 1024),
+            settings.segment_fsync_interval_ms,
+            settings.retention_days,
+            settings.log_response_excerpt,
+        )
+    raise ValueError(f"Unknown storage backend '{name}', allowed: {list(BACKENDS)}")
+
+
+__all__ = ["StorageBackend", "Durability", "BACKENDS", "create_backend"]
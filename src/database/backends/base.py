@@ -0,0 +1,127 @@
+# src/database/backends/base.py
+"""Интерфейс хранилища журнала сигналов"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from typing import Iterator, List, Optional, Tuple
+from core.models import SignalStatus, ErrorClass, LogFilter
+
+
+@dataclass(frozen=True)
+class Durability:
+    """Что хранилище гарантирует для записанных логов"""
+    persistent: bool        # записи переживают перезапуск процесса
+    crash_safe: bool        # подтверждённая запись не теряется при падении процесса
+    full_history: bool      # хранится вся история (с учётом ретеншна), а не последние N записей
+    note: str = ""
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class StorageBackend(ABC):
+    """
+    Хранилище журнала сигналов.
+
+    Эндпоинты и воркеры работают только через этот интерфейс; конкретная
+    реализация выбирается в main.lifespan по settings.storage_backend.
+    """
+
+    name: str = "base"
+    durability: Durability = Durability(persistent=False, crash_safe=False, full_history=False)
+
+    def __init__(self):
+        self.log_limit = 50
+
+    # === Жизненный цикл ===
+
+    def init_db(self) -> None:
+        """Подготовить хранилище к работе"""
+
+    def start_writer(self, max_batch_size: int = 200, max_delay_ms: float = 50.0) -> None:
+        """Запустить фоновую запись, если она есть у хранилища"""
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться записи всех принятых логов"""
+        return True
+
+    def close(self) -> None:
+        """Дописать принятые логи и освободить ресурсы"""
+
+    @property
+    def log_backlog(self) -> int:
+        """Количество логов, ожидающих записи"""
+        return 0
+
+    def drop_expired_partitions(self) -> List[int]:
+        """Удалить данные старше окна хранения"""
+        return []
+
+    # === Запись ===
+
+    @abstractmethod
+    def log_signal(self, symbol: str, name: str, data: dict, status: SignalStatus,
+                   created_at: float, sent_at: Optional[float] = None,
+                   response_code: Optional[int] = None, response_text: Optional[str] = None,
+                   error_class: ErrorClass = ErrorClass.NONE) -> int:
+        """Записать новую строку журнала. Возвращает её id"""
+
+    def log_signals(self, entries: List[tuple]) -> List[int]:
+        """
+        Записать несколько строк разом; entries — кортежи аргументов log_signal.
+        Возвращает id в том же порядке. Хранилища с транзакциями пишут их одной пачкой.
+        """
+        return [self.log_signal(*entry) for entry in entries]
+
+    @abstractmethod
+    def update_signal(self, signal_id: int, name: str, data: dict, created_at: float,
+                      status: SignalStatus, dequeued_at: Optional[float] = None,
+                      sent_at: Optional[float] = None, response_code: Optional[int] = None,
+                      response_text: Optional[str] = None,
+                      error_class: ErrorClass = ErrorClass.NONE,
+                      previous_status: SignalStatus = SignalStatus.RECEIVED) -> None:
+        """
+        Записать результат обработки в строку, созданную log_signal.
+        previous_status — статус строки до обновления: в агрегатах сигнал
+        переносится из него в status, а не считается второй раз.
+        """
+
+    # === Чтение ===
+
+    @abstractmethod
+    def query_logs(self, log_filter: LogFilter) -> Tuple[List[dict], Optional[str]]:
+        """Страница журнала по фильтру: (строки, курсор следующей страницы)"""
+
+    @abstractmethod
+    def get_stats(self, since: float, until: float) -> dict:
+        """Статистика за [since, until) в формате rollups.read_stats"""
+
+    def iter_logs(self, log_filter: LogFilter, max_rows: Optional[int] = None) -> Iterator[List[dict]]:
+        """
+        Все строки по фильтру пачками по log_filter.limit.
+
+        Каждая пачка — отдельный запрос с курсором после предыдущей,
+        поэтому между пачками хранилище ничего не держит открытым.
+        """
+        page_filter = log_filter.model_copy()
+        returned = 0
+        while True:
+            if max_rows is not None:
+                page_filter.limit = min(log_filter.limit, max_rows - returned)
+                if page_filter.limit <= 0:
+                    return
+            rows, cursor = self.query_logs(page_filter)
+            if rows:
+                returned += len(rows)
+                yield rows
+            if cursor is None:
+                return
+            page_filter.cursor = cursor
+
+    def get_logs(self, symbol: str, limit: int = None) -> List[dict]:
+        """Получение последних логов по символу (или "all")"""
+        if limit is None:
+            limit = self.log_limit
+
+        log_filter = LogFilter(symbol=None if symbol == "all" else symbol, limit=limit)
+        rows, _ = self.query_logs(log_filter)
+        return rows
@@ -0,0 +1,96 @@
+# src/database/backends/memory.py
+"""Журнал сигналов в памяти: кольцевой буфер последних N записей"""
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from core.models import SignalStatus, ErrorClass, LogFilter
+from database import schema, query, rollups
+from database.backends.base import StorageBackend, Durability
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Последние capacity записей в OrderedDict (id → запись), старые вытесняются.
+
+    Запись и обновление — O(1) без ввода-вывода; обновление заменяет строку
+    целиком, поэтому чтение фильтрует снимок буфера без блокировки. Страницы
+    журнала идут в порядке поступления; агрегаты для /stats ведутся отдельно и
+    переживают вытеснение строк.
+    """
+
+    name = "memory"
+    durability = Durability(
+        persistent=False,
+        crash_safe=False,
+        full_history=False,
+        note="только последние MEMORY_LOG_CAPACITY записей, всё теряется при перезапуске",
+    )
+
+    def __init__(self, capacity: int = 100_000, excerpt_limit: int = schema.RESPONSE_EXCERPT_LIMIT):
+        super().__init__()
+        if capacity <= 0:
+            raise ValueError("Memory log capacity must be positive")
+        self.capacity = capacity
+        self.excerpt_limit = excerpt_limit
+        self._rows: "OrderedDict[int, list]" = OrderedDict()
+        self._rollups = rollups.MemoryRollups()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.rows_evicted = 0
+
+    def log_signal(self, symbol: str, name: str, data: dict, status: SignalStatus,
+                   created_at: float, sent_at: Optional[float] = None,
+                   response_code: Optional[int] = None, response_text: Optional[str] = None,
+                   error_class: ErrorClass = ErrorClass.NONE) -> int:
+        with self._lock:
+            row_id = self._next_id
+            self._next_id += 1
+            record = schema.build_record(
+                row_id, symbol, name, data, status, created_at, sent_at,
+                response_code, response_text, error_class, self.excerpt_limit,
+            )
+            self._rows[row_id] = list(record)
+            if len(self._rows) > self.capacity:
+                self._rows.popitem(last=False)
+                self.rows_evicted += 1
+            self._rollups.apply(rollups.aggregate(rollups.events_from_records([record])))
+        return row_id
+
+    def update_signal(self, signal_id: int, name: str, data: dict, created_at: float,
+                      status: SignalStatus, dequeued_at: Optional[float] = None,
+                      sent_at: Optional[float] = None, response_code: Optional[int] = None,
+                      response_text: Optional[str] = None,
+                      error_class: ErrorClass = ErrorClass.NONE,
+                      previous_status: SignalStatus = SignalStatus.RECEIVED) -> None:
+        params = schema.build_outcome(
+            signal_id, status, dequeued_at, sent_at,
+            response_code, response_text, error_class, self.excerpt_limit,
+        )
+        event = rollups.outcome_event(created_at, name, data, status, sent_at, previous_status)
+        with self._lock:
+            row = self._rows.get(signal_id)
+            if row is not None:
+                # Новая строка вместо правки на месте: снимки query_logs не меняются
+                row = list(row)
+                schema.apply_outcome(row, params)
+                self._rows[signal_id] = row
+            self._rollups.apply(rollups.aggregate([event]))
+
+    def query_logs(self, log_filter: LogFilter) -> Tuple[List[dict], Optional[str]]:
+        # Под блокировкой — только снимок ссылок на строки; фильтрация идёт без неё,
+        # чтобы долгий поиск по буферу не задерживал запись сигналов
+        with self._lock:
+            snapshot = list(self._rows.values())
+        rows: List[list] = []
+        for row in reversed(snapshot):
+            if query.matches(row, log_filter):
+                rows.append(list(row))
+                if len(rows) >= log_filter.limit:
+                    break
+        return [schema.row_to_dict(row) for row in rows], query.next_cursor(rows, log_filter.limit)
+
+    def get_stats(self, since: float, until: float) -> dict:
+        with self._lock:
+            return self._rollups.read_stats(math.floor(since), math.ceil(until))
+
@@ -0,0 +1,46 @@
+# src/database/backends/null.py
+"""Хранилище, которое ничего не хранит: для замеров пропускной способности"""
+import itertools
+from typing import List, Optional, Tuple
+from core.models import SignalStatus, ErrorClass, LogFilter
+from database import rollups
+from database.backends.base import StorageBackend, Durability
+
+
+class NullBackend(StorageBackend):
+    """Принимает и отбрасывает логи; журнал и статистика всегда пусты"""
+
+    name = "null"
+    durability = Durability(
+        persistent=False,
+        crash_safe=False,
+        full_history=False,
+        note="логи не сохраняются — только для бенчмарков",
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._ids = itertools.count(1)
+        self.rows_discarded = 0
+        self.updates_discarded = 0
+
+    def log_signal(self, symbol: str, name: str, data: dict, status: SignalStatus,
+                   created_at: float, sent_at: Optional[float] = None,
+                   response_code: Optional[int] = None, response_text: Optional[str] = None,
+                   error_class: ErrorClass = ErrorClass.NONE) -> int:
+        self.rows_discarded += 1
+        return next(self._ids)
+
+    def update_signal(self, signal_id: int, name: str, data: dict, created_at: float,
+                      status: SignalStatus, dequeued_at: Optional[float] = None,
+                      sent_at: Optional[float] = None, response_code: Optional[int] = None,
+                      response_text: Optional[str] = None,
+                      error_class: ErrorClass = ErrorClass.NONE,
+                      previous_status: SignalStatus = SignalStatus.RECEIVED) -> None:
+        self.updates_discarded += 1
+
+    def query_logs(self, log_filter: LogFilter) -> Tuple[List[dict], Optional[str]]:
+        return [], None
+
+    def get_stats(self, since: float, until: float) -> dict:
+        return rollups.empty_totals()
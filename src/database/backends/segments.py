@@ -0,0 +1,363 @@
+# src/database/backends/segments.py
+"""
+Журнал сигналов в append-only файлах-сегментах.
+
+Каждая запись — строка JSON: {"i": запись INSERT_SQL} для нового сигнала или
+{"u": параметры UPDATE_OUTCOME_SQL, "e": событие агрегатов} для результата.
+Сегмент закрывается по размеру, имя содержит created_at первой записи,
+поэтому чтение за диапазон времени открывает только нужные сегменты, а
+ретеншн удаляет файлы целиком. Запись — дописывание в буфер файла без
+индексов, чтение — последовательный разбор сегментов.
+
+Результат сигнала обычно попадает в тот же сегмент, что и сам сигнал; если
+сегмент успел закрыться, обновление дополнительно держится в памяти
+(_cross_updates), чтобы чтение старого сегмента не зависело от новых;
+вместе с сегментом, удалённым ретеншном, забываются и обновления его строк.
+
+Закрытый при ротации сегмент получает fsync и ретеншн в потоке фонового
+fsync, поэтому ротация не останавливает запись на синхронизацию диска.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from core.models import SignalStatus, ErrorClass, LogFilter
+from database import schema, query, rollups
+from database.backends.base import StorageBackend, Durability
+
+
+_FILE_RE = re.compile(r"^segment-(\d{20})\.log$")
+
+
+class SegmentBackend(StorageBackend):
+    """Append-only сегменты с фоновым fsync"""
+
+    name = "segments"
+    durability = Durability(
+        persistent=True,
+        crash_safe=False,
+        full_history=True,
+        note="fsync раз в SEGMENT_FSYNC_INTERVAL_MS; при падении теряются записи за последний интервал",
+    )
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        fsync_interval_ms: float = 1000.0,
+        retention_days: int = 0,
+        excerpt_limit: int = schema.RESPONSE_EXCERPT_LIMIT,
+    ):
+        super().__init__()
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval = max(0.0, fsync_interval_ms) / 1000.0
+        self.retention_days = retention_days
+        self.excerpt_limit = excerpt_limit
+        self._segments: List[Tuple[int, str]] = []   # (start_us, path) по возрастанию
+        self._file = None
+        self._file_size = 0
+        self._unsynced = 0
+        self._next_id = 1
+        self._current_first_id: Optional[int] = None
+        # id первой строки сегмента по его start_us — граница для чистки _cross_updates
+        self._first_ids: Dict[int, int] = {}
+        # Закрытые ротацией файлы, ждущие fsync: (файл, записей без fsync)
+        self._closed: List[Tuple[object, int]] = []
+        self._cross_updates: Dict[int, list] = {}
+        self._rollups = rollups.MemoryRollups()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+
+    # === Жизненный цикл ===
+
+    def init_db(self) -> None:
+        """Найти сегменты, удалить устаревшие и восстановить id и агрегаты"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = []
+        for name in os.listdir(self.directory):
+            match = _FILE_RE.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        self._segments = sorted(segments)
+        self.drop_expired_partitions()
+
+        started = time.perf_counter()
+        max_id = 0
+        for start, path in self._segments:
+            events = []
+            self._current_first_id = None
+            for record in _read_lines(path):
+                if "i" in record:
+                    max_id = max(max_id, record["i"][0])
+                    if self._current_first_id is None:
+                        self._current_first_id = self._first_ids[start] = record["i"][0]
+                    events.extend(rollups.events_from_records([record["i"]]))
+                elif "u" in record:
+                    self._track_cross_update(record["u"])
+                    if record.get("e"):
+                        events.append(tuple(record["e"]))
+            self._rollups.apply(rollups.aggregate(events))
+        self._next_id = max_id + 1
+        # Обновления строк из сегментов, удалённых ретеншном до этого запуска
+        with self._lock:
+            self._prune_cross_updates()
+
+        if self._segments:
+            path = self._segments[-1][1]
+            self._file = open(path, "ab")
+            self._file_size = os.path.getsize(path)
+        print(
+            f"📼 Сегменты журнала: {len(self._segments)} файлов, "
+            f"прочитаны за {(time.perf_counter() - started) * 1000:.0f} мс"
+        )
+
+    def start_writer(self, max_batch_size: int = 200, max_delay_ms: float = 50.0) -> None:
+        """Запустить фоновый fsync (размер пачки здесь не используется)"""
+        if self.fsync_interval and self._syncer is None:
+            self._stop.clear()
+            self._syncer = threading.Thread(target=self._sync_loop, name="segment-fsync", daemon=True)
+            self._syncer.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        self._sync()
+        return True
+
+    def close(self) -> None:
+        if self._syncer is not None:
+            self._stop.set()
+            self._syncer.join()
+            self._syncer = None
+        self._sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def log_backlog(self) -> int:
+        """Записи, ещё не сброшенные на диск fsync"""
+        return self._unsynced + sum(count for _, count in list(self._closed))
+
+    def drop_expired_partitions(self) -> List[int]:
+        """Удалить сегменты, целиком вышедшие за окно хранения (кроме текущего)"""
+        if self.retention_days <= 0:
+            return []
+        cutoff = int((time.time() - self.retention_days * 86400) * 1_000_000)
+        dropped = []
+        with self._lock:
+            # Конец сегмента — начало следующего
+            while len(self._segments) > 1 and self._segments[1][0] <= cutoff:
+                start, path = self._segments.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._first_ids.pop(start, None)
+                dropped.append(start)
+                print(f"🗑️ Удалён сегмент журнала {os.path.basename(path)} (старше {self.retention_days} дн.)")
+            if dropped:
+                self._prune_cross_updates()
+        return dropped
+
+    def _prune_cross_updates(self) -> None:
+        """Забыть обновления строк старше первого оставшегося сегмента (под self._lock)"""
+        oldest = next(
+            (self._first_ids[start] for start, _ in self._segments if start in self._first_ids),
+            self._next_id,
+        )
+        for row_id in [row_id for row_id in self._cross_updates if row_id < oldest]:
+            del self._cross_updates[row_id]
+
+    # === Запись ===
+
+    def log_signal(self, symbol: str, name: str, data: dict, status: SignalStatus,
+                   created_at: float, sent_at: Optional[float] = None,
+                   response_code: Optional[int] = None, response_text: Optional[str] = None,
+                   error_class: ErrorClass = ErrorClass.NONE) -> int:
+        with self._lock:
+            row_id = self._next_id
+            self._next_id += 1
+            record = schema.build_record(
+                row_id, symbol, name, data, status, created_at, sent_at,
+                response_code, response_text, error_class, self.excerpt_limit,
+            )
+            rotated = self._file is None or self._file_size >= self.max_segment_bytes
+            if rotated:
+                self._rotate(record[schema.CREATED_AT_POS])
+            if self._current_first_id is None:
+                self._current_first_id = self._first_ids[self._segments[-1][0]] = row_id
+            self._append({"i": record})
+            self._rollups.apply(rollups.aggregate(rollups.events_from_records([record])))
+        if rotated:
+            self._after_rotate()
+        return row_id
+
+    def update_signal(self, signal_id: int, name: str, data: dict, created_at: float,
+                      status: SignalStatus, dequeued_at: Optional[float] = None,
+                      sent_at: Optional[float] = None, response_code: Optional[int] = None,
+                      response_text: Optional[str] = None,
+                      error_class: ErrorClass = ErrorClass.NONE,
+                      previous_status: SignalStatus = SignalStatus.RECEIVED) -> None:
+        params = schema.build_outcome(
+            signal_id, status, dequeued_at, sent_at,
+            response_code, response_text, error_class, self.excerpt_limit,
+        )
+        event = rollups.outcome_event(created_at, name, data, status, sent_at, previous_status)
+        with self._lock:
+            rotated = self._file is None
+            if rotated:
+                self._rotate(event[0])
+            self._append({"u": params, "e": event})
+            self._track_cross_update(params)
+            self._rollups.apply(rollups.aggregate([event]))
+        if rotated:
+            self._after_rotate()
+
+    def _track_cross_update(self, params: list) -> None:
+        """Запомнить обновление строки из уже закрытого сегмента"""
+        if self._current_first_id is None or params[-1] < self._current_first_id:
+            self._cross_updates[params[-1]] = params
+
+    def _append(self, record: dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self._file.write(line)
+        self._file_size += len(line)
+        self._unsynced += 1
+
+    def _rotate(self, start_us: int) -> None:
+        """
+        Закрыть текущий сегмент и начать новый (под self._lock). fsync и
+        закрытие старого файла — в _sync_closed, вне блокировки.
+        """
+        if self._file is not None:
+            self._file.flush()
+            self._closed.append((self._file, self._unsynced))
+            self._unsynced = 0
+        # Имена должны возрастать даже при одинаковом или отставшем created_at
+        if self._segments and start_us <= self._segments[-1][0]:
+            start_us = self._segments[-1][0] + 1
+        path = os.path.join(self.directory, f"segment-{start_us:020d}.log")
+        self._segments.append((start_us, path))
+        self._file = open(path, "ab")
+        self._file_size = 0
+        self._current_first_id = None
+
+    def _after_rotate(self) -> None:
+        """Без потока фонового fsync закрытый сегмент синхронизируется сразу, уже вне блокировки"""
+        if self._syncer is None:
+            self._sync_closed()
+
+    def _sync_closed(self) -> None:
+        """fsync и закрытие сегментов, закрытых ротацией, затем ретеншн"""
+        with self._lock:
+            closed, self._closed = self._closed, []
+        if not closed:
+            return
+        for file, _ in closed:
+            try:
+                os.fsync(file.fileno())
+            finally:
+                file.close()
+        try:
+            self.drop_expired_partitions()
+        except OSError as e:
+            print(f"⚠️ Не удалось удалить старые сегменты журнала: {e}")
+
+    def _sync(self) -> None:
+        self._sync_closed()
+        with self._lock:
+            if self._file is None or not self._unsynced:
+                return
+            self._file.flush()
+            fd = self._file.fileno()
+            self._unsynced = 0
+            # fsync вне блокировки не мешает записи
+            try:
+                fd = os.dup(fd)
+            except OSError:
+                return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self._sync()
+            except OSError as e:
+                print(f"❌ Сегменты журнала: ошибка fsync: {e}")
+
+    # === Чтение ===
+
+    def query_logs(self, log_filter: LogFilter) -> Tuple[List[dict], Optional[str]]:
+        """Страница журнала: сегменты от новых к старым, пока страница не заполнена"""
+        since_us, until_us = query.time_bounds(log_filter)
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = list(self._segments)
+            cross_updates = dict(self._cross_updates)
+
+        selected = [
+            index for index, (start, _) in enumerate(segments)
+            if (until_us is None or start < until_us)
+            and (since_us is None or index + 1 >= len(segments) or segments[index + 1][0] > since_us)
+        ]
+        if not selected:
+            return [], None
+
+        rows: List[list] = []
+        for index in reversed(selected):
+            segment_rows = _read_segment(segments[index][1])
+            if cross_updates:
+                for row_id, row in segment_rows.items():
+                    params = cross_updates.get(row_id)
+                    if params is not None:
+                        schema.apply_outcome(row, params)
+
+            matched = sorted(
+                (row for row in segment_rows.values() if query.matches(row, log_filter)),
+                key=query.sort_key,
+                reverse=True,
+            )
+            rows.extend(matched[: log_filter.limit - len(rows)])
+            if len(rows) >= log_filter.limit:
+                break
+
+        return [schema.row_to_dict(row) for row in rows], query.next_cursor(rows, log_filter.limit)
+
+    def get_stats(self, since: float, until: float) -> dict:
+        with self._lock:
+            return self._rollups.read_stats(math.floor(since), math.ceil(until))
+
+
+def _read_lines(path: str):
+    """Записи сегмента по порядку; оборванная строка после падения пропускается"""
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return  # сегмент удалил ретеншн
+
+
+def _read_segment(path: str) -> Dict[int, list]:
+    """Строки сегмента {id: строка} с применёнными обновлениями из этого же сегмента"""
+    rows: Dict[int, list] = {}
+    for record in _read_lines(path):
+        if "i" in record:
+            rows[record["i"][0]] = record["i"]
+        elif "u" in record:
+            row = rows.get(record["u"][-1])
+            if row is not None:
+                schema.apply_outcome(row, record["u"])
+    return rows
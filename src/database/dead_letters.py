@@ -0,0 +1,215 @@
+# src/database/dead_letters.py
+"""
+Хранилище сигналов, которые не удалось отправить после всех повторов.
+
+Отдельный файл SQLite: не зависит от выбранного хранилища журнала и
+переживает перезапуск. Повторная отправка (redrive) кладёт сигнал обратно
+в очередь с тем же signal_id и помечает запись как отправленную повторно.
+"""
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+from core.models import ErrorClass, QueuedSignal, RawPayload, SignalStatus
+from database import schema
+
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS dead_letters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        signal_id INTEGER,
+        queue TEXT NOT NULL,
+        name TEXT NOT NULL,
+        log_symbol TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        failed_at INTEGER NOT NULL,
+        attempts INTEGER NOT NULL,
+        error_class INTEGER NOT NULL,
+        response_code INTEGER,
+        last_error TEXT,
+        redriven_at INTEGER,
+        redrive_count INTEGER NOT NULL DEFAULT 0,
+        passthrough INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# Колонки, добавленные после первого выпуска таблицы: (имя, определение)
+ADDED_COLUMNS = (
+    # 1 — data хранит исходное тело запроса (RawPayload), redrive отправляет его байты
+    ("passthrough", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Ожидающие разбора записи — основной запрос и API, и redrive
+CREATE_PENDING_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_dead_letters_pending ON dead_letters(name, id) "
+    "WHERE redriven_at IS NULL"
+)
+
+_COLUMNS = (
+    "id", "signal_id", "queue", "name", "log_symbol", "data", "created_at", "failed_at",
+    "attempts", "error_class", "response_code", "last_error", "redriven_at", "redrive_count",
+)
+
+
+class DeadLetterStore:
+    """Dead-letter очередь сигналов в SQLite"""
+
+    def __init__(self, path: str, excerpt_limit: int = schema.RESPONSE_EXCERPT_LIMIT):
+        self.path = path
+        self.excerpt_limit = excerpt_limit
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, isolation_level=None)
+
+    def init(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(CREATE_TABLE)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(dead_letters)")}
+            for column, definition in ADDED_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE dead_letters ADD COLUMN {column} {definition}")
+            conn.execute(CREATE_PENDING_INDEX)
+        finally:
+            conn.close()
+
+    def add(
+        self,
+        queue: str,
+        item: QueuedSignal,
+        attempts: int,
+        error_class: ErrorClass,
+        response_code: Optional[int] = None,
+        last_error: Optional[str] = None,
+    ) -> int:
+        """Сохранить сигнал; возвращает id записи"""
+        conn = self._connect()
+        try:
+            columns = _COLUMNS[1:12] + ("passthrough",)
+            cursor = conn.execute(
+                f"INSERT INTO dead_letters ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                (
+                    item.signal_id,
+                    queue,
+                    item.name,
+                    item.log_symbol,
+                    schema.encode_payload(item.data),
+                    schema.to_us(item.created_at),
+                    schema.to_us(time.time()),
+                    attempts,
+                    int(error_class),
+                    response_code,
+                    schema.excerpt(last_error, self.excerpt_limit),
+                    int(isinstance(item.data, RawPayload)),
+                ),
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def list(
+        self,
+        limit: int = 50,
+        before_id: Optional[int] = None,
+        name: Optional[str] = None,
+        include_redriven: bool = False,
+    ) -> List[dict]:
+        """Записи от новых к старым; before_id — курсор следующей страницы"""
+        clauses, params = self._where(name, include_redriven)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM dead_letters {where}ORDER BY id DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        finally:
+            conn.close()
+        return [_row_to_dict(row) for row in rows]
+
+    def pending_count(self, name: Optional[str] = None) -> int:
+        clauses, params = self._where(name, False)
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM dead_letters WHERE {' AND '.join(clauses)}", params
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def pending(
+        self,
+        ids: Optional[List[int]] = None,
+        name: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[Tuple[int, str, QueuedSignal]]:
+        """Неразобранные записи для повторной отправки: (id, очередь, сигнал), от старых к новым"""
+        clauses, params = self._where(name, False)
+        if ids:
+            clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, queue, name, log_symbol, data, created_at, signal_id, passthrough FROM dead_letters "
+                f"WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            (row_id, queue, QueuedSignal(
+                name=name,
+                # Тело passthrough — снова RawPayload, чтобы ушли исходные байты, как из журнала очереди
+                data=RawPayload.from_body(data.encode("utf-8")) if passthrough else schema.decode_payload(data),
+                created_at=schema.from_us(created_at),
+                log_symbol=log_symbol,
+                signal_id=signal_id,
+                log_status=SignalStatus.DEAD_LETTER,
+            ))
+            for row_id, queue, name, log_symbol, data, created_at, signal_id, passthrough in rows
+        ]
+
+    def mark_redriven(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE dead_letters SET redriven_at = ?, redrive_count = redrive_count + 1 "
+                f"WHERE id IN ({', '.join('?' for _ in ids)})",
+                [schema.to_us(time.time())] + list(ids),
+            )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(name: Optional[str], include_redriven: bool) -> Tuple[List[str], list]:
+        clauses: List[str] = []
+        params: list = []
+        if not include_redriven:
+            clauses.append("redriven_at IS NULL")
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        if not clauses:
+            clauses.append("1")
+        return clauses, params
+
+
+def _row_to_dict(row: Tuple) -> dict:
+    record = dict(zip(_COLUMNS, row))
+    record["data"] = schema.decode_payload(record["data"])
+    record["error_class"] = schema.enum_name(ErrorClass, record["error_class"])
+    for column in ("created_at", "failed_at", "redriven_at"):
+        record[column] = schema.from_us(record[column])
+    return record
@@ -0,0 +1,210 @@
+# src/database/migrate.py
+"""
+Потоковая миграция журнала сигналов v1 (таблица signals) в схему v2
+(файлы-партиции signal_log).
+
+Строки переносятся пачками по id. Исходный id становится локальным номером
+строки в партиции, поэтому повторная вставка той же строки игнорируется,
+а позиция сохраняется в migration_state после каждой пачки: прерванную
+миграцию можно просто запустить ещё раз — она продолжит с места остановки.
+
+Запуск (из каталога src, на работающем или остановленном сервере):
+    python -m database.migrate --db /app/data/signals.db
+    python -m database.migrate --db /app/data/signals.db --drop-legacy
+"""
+import argparse
+import ast
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+from database import schema, rollups
+from database.partitions import PartitionManager, LIVE_ID_BASE, make_id
+from database.repository import SignalRepository
+
+
+MIGRATION_NAME = "signals_v1_to_v2"
+
+
+def convert_legacy_row(
+    row: Tuple,
+    partitions: PartitionManager,
+    excerpt_limit: int = schema.RESPONSE_EXCERPT_LIMIT,
+) -> Tuple:
+    """Строка v1 → запись v2 с id в партиции по created_at"""
+    (row_id, symbol, name, data, status, created_at,
+     sent_at, response_code, response_text) = row
+
+    payload = _parse_legacy_payload(data)
+    status_code, error_class = schema.classify_legacy_status(status, response_code, response_text)
+
+    # В v1 текст ошибки часто был только в самом статусе: "error Timeout: ..."
+    message = response_text
+    if not message and status and status.startswith("error "):
+        message = status[len("error "):]
+
+    if not 0 < row_id < LIVE_ID_BASE:
+        raise ValueError(f"Legacy id {row_id} does not fit into partition id space")
+    created_at = created_at or 0.0
+    key = partitions.key_for(schema.to_us(created_at))
+
+    return schema.build_record(
+        row_id=make_id(key, row_id),
+        symbol=symbol or "",
+        name=name or "",
+        data=payload,
+        status=status_code,
+        created_at=created_at,
+        sent_at=sent_at,
+        response_code=response_code,
+        response_text=message,
+        error_class=error_class,
+        excerpt_limit=excerpt_limit,
+    )
+
+
+def _parse_legacy_payload(data: Optional[str]):
+    """В v1 payload хранился как repr() словаря"""
+    if not data:
+        return {}
+    try:
+        return ast.literal_eval(data)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return data
+
+
+def _legacy_table_exists(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (schema.LEGACY_TABLE,)
+    ).fetchone()
+    return row is not None
+
+
+def _load_state(conn: sqlite3.Connection) -> Tuple[int, int, bool]:
+    row = conn.execute(
+        "SELECT last_id, rows_done, finished FROM migration_state WHERE name=?", (MIGRATION_NAME,)
+    ).fetchone()
+    if row is None:
+        return 0, 0, False
+    return row[0], row[1], bool(row[2])
+
+
+def migrate(
+    db_path: str,
+    chunk_size: int = 5000,
+    drop_legacy: bool = False,
+    pause_ms: float = 0.0,
+) -> int:
+    """Перенести строки v1 в v2. Возвращает количество перенесённых за этот запуск строк"""
+    repository = SignalRepository(db_path)
+    repository.init_db()
+    partitions = repository.partitions
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    try:
+        if not _legacy_table_exists(conn):
+            print("✅ Таблица v1 не найдена — мигрировать нечего")
+            return 0
+
+        last_id, rows_done, finished = _load_state(conn)
+        if finished and not drop_legacy:
+            print(f"✅ Миграция уже завершена ({rows_done} строк)")
+            return 0
+
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM {schema.LEGACY_TABLE} WHERE id > ?", (last_id,)
+        ).fetchone()[0]
+        print(f"🚚 Миграция {db_path}: осталось {total} строк, продолжаем после id={last_id}")
+
+        insert_sql = schema.INSERT_SQL.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+        migrated = 0
+        started = time.monotonic()
+
+        while True:
+            # Читаем только одну пачку за раз — память не зависит от размера БД
+            rows = conn.execute(
+                f"SELECT id, symbol, name, data, status, created_at, sent_at, "
+                f"response_code, response_text FROM {schema.LEGACY_TABLE} "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            by_partition: Dict[int, List[Tuple]] = {}
+            for row in rows:
+                record = convert_legacy_row(row, partitions, repository.excerpt_limit)
+                key = partitions.key_for(record[schema.CREATED_AT_POS])
+                if partitions.is_expired(key):
+                    continue  # всё равно была бы удалена ретеншном
+                by_partition.setdefault(key, []).append(record)
+
+            for key, records in by_partition.items():
+                part = partitions.connect(key)
+                try:
+                    part.execute("BEGIN IMMEDIATE")
+                    part.executemany(insert_sql, records)
+                    part.execute("COMMIT")
+                finally:
+                    part.close()
+
+            last_id = rows[-1][0]
+            rows_done += len(rows)
+            migrated += len(rows)
+
+            # Позиция и агрегаты фиксируются только после записи пачки во все партиции
+            conn.execute("BEGIN IMMEDIATE")
+            rollups.apply(conn, rollups.aggregate(
+                rollups.events_from_records(r for records in by_partition.values() for r in records)
+            ))
+            conn.execute(
+                "INSERT INTO migration_state (name, last_id, rows_done, finished) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET last_id=excluded.last_id, rows_done=excluded.rows_done",
+                (MIGRATION_NAME, last_id, rows_done),
+            )
+            conn.execute("COMMIT")
+
+            elapsed = time.monotonic() - started
+            print(f"   … {migrated}/{total} строк (id ≤ {last_id}), {migrated / max(elapsed, 1e-6):.0f} строк/с")
+
+            if pause_ms:
+                time.sleep(pause_ms / 1000.0)
+
+        conn.execute(
+            "UPDATE migration_state SET finished=1 WHERE name=?", (MIGRATION_NAME,)
+        )
+        print(f"✅ Миграция завершена: перенесено {migrated} строк за этот запуск, всего {rows_done}")
+
+        if drop_legacy:
+            size_before = os.path.getsize(db_path)
+            print("🧹 Удаляем таблицу v1 и сжимаем файл (VACUUM)...")
+            conn.execute(f"DROP TABLE {schema.LEGACY_TABLE}")
+            conn.execute("VACUUM")
+            size_after = os.path.getsize(db_path)
+            print(f"✅ Размер БД: {size_before / 1e6:.1f} MB → {size_after / 1e6:.1f} MB")
+
+        return migrated
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Миграция signals.db из схемы v1 в v2")
+    parser.add_argument("--db", default=os.getenv("DB_PATH", "/app/data/signals.db"),
+                        help="Путь к файлу БД (по умолчанию $DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=5000,
+                        help="Количество строк в одной транзакции")
+    parser.add_argument("--pause-ms", type=float, default=0.0,
+                        help="Пауза между пачками, чтобы не мешать работающему серверу")
+    parser.add_argument("--drop-legacy", action="store_true",
+                        help="После завершения удалить таблицу v1 и выполнить VACUUM")
+    args = parser.parse_args()
+
+    migrate(args.db, args.chunk_size, args.drop_legacy, args.pause_ms)
+
+
+if __name__ == "__main__":
+    main()
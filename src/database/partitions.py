@@ -0,0 +1,186 @@
+# src/database/partitions.py
+"""
+Партиции журнала сигналов: по одному файлу SQLite на день или неделю.
+
+id строки кодирует партицию: id = (ключ партиции << 32) | локальный номер,
+где ключ — номер первого дня периода от эпохи. По id всегда известно, в каком
+файле лежит строка, а удаление старых данных — это удаление файлов целиком.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from database import schema
+
+
+DAY_US = 86_400 * 1_000_000
+PERIOD_DAYS = {"day": 1, "week": 7}
+# 1970-01-05 — первый понедельник эпохи: недельные партиции начинаются с понедельника
+_EPOCH_MONDAY = 4
+
+# Новые строки нумеруются с 2^31, чтобы не пересекаться с id,
+# которые миграция переносит из старых таблиц как есть
+LIVE_ID_BASE = 1 << 31
+LOCAL_ID_MASK = (1 << 32) - 1
+
+_FILE_RE = re.compile(r"^signals-(\d{8})\.db$")
+
+
+def make_id(key: int, local_id: int) -> int:
+    return (key << 32) | local_id
+
+
+def partition_of(row_id: int) -> int:
+    return row_id >> 32
+
+
+class PartitionManager:
+    """Раскладка журнала по файлам-партициям и удаление старых партиций"""
+
+    def __init__(self, directory: str, period: str = "day", retention_days: int = 0):
+        if period not in PERIOD_DAYS:
+            raise ValueError(f"Unknown partition period '{period}', allowed: {list(PERIOD_DAYS)}")
+        self.directory = directory
+        self.period = period
+        self.period_days = PERIOD_DAYS[period]
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._next_local: Dict[int, int] = {}
+        self._upgraded: set = set()
+
+    # === Ключи и пути ===
+
+    def key_for(self, created_at_us: int) -> int:
+        """Ключ партиции: номер первого дня периода от эпохи"""
+        day = created_at_us // DAY_US
+        return day - (day - _EPOCH_MONDAY) % self.period_days
+
+    def path_for(self, key: int) -> str:
+        date = datetime.fromtimestamp(key * 86_400, tz=timezone.utc).strftime("%Y%m%d")
+        return os.path.join(self.directory, f"signals-{date}.db")
+
+    def bounds(self, key: int) -> tuple:
+        """Границы партиции в микросекундах: [start, end)"""
+        start = key * DAY_US
+        return start, start + self.period_days * DAY_US
+
+    def list_keys(self) -> List[int]:
+        """Ключи существующих партиций, от новых к старым"""
+        keys = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return keys
+        for name in names:
+            match = _FILE_RE.match(name)
+            if match:
+                date = datetime.strptime(match.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)
+                keys.append(int(date.timestamp()) // 86_400)
+        return sorted(keys, reverse=True)
+
+    def keys_in_range(self, since_us: Optional[int] = None, until_us: Optional[int] = None) -> List[int]:
+        """Существующие партиции, пересекающиеся с [since, until), от новых к старым"""
+        result = []
+        for key in self.list_keys():
+            start, end = self.bounds(key)
+            if since_us is not None and end <= since_us:
+                continue
+            if until_us is not None and start >= until_us:
+                continue
+            result.append(key)
+        return result
+
+    # === Создание и нумерация ===
+
+    def init(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def connect(self, key: int, create: bool = True) -> sqlite3.Connection:
+        """Соединение с партицией; при create=True файл и схема создаются при необходимости"""
+        path = self.path_for(key)
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(path)
+        conn = sqlite3.connect(path, isolation_level=None)
+        if create:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(schema.CREATE_LOG_TABLE)
+            for statement in schema.LOG_INDEXES:
+                conn.execute(statement)
+        if key not in self._upgraded:
+            self._upgrade(conn)
+            self._upgraded.add(key)
+        return conn
+
+    @staticmethod
+    def _upgrade(conn: sqlite3.Connection) -> None:
+        """Добавить в партицию колонки, появившиеся в схеме позже неё"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({schema.LOG_TABLE})")}
+        if not existing:
+            return
+        for column, column_type in schema.ADDED_COLUMNS:
+            if column not in existing:
+                try:
+                    conn.execute(f"ALTER TABLE {schema.LOG_TABLE} ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError as e:
+                    # Параллельное соединение могло добавить колонку первым
+                    if "duplicate column" not in str(e):
+                        raise
+
+    def allocate_id(self, created_at_us: int) -> int:
+        """Следующий id строки в партиции, куда попадает created_at"""
+        key = self.key_for(created_at_us)
+        with self._lock:
+            local = self._next_local.get(key)
+            if local is None:
+                local = self._load_next_local(key)
+            self._next_local[key] = local + 1
+        return make_id(key, local)
+
+    def _load_next_local(self, key: int) -> int:
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return LIVE_ID_BASE
+        conn = sqlite3.connect(path)
+        try:
+            row = conn.execute(
+                f"SELECT MAX(id) FROM {schema.LOG_TABLE} WHERE id >= ?", (make_id(key, LIVE_ID_BASE),)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        finally:
+            conn.close()
+        if not row or row[0] is None:
+            return LIVE_ID_BASE
+        return (row[0] & LOCAL_ID_MASK) + 1
+
+    # === Ретеншн ===
+
+    def is_expired(self, key: int, now: Optional[float] = None) -> bool:
+        """Партиция целиком вышла за окно хранения"""
+        if self.retention_days <= 0:
+            return False
+        now_us = int((now if now is not None else time.time()) * 1_000_000)
+        return self.bounds(key)[1] <= now_us - self.retention_days * DAY_US
+
+    def expired_keys(self, now: Optional[float] = None) -> List[int]:
+        return [key for key in self.list_keys() if self.is_expired(key, now)]
+
+    def drop_expired(self, now: Optional[float] = None) -> List[int]:
+        """Удалить устаревшие партиции целиком (без DELETE и VACUUM)"""
+        dropped = []
+        for key in self.expired_keys(now):
+            path = self.path_for(key)
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(path + suffix)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._next_local.pop(key, None)
+            self._upgraded.discard(key)
+            dropped.append(key)
+            print(f"🗑️ Удалена партиция журнала {os.path.basename(path)} (старше {self.retention_days} дн.)")
+        return dropped
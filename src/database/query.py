@@ -0,0 +1,130 @@
+# src/database/query.py
+"""Построение запросов к журналу сигналов с keyset-пагинацией"""
+from typing import List, Optional, Sequence, Tuple
+from core.models import LogFilter
+from database import schema
+
+
+ORDER_BY = "ORDER BY created_at DESC, id DESC"
+
+_SYMBOL_POS = schema.LOG_COLUMNS.index("symbol")
+_NAME_POS = schema.LOG_COLUMNS.index("name")
+_SIDE_POS = schema.LOG_COLUMNS.index("side")
+_STATUS_POS = schema.LOG_COLUMNS.index("status")
+_CODE_POS = schema.LOG_COLUMNS.index("response_code")
+
+
+def encode_cursor(created_at_us: int, row_id: int) -> str:
+    return f"{created_at_us}_{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Разобрать курсор; ValueError при неверном формате"""
+    created_at_us, row_id = cursor.split("_", 1)
+    return int(created_at_us), int(row_id)
+
+
+def time_bounds(log_filter: LogFilter) -> Tuple[Optional[int], Optional[int]]:
+    """Диапазон created_at в микросекундах [since, until) с учётом курсора"""
+    since_us = schema.to_us(log_filter.since)
+    until_us = schema.to_us(log_filter.until)
+    if log_filter.cursor:
+        cursor_created_at, _ = decode_cursor(log_filter.cursor)
+        # Строки с тем же created_at ещё могут попасть на страницу (по id)
+        cursor_until = cursor_created_at + 1
+        until_us = cursor_until if until_us is None else min(until_us, cursor_until)
+    return since_us, until_us
+
+
+def _where(log_filter: LogFilter, match_column: Optional[str]) -> Tuple[List[str], list]:
+    clauses: List[str] = []
+    params: list = []
+
+    if match_column is not None:
+        clauses.append(f"{match_column} = ?")
+        params.append(log_filter.symbol)
+    if log_filter.name is not None:
+        clauses.append("name = ?")
+        params.append(log_filter.name)
+    if log_filter.status is not None:
+        clauses.append("status = ?")
+        params.append(int(log_filter.status))
+    if log_filter.side is not None:
+        clauses.append("side = ?")
+        params.append(log_filter.side)
+    if log_filter.response_code is not None:
+        clauses.append("response_code = ?")
+        params.append(log_filter.response_code)
+    if log_filter.since is not None:
+        clauses.append("created_at >= ?")
+        params.append(schema.to_us(log_filter.since))
+    if log_filter.until is not None:
+        clauses.append("created_at < ?")
+        params.append(schema.to_us(log_filter.until))
+    if log_filter.cursor:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(decode_cursor(log_filter.cursor))
+
+    return clauses, params
+
+
+def _select(log_filter: LogFilter, match_column: Optional[str], table: str) -> Tuple[str, list]:
+    clauses, params = _where(log_filter, match_column)
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    sql = f"SELECT {schema.SELECT_COLUMNS} FROM {table} {where}{ORDER_BY} LIMIT ?"
+    return sql, params + [log_filter.limit]
+
+
+def build_query(log_filter: LogFilter, table: str = schema.LOG_TABLE) -> Tuple[str, list]:
+    """
+    SQL для страницы журнала.
+
+    Фильтр symbol ищет совпадение и в symbol, и в name. Вместо OR (который
+    заставляет SQLite сканировать таблицу) это два индексных подзапроса
+    с LIMIT, объединённые через UNION.
+    """
+    if log_filter.symbol is None:
+        return _select(log_filter, None, table)
+
+    by_name, name_params = _select(log_filter, "name", table)
+    by_symbol, symbol_params = _select(log_filter, "symbol", table)
+    sql = (
+        f"SELECT * FROM ({by_name}) UNION SELECT * FROM ({by_symbol}) "
+        f"{ORDER_BY} LIMIT ?"
+    )
+    return sql, name_params + symbol_params + [log_filter.limit]
+
+
+def matches(record: Sequence, log_filter: LogFilter) -> bool:
+    """Та же проверка фильтра, что и в SQL, для строк в памяти (кортеж INSERT_SQL)"""
+    if log_filter.symbol is not None and log_filter.symbol not in (record[_NAME_POS], record[_SYMBOL_POS]):
+        return False
+    if log_filter.name is not None and record[_NAME_POS] != log_filter.name:
+        return False
+    if log_filter.status is not None and record[_STATUS_POS] != int(log_filter.status):
+        return False
+    if log_filter.side is not None and record[_SIDE_POS] != log_filter.side:
+        return False
+    if log_filter.response_code is not None and record[_CODE_POS] != log_filter.response_code:
+        return False
+    created_at = record[schema.CREATED_AT_POS]
+    if log_filter.since is not None and created_at < schema.to_us(log_filter.since):
+        return False
+    if log_filter.until is not None and created_at >= schema.to_us(log_filter.until):
+        return False
+    if log_filter.cursor and (created_at, record[0]) >= decode_cursor(log_filter.cursor):
+        return False
+    return True
+
+
+def sort_key(record: Sequence) -> Tuple[int, int]:
+    """Ключ сортировки, совпадающий с ORDER_BY (использовать с reverse=True)"""
+    return record[schema.CREATED_AT_POS], record[0]
+
+
+def next_cursor(rows: List[Sequence], limit: int) -> Optional[str]:
+    """Курсор следующей страницы по последней строке (None, если страница неполная)"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last[schema.CREATED_AT_POS], last[0])
@@ -1,68 +1,221 @@
+import math
 import sqlite3
 import os
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from config.settings import settings
+from core.models import SignalStatus, ErrorClass, LogFilter
+from database import schema, query, rollups
+from database.backends.base import StorageBackend, Durability
+from database.partitions import PartitionManager, partition_of
+from database.writer import SignalLogWriter
 
 
-class SignalRepository:
-    """Репозиторий для работы с сигналами в БД"""
+class SignalRepository(StorageBackend):
+    """
+    Репозиторий для работы с сигналами в БД (хранилище "sqlite").
 
-    def __init__(self, db_path: str = None):
+    Основной файл db_path хранит служебные таблицы, сами строки журнала
+    лежат в файлах-партициях (см. database.partitions); чтение по нескольким
+    партициям прозрачно для вызывающего кода.
+    """
+
+    name = "sqlite"
+    durability = Durability(
+        persistent=True,
+        crash_safe=False,
+        full_history=True,
+        note="WAL; при падении теряются логи, ещё не записанные фоновым писателем (≤ LOG_FLUSH_INTERVAL_MS)",
+    )
+
+    def __init__(
+        self,
+        db_path: str = None,
+        excerpt_limit: int = None,
+        partition_dir: str = None,
+        partition_period: str = None,
+        retention_days: int = None,
+    ):
+        super().__init__()
         self.db_path = db_path or os.getenv('DB_PATH', '/app/data/signals.db')
         self.log_limit = int(os.getenv('LOG_LIMIT', '50'))
+        self.excerpt_limit = excerpt_limit or settings.log_response_excerpt
+        self.partitions = PartitionManager(
+            partition_dir or settings.partition_dir
+            or os.path.join(os.path.dirname(self.db_path), "partitions"),
+            partition_period or settings.partition_period,
+            settings.retention_days if retention_days is None else retention_days,
+        )
+        self._writer: Optional[SignalLogWriter] = None
 
     def init_db(self) -> None:
-        """Инициализация базы данных"""
+        """Инициализация базы данных (схема v2) и удаление устаревших партиций"""
         # Создаем директорию если не существует
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.partitions.init()
 
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol TEXT,
-                name TEXT,
-                data TEXT,
-                status TEXT,
-                created_at REAL,
-                sent_at REAL,
-                response_code INTEGER,
-                response_text TEXT
-            )
-        """)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(schema.CREATE_MIGRATION_STATE)
+        for statement in rollups.CREATE_TABLES:
+            cursor.execute(statement)
+        cursor.execute(f"PRAGMA user_version={schema.SCHEMA_VERSION}")
         conn.commit()
         conn.close()
 
-    def log_signal(self, symbol: str, name: str, data: dict, status: str,
+        self.partitions.drop_expired()
+
+    def start_writer(self, max_batch_size: int = 200, max_delay_ms: float = 50.0) -> None:
+        """Запустить фоновую запись логов пачками"""
+        if self._writer is None:
+            self._writer = SignalLogWriter(
+                self.partitions, max_batch_size, max_delay_ms, catalog_path=self.db_path
+            )
+        self._writer.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться записи всех поставленных в очередь логов"""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        """Дописать очередь логов и остановить писателя"""
+        if self._writer is not None:
+            self._writer.close()
+
+    @property
+    def log_backlog(self) -> int:
+        """Количество логов, ожидающих записи"""
+        return self._writer.backlog if self._writer else 0
+
+    def drop_expired_partitions(self) -> List[int]:
+        """Удалить партиции старше окна хранения"""
+        return self.partitions.drop_expired()
+
+    def log_signal(self, symbol: str, name: str, data: dict, status: SignalStatus,
                    created_at: float, sent_at: Optional[float] = None,
-                   response_code: Optional[int] = None, response_text: Optional[str] = None) -> None:
-        """Логирование сигнала в БД"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO signals 
-            (symbol, name, data, status, created_at, sent_at, response_code, response_text) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (symbol, name, str(data), status, created_at, sent_at, response_code, response_text)
+                   response_code: Optional[int] = None, response_text: Optional[str] = None,
+                   error_class: ErrorClass = ErrorClass.NONE) -> int:
+        """Логирование сигнала в БД. Возвращает id строки"""
+        row_id = self.partitions.allocate_id(schema.to_us(created_at))
+        record = schema.build_record(
+            row_id, symbol, name, data, status, created_at, sent_at,
+            response_code, response_text, error_class, self.excerpt_limit,
         )
-        conn.commit()
-        conn.close()
 
-    def get_logs(self, symbol: str, limit: int = None) -> List[tuple]:
-        """Получение логов из БД"""
-        if limit is None:
-            limit = self.log_limit
+        if self._writer is not None and self._writer.running:
+            self._writer.submit(record)
+            return row_id
+
+        conn = self.partitions.connect(self.partitions.key_for(record[schema.CREATED_AT_POS]))
+        try:
+            conn.execute(schema.INSERT_SQL, record)
+        finally:
+            conn.close()
+        self._apply_rollups(rollups.events_from_records([record]))
+        return row_id
 
+    def log_signals(self, entries: List[tuple]) -> List[int]:
+        """Пакет строк: одна пачка фонового писателя или одна транзакция"""
+        records = []
+        for entry in entries:
+            symbol, name, data, status, created_at, *rest = entry
+            row_id = self.partitions.allocate_id(schema.to_us(created_at))
+            records.append(schema.build_record(
+                row_id, symbol, name, data, status, created_at, *rest,
+                excerpt_limit=self.excerpt_limit,
+            ))
+
+        if self._writer is not None and self._writer.running:
+            self._writer.submit_many(records)
+            return [record[0] for record in records]
+
+        by_partition = {}
+        for record in records:
+            by_partition.setdefault(self.partitions.key_for(record[schema.CREATED_AT_POS]), []).append(record)
+        for key, partition_records in by_partition.items():
+            conn = self.partitions.connect(key)
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(schema.INSERT_SQL, partition_records)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        self._apply_rollups(rollups.events_from_records(records))
+        return [record[0] for record in records]
+
+    def update_signal(self, signal_id: int, name: str, data: dict, created_at: float,
+                      status: SignalStatus, dequeued_at: Optional[float] = None,
+                      sent_at: Optional[float] = None, response_code: Optional[int] = None,
+                      response_text: Optional[str] = None,
+                      error_class: ErrorClass = ErrorClass.NONE,
+                      previous_status: SignalStatus = SignalStatus.RECEIVED) -> None:
+        """Записать результат обработки в строку сигнала, созданную log_signal"""
+        params = schema.build_outcome(
+            signal_id, status, dequeued_at, sent_at,
+            response_code, response_text, error_class, self.excerpt_limit,
+        )
+        event = rollups.outcome_event(created_at, name, data, status, sent_at, previous_status)
+
+        if self._writer is not None and self._writer.running:
+            self._writer.submit_update(params, event)
+            return
+
+        try:
+            conn = self.partitions.connect(partition_of(signal_id), create=False)
+        except FileNotFoundError:
+            return  # партицию удалил ретеншн
+        try:
+            conn.execute(schema.UPDATE_OUTCOME_SQL, params)
+        finally:
+            conn.close()
+        self._apply_rollups([event])
+
+    def _apply_rollups(self, events: List[tuple]) -> None:
+        """Синхронно обновить агрегаты (когда фоновый писатель не запущен)"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            with conn:
+                rollups.apply(conn, rollups.aggregate(events))
+        finally:
+            conn.close()
 
-        if symbol == "all":
-            cursor.execute("SELECT * FROM signals ORDER BY id DESC LIMIT ?", (limit,))
-        else:
-            cursor.execute(
-                "SELECT * FROM signals WHERE symbol=? OR name=? ORDER BY id DESC LIMIT ?",
-                (symbol, symbol, limit)
-            )
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
\ No newline at end of file
+    def get_stats(self, since: float, until: float) -> dict:
+        """Статистика по агрегатам за [since, until) в unix-секундах"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return rollups.read_stats(conn, math.floor(since), math.ceil(until))
+        finally:
+            conn.close()
+
+    def query_logs(self, log_filter: LogFilter) -> Tuple[List[dict], Optional[str]]:
+        """
+        Страница журнала по фильтру: (строки, курсор следующей страницы).
+
+        Партиции обходятся от новых к старым, лишние отсекаются по диапазону
+        времени; обход останавливается, как только страница заполнена.
+        """
+        since_us, until_us = query.time_bounds(log_filter)
+        rows: List[tuple] = []
+
+        for key in self.partitions.keys_in_range(since_us, until_us):
+            remaining = log_filter.limit - len(rows)
+            if remaining <= 0:
+                break
+
+            sql, params = query.build_query(log_filter.model_copy(update={"limit": remaining}))
+            try:
+                conn = self.partitions.connect(key, create=False)
+            except FileNotFoundError:
+                continue  # партицию удалил ретеншн
+            try:
+                rows.extend(conn.execute(sql, params).fetchall())
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Партиция {key} пропущена: {e}")
+            finally:
+                conn.close()
+
+        return [schema.row_to_dict(row) for row in rows], query.next_cursor(rows, log_filter.limit)
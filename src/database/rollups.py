@@ -0,0 +1,248 @@
+# src/database/rollups.py
+"""
+Агрегаты журнала по минутам и часам.
+
+Писатель логов после каждой пачки добавляет её счётчики в rollup_minute и
+rollup_hour через UPSERT, поэтому стоимость обновления зависит только от
+размера пачки, а /stats за любой диапазон читает несколько сотен строк
+агрегатов вместо самого журнала.
+"""
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from core.models import SignalStatus
+from database import schema
+
+
+# Верхние границы корзин гистограммы задержки отправки, мс (последняя — всё остальное)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HIST_COLUMNS = tuple(f"h{i}" for i in range(len(LATENCY_BUCKETS_MS) + 1))
+
+GRANULARITIES = {"minute": 60, "hour": 3600}
+
+_COUNTER_COLUMNS = ("count", "latency_count", "latency_sum_us") + HIST_COLUMNS
+
+_STATUS_POS = schema.LOG_COLUMNS.index("status")
+_NAME_POS = schema.LOG_COLUMNS.index("name")
+_SIDE_POS = schema.LOG_COLUMNS.index("side")
+_SENT_AT_POS = schema.LOG_COLUMNS.index("sent_at")
+
+
+def _create_table(table: str) -> str:
+    hist = ",\n".join(f"        {column} INTEGER NOT NULL DEFAULT 0" for column in HIST_COLUMNS)
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        bucket INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        side TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        latency_count INTEGER NOT NULL DEFAULT 0,
+        latency_sum_us INTEGER NOT NULL DEFAULT 0,
+{hist},
+        PRIMARY KEY (bucket, name, side, status)
+    ) WITHOUT ROWID
+"""
+
+
+CREATE_TABLES = tuple(_create_table(f"rollup_{g}") for g in GRANULARITIES)
+
+
+def _upsert_sql(table: str) -> str:
+    columns = ("bucket", "name", "side", "status") + _COUNTER_COLUMNS
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in _COUNTER_COLUMNS)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT(bucket, name, side, status) DO UPDATE SET {updates}"
+    )
+
+
+_UPSERT = {g: _upsert_sql(f"rollup_{g}") for g in GRANULARITIES}
+
+
+def latency_bucket(latency_us: int) -> int:
+    latency_ms = latency_us / 1000
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def event(
+    created_at_us: int,
+    name: str,
+    side: Optional[str],
+    status: int,
+    sent_at_us: Optional[int] = None,
+    previous: Optional[int] = None,
+) -> Tuple:
+    """
+    Одно событие для агрегатов: (created_at_us, name, side, status, latency_us | None, previous | None).
+
+    previous — для результата: сигнал переносится из этого статуса в status
+    (−1 и +1 в той же корзине created_at), а не добавляется второй раз.
+    """
+    latency = sent_at_us - created_at_us if sent_at_us is not None else None
+    return created_at_us, name, side or "", int(status), latency, None if previous is None else int(previous)
+
+
+def outcome_event(
+    created_at: float,
+    name: str,
+    data: Any,
+    status: int,
+    sent_at: Optional[float] = None,
+    previous: int = SignalStatus.RECEIVED,
+) -> Tuple:
+    """Событие для результата обработки сигнала (времена в секундах, side из payload)"""
+    side = data.get("side") if isinstance(data, dict) else None
+    return event(schema.to_us(created_at), name, side, status, schema.to_us(sent_at), previous)
+
+
+def events_from_records(records: Iterable[Sequence]) -> List[Tuple]:
+    """События из записей INSERT_SQL"""
+    return [
+        event(r[schema.CREATED_AT_POS], r[_NAME_POS], r[_SIDE_POS], r[_STATUS_POS], r[_SENT_AT_POS])
+        for r in records
+    ]
+
+
+def aggregate(events: Iterable[Tuple]) -> Dict[str, Dict[Tuple, List[int]]]:
+    """Свернуть события в приращения счётчиков по каждой гранулярности"""
+    deltas: Dict[str, Dict[Tuple, List[int]]] = {g: {} for g in GRANULARITIES}
+    for created_at_us, name, side, status, latency, *rest in events:
+        # События сегментов старого формата — без previous
+        previous = rest[0] if rest else None
+        seconds = created_at_us // 1_000_000
+        for granularity, width in GRANULARITIES.items():
+            bucket = seconds - seconds % width
+            if previous is not None:
+                _counters(deltas[granularity], (bucket, name, side, previous))[0] -= 1
+            counters = _counters(deltas[granularity], (bucket, name, side, status))
+            counters[0] += 1
+            if latency is not None and latency >= 0:
+                counters[1] += 1
+                counters[2] += latency
+                counters[3 + latency_bucket(latency)] += 1
+    return deltas
+
+
+def _counters(rows: Dict[Tuple, List[int]], key: Tuple) -> List[int]:
+    counters = rows.get(key)
+    if counters is None:
+        counters = rows[key] = [0] * len(_COUNTER_COLUMNS)
+    return counters
+
+
+def apply(conn: sqlite3.Connection, deltas: Dict[str, Dict[Tuple, List[int]]]) -> None:
+    """Добавить приращения в таблицы агрегатов (внутри транзакции вызывающего)"""
+    for granularity, rows in deltas.items():
+        if rows:
+            conn.executemany(_UPSERT[granularity], [key + tuple(c) for key, c in rows.items()])
+
+
+def _ranges(since: int, until: int) -> List[Tuple[str, int, int]]:
+    """Разбить [since, until) на часовые корзины в середине и минутные по краям"""
+    hour = GRANULARITIES["hour"]
+    minute = GRANULARITIES["minute"]
+    since = since - since % minute
+    first_hour = -(-since // hour) * hour
+    last_hour = until - until % hour
+    if first_hour >= last_hour:
+        return [("minute", since, until)]
+    ranges = [("hour", first_hour, last_hour)]
+    if since < first_hour:
+        ranges.append(("minute", since, first_hour))
+    if last_hour < until:
+        ranges.append(("minute", last_hour, until))
+    return ranges
+
+
+def empty_totals() -> dict:
+    return {
+        "total": 0,
+        "status": {},
+        "symbol": {},
+        "side": {},
+        "hourly": {},
+        "latency_count": 0,
+        "latency_sum_us": 0,
+        "histogram": [0] * len(HIST_COLUMNS),
+    }
+
+
+def _accumulate(totals: dict, rows: Iterable[Sequence]) -> None:
+    """Добавить строки агрегатов (bucket, name, side, status, *счётчики) в итог"""
+    for bucket, name, side, status, count, latency_count, latency_sum, *hist in rows:
+        hour = bucket - bucket % GRANULARITIES["hour"]
+        if count:
+            # Корзина, из которой все сигналы перенесены в статусы результата, — 0
+            status_name = schema.enum_name(SignalStatus, status)
+            totals["total"] += count
+            totals["status"][status_name] = totals["status"].get(status_name, 0) + count
+            totals["symbol"][name] = totals["symbol"].get(name, 0) + count
+            if side:
+                totals["side"][side] = totals["side"].get(side, 0) + count
+            totals["hourly"][hour] = totals["hourly"].get(hour, 0) + count
+        totals["latency_count"] += latency_count
+        totals["latency_sum_us"] += latency_sum
+        for index, value in enumerate(hist):
+            totals["histogram"][index] += value
+
+
+def read_stats(conn: sqlite3.Connection, since: int, until: int) -> dict:
+    """Статистика за [since, until) в unix-секундах"""
+    totals = empty_totals()
+    select = ", ".join(("bucket", "name", "side", "status") + _COUNTER_COLUMNS)
+
+    for granularity, start, end in _ranges(since, until):
+        rows = conn.execute(
+            f"SELECT {select} FROM rollup_{granularity} WHERE bucket >= ? AND bucket < ?",
+            (start, end),
+        )
+        _accumulate(totals, rows)
+
+    return totals
+
+
+class MemoryRollups:
+    """
+    Те же минутные/часовые агрегаты в памяти — для хранилищ без SQLite.
+
+    Минутные корзины старше minute_window секунд удаляются при чтении, чтобы
+    память не росла вместе с историей; края более старых диапазонов
+    тогда считаются с точностью до часа.
+    """
+
+    def __init__(self, minute_window: int = 2 * 86400):
+        self.minute_window = minute_window
+        self._tables: Dict[str, Dict[Tuple, List[int]]] = {g: {} for g in GRANULARITIES}
+
+    def apply(self, deltas: Dict[str, Dict[Tuple, List[int]]]) -> None:
+        for granularity, rows in deltas.items():
+            table = self._tables[granularity]
+            for key, counters in rows.items():
+                current = table.get(key)
+                if current is None:
+                    table[key] = list(counters)
+                else:
+                    for index, value in enumerate(counters):
+                        current[index] += value
+
+    def read_stats(self, since: int, until: int) -> dict:
+        """Статистика за [since, until) в unix-секундах"""
+        self.prune_minutes(int(time.time()) - self.minute_window)
+        totals = empty_totals()
+        for granularity, start, end in _ranges(since, until):
+            _accumulate(totals, (
+                key + tuple(counters)
+                for key, counters in self._tables[granularity].items()
+                if start <= key[0] < end
+            ))
+        return totals
+
+    def prune_minutes(self, before: int) -> None:
+        """Удалить минутные корзины старше before (unix-секунды); часовые остаются"""
+        table = self._tables["minute"]
+        for key in [key for key in table if key[0] < before]:
+            del table[key]
@@ -0,0 +1,242 @@
+# src/database/schema.py
+"""Схема v2 журнала сигналов и функции кодирования строк"""
+import json
+from typing import Any, Optional, Tuple
+from core.models import SignalStatus, ErrorClass, RawPayload
+
+
+SCHEMA_VERSION = 2
+
+# Максимальная длина сохраняемого фрагмента ответа Finandy / текста ошибки
+RESPONSE_EXCERPT_LIMIT = 256
+
+LEGACY_TABLE = "signals"
+LOG_TABLE = "signal_log"
+
+CREATE_LOG_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {LOG_TABLE} (
+        id INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL,
+        name TEXT NOT NULL,
+        side TEXT,
+        data TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        error_class INTEGER NOT NULL DEFAULT 0,
+        created_at INTEGER NOT NULL,
+        dequeued_at INTEGER,
+        sent_at INTEGER,
+        response_code INTEGER,
+        response_excerpt TEXT
+    )
+"""
+
+CREATE_MIGRATION_STATE = """
+    CREATE TABLE IF NOT EXISTS migration_state (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        rows_done INTEGER NOT NULL DEFAULT 0,
+        finished INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# Индексы покрывают все фильтры: к (колонка, created_at) SQLite неявно
+# добавляет rowid, поэтому сортировка (created_at DESC, id DESC) идёт по индексу
+LOG_INDEXES = tuple(
+    f"CREATE INDEX IF NOT EXISTS idx_{LOG_TABLE}_{suffix} ON {LOG_TABLE}({columns})"
+    for suffix, columns in (
+        ("created", "created_at"),
+        ("name_created", "name, created_at"),
+        ("symbol_created", "symbol, created_at"),
+        ("status_created", "status, created_at"),
+        ("side_created", "side, created_at"),
+        ("code_created", "response_code, created_at"),
+    )
+)
+
+LOG_COLUMNS = (
+    "id", "symbol", "name", "side", "data", "status", "error_class",
+    "created_at", "dequeued_at", "sent_at", "response_code", "response_excerpt",
+)
+
+# Колонки, добавленные после первого выпуска схемы v2: (имя, тип).
+# В существующих партициях добавляются через ALTER TABLE при открытии
+ADDED_COLUMNS = (
+    ("dequeued_at", "INTEGER"),
+)
+
+# Обновление строки сигнала по результату отправки
+UPDATE_OUTCOME_SQL = (
+    f"UPDATE {LOG_TABLE} SET status = ?, error_class = ?, dequeued_at = ?, sent_at = ?, "
+    f"response_code = ?, response_excerpt = ? WHERE id = ?"
+)
+
+INSERT_SQL = (
+    f"INSERT INTO {LOG_TABLE} ({', '.join(LOG_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in LOG_COLUMNS)})"
+)
+
+SELECT_COLUMNS = ", ".join(LOG_COLUMNS)
+
+# Позиция created_at в строке, выбранной через SELECT_COLUMNS
+CREATED_AT_POS = LOG_COLUMNS.index("created_at")
+
+
+def encode_payload(data: Any) -> str:
+    """Каноничный компактный JSON: без пробелов, ключи отсортированы; тело passthrough — как пришло"""
+    if isinstance(data, RawPayload):
+        return data.raw.decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def decode_payload(text: Optional[str]) -> Any:
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def to_us(ts: Optional[float]) -> Optional[int]:
+    """Секунды (float) → целые микросекунды"""
+    if ts is None:
+        return None
+    return int(round(ts * 1_000_000))
+
+
+def from_us(us: Optional[int]) -> Optional[float]:
+    """Целые микросекунды → секунды (float)"""
+    if us is None:
+        return None
+    return us / 1_000_000
+
+
+def excerpt(text: Optional[str], limit: int = RESPONSE_EXCERPT_LIMIT) -> Optional[str]:
+    """Ограничить длину сохраняемого текста"""
+    if text is None or len(text) <= limit:
+        return text
+    return text[: limit - 1] + "…"
+
+
+def build_record(
+    row_id: int,
+    symbol: str,
+    name: str,
+    data: Any,
+    status: SignalStatus,
+    created_at: float,
+    sent_at: Optional[float] = None,
+    response_code: Optional[int] = None,
+    response_text: Optional[str] = None,
+    error_class: ErrorClass = ErrorClass.NONE,
+    excerpt_limit: int = RESPONSE_EXCERPT_LIMIT,
+) -> Tuple:
+    """Собрать кортеж для INSERT_SQL"""
+    side = data.get("side") if isinstance(data, dict) else None
+    return (
+        row_id,
+        symbol,
+        name,
+        side,
+        encode_payload(data),
+        int(status),
+        int(error_class),
+        to_us(created_at),
+        None,
+        to_us(sent_at),
+        response_code,
+        excerpt(response_text, excerpt_limit),
+    )
+
+
+def build_outcome(
+    row_id: int,
+    status: SignalStatus,
+    dequeued_at: Optional[float] = None,
+    sent_at: Optional[float] = None,
+    response_code: Optional[int] = None,
+    response_text: Optional[str] = None,
+    error_class: ErrorClass = ErrorClass.NONE,
+    excerpt_limit: int = RESPONSE_EXCERPT_LIMIT,
+) -> Tuple:
+    """Собрать параметры для UPDATE_OUTCOME_SQL"""
+    return (
+        int(status),
+        int(error_class),
+        to_us(dequeued_at),
+        to_us(sent_at),
+        response_code,
+        excerpt(response_text, excerpt_limit),
+        row_id,
+    )
+
+
+# Позиции колонок UPDATE_OUTCOME_SQL в строке журнала
+_OUTCOME_POS = tuple(
+    LOG_COLUMNS.index(column)
+    for column in ("status", "error_class", "dequeued_at", "sent_at", "response_code", "response_excerpt")
+)
+
+
+def apply_outcome(row: list, params: Tuple) -> None:
+    """Применить параметры UPDATE_OUTCOME_SQL к строке, хранящейся вне SQLite"""
+    for pos, value in zip(_OUTCOME_POS, params):
+        row[pos] = value
+
+
+def row_to_dict(row: Tuple) -> dict:
+    """Строка signal_log → словарь в формате API"""
+    (row_id, symbol, name, side, data, status, error_class,
+     created_at, dequeued_at, sent_at, response_code, response_excerpt) = row
+    return {
+        "id": row_id,
+        "symbol": symbol,
+        "name": name,
+        "side": side,
+        "data": decode_payload(data),
+        "status": enum_name(SignalStatus, status),
+        "error_class": enum_name(ErrorClass, error_class),
+        "created_at": from_us(created_at),
+        "dequeued_at": from_us(dequeued_at),
+        "sent_at": from_us(sent_at),
+        "response_code": response_code,
+        "response_text": response_excerpt,
+    }
+
+
+def enum_name(enum_cls, value: int) -> str:
+    try:
+        return enum_cls(value).name.lower()
+    except ValueError:
+        return str(value)
+
+
+def classify_legacy_status(
+    status: Optional[str],
+    response_code: Optional[int],
+    response_text: Optional[str],
+) -> Tuple[SignalStatus, ErrorClass]:
+    """Разобрать строковый статус v1 ("sent 200", "error Timeout: ...") в коды v2"""
+    status = (status or "").strip()
+    text = f"{status} {response_text or ''}"
+
+    if status == "received":
+        return SignalStatus.RECEIVED, ErrorClass.NONE
+    if status.startswith("sent"):
+        return SignalStatus.SENT, ErrorClass.NONE
+
+    if "Timeout" in text or "Таймаут" in text:
+        return SignalStatus.ERROR, ErrorClass.TIMEOUT
+    if "Request Error" in text or "Client error" in text:
+        return SignalStatus.ERROR, ErrorClass.CONNECTION
+    if ("No webhook" in text or "No queue" in text
+            or "Недопустимый вебхук" in text or "Unknown target" in text):
+        return SignalStatus.ERROR, ErrorClass.CONFIG
+    if response_code is not None and response_code != 200:
+        return SignalStatus.ERROR, ErrorClass.HTTP
+    if status.startswith("error"):
+        tail = status[len("error"):].strip()
+        if tail.isdigit():
+            return SignalStatus.ERROR, ErrorClass.HTTP
+        return SignalStatus.ERROR, ErrorClass.UNEXPECTED
+    return SignalStatus.ERROR, ErrorClass.UNEXPECTED
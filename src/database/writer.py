@@ -0,0 +1,290 @@
+# src/database/writer.py
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Sequence
+from database import rollups
+from database.partitions import PartitionManager, partition_of
+from database.schema import INSERT_SQL, UPDATE_OUTCOME_SQL
+
+_STOP = object()
+
+
+class _FlushMarker:
+    """Маркер в очереди: выставляет событие, когда всё до него записано"""
+
+    __slots__ = ("event",)
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class _Update:
+    """Обновление существующей строки (UPDATE_OUTCOME_SQL) и его событие для агрегатов"""
+
+    __slots__ = ("params", "event")
+
+    def __init__(self, params: Sequence, event: Optional[tuple]):
+        self.params = params
+        self.event = event
+
+    @property
+    def row_id(self) -> int:
+        return self.params[-1]
+
+
+class _Many:
+    """Несколько вставок, которые пишутся в одной пачке"""
+
+    __slots__ = ("records",)
+
+    def __init__(self, records: List[Sequence]):
+        self.records = records
+
+
+class SignalLogWriter:
+    """
+    Фоновый писатель логов сигналов с групповым коммитом.
+
+    Владеет постоянными WAL-соединениями с текущими партициями в отдельном
+    потоке и пишет записи из очереди пачками: транзакция закрывается, когда
+    набралось max_batch_size записей или прошло max_delay_ms с первой записи
+    пачки. Вызов submit() никогда не ждёт диска. При переходе на новую
+    партицию писатель удаляет партиции, вышедшие за окно хранения.
+
+    Если задан catalog_path, после каждой пачки в нём обновляются
+    минутные/часовые агрегаты (см. database.rollups).
+    """
+
+    # Сколько партиций держать открытыми (текущая + предыдущая на стыке периодов)
+    MAX_OPEN_PARTITIONS = 2
+
+    def __init__(
+        self,
+        partitions: PartitionManager,
+        max_batch_size: int = 200,
+        max_delay_ms: float = 50.0,
+        catalog_path: Optional[str] = None,
+    ):
+        self.partitions = partitions
+        self.catalog_path = catalog_path
+        self._catalog: Optional[sqlite3.Connection] = None
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.batches_written = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def backlog(self) -> int:
+        """Количество записей, ещё не закоммиченных в БД"""
+        return self._pending
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запустить поток писателя"""
+        if self.running:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="signal-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, record: Sequence) -> None:
+        """Поставить новую строку в очередь на запись (не блокирует)"""
+        with self._lock:
+            self._pending += 1
+        self._queue.put(record)
+
+    def submit_many(self, records: List[Sequence]) -> None:
+        """Поставить строки одним элементом очереди: они попадут в одну пачку (транзакцию)"""
+        if not records:
+            return
+        with self._lock:
+            self._pending += len(records)
+        self._queue.put(_Many(records))
+
+    def submit_update(self, params: Sequence, event: Optional[tuple] = None) -> None:
+        """Поставить в очередь обновление строки; применяется после ранее поставленной вставки"""
+        with self._lock:
+            self._pending += 1
+        self._queue.put(_Update(params, event))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться записи всего, что было поставлено до вызова"""
+        if not self.running:
+            return self._pending == 0
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.event.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Дописать очередь и остановить поток"""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️ Писатель логов не завершился за {timeout} сек, в очереди: {self._pending}")
+
+    def _run(self) -> None:
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                batch: List[Sequence] = []
+                markers: List[_FlushMarker] = []
+                stopping = self._collect(item, batch, markers)
+
+                deadline = time.monotonic() + self.max_delay
+                while not stopping and len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        if remaining > 0:
+                            item = self._queue.get(timeout=remaining)
+                        else:
+                            item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    stopping = self._collect(item, batch, markers)
+
+                if stopping:
+                    # Дописываем всё, что успели положить до остановки
+                    while True:
+                        try:
+                            self._collect(self._queue.get_nowait(), batch, markers)
+                        except queue.Empty:
+                            break
+
+                if batch:
+                    self._write_batch(batch)
+                for marker in markers:
+                    marker.event.set()
+        finally:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+            if self._catalog is not None:
+                self._catalog.close()
+                self._catalog = None
+
+    def _connection(self, key: int) -> sqlite3.Connection:
+        conn = self._connections.get(key)
+        if conn is not None:
+            return conn
+
+        # Новая партиция: закрываем самые старые соединения и чистим ретеншн
+        while len(self._connections) >= self.MAX_OPEN_PARTITIONS:
+            oldest = min(self._connections)
+            self._connections.pop(oldest).close()
+        try:
+            self.partitions.drop_expired()
+        except OSError as e:
+            print(f"⚠️ Не удалось удалить старые партиции: {e}")
+
+        conn = self.partitions.connect(key)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._connections[key] = conn
+        return conn
+
+    @staticmethod
+    def _collect(item, batch: List[Sequence], markers: List[_FlushMarker]) -> bool:
+        if item is _STOP:
+            return True
+        if isinstance(item, _FlushMarker):
+            markers.append(item)
+        elif isinstance(item, _Many):
+            batch.extend(item.records)
+        else:
+            batch.append(item)
+        return False
+
+    def _write_batch(self, batch: List) -> None:
+        # Записи одной пачки почти всегда попадают в одну партицию;
+        # порядок внутри партиции сохраняется, так что UPDATE идёт после своего INSERT
+        by_partition: Dict[int, List] = {}
+        for op in batch:
+            row_id = op.row_id if isinstance(op, _Update) else op[0]
+            by_partition.setdefault(partition_of(row_id), []).append(op)
+
+        events: List[tuple] = []
+        for key, ops in by_partition.items():
+            if self._write_partition(key, ops):
+                inserts = [op for op in ops if not isinstance(op, _Update)]
+                events.extend(rollups.events_from_records(inserts))
+                events.extend(op.event for op in ops if isinstance(op, _Update) and op.event)
+
+        if events and self.catalog_path:
+            self._update_rollups(events)
+
+        with self._lock:
+            self._pending -= len(batch)
+
+    def _update_rollups(self, events: List[tuple]) -> None:
+        try:
+            if self._catalog is None:
+                self._catalog = sqlite3.connect(self.catalog_path, isolation_level=None)
+                self._catalog.execute("PRAGMA synchronous=NORMAL")
+            self._catalog.execute("BEGIN")
+            rollups.apply(self._catalog, rollups.aggregate(events))
+            self._catalog.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            if self._catalog is not None and self._catalog.in_transaction:
+                self._catalog.execute("ROLLBACK")
+            print(f"⚠️ Агрегаты не обновлены для {len(events)} событий: {e}")
+
+    @staticmethod
+    def _runs(ops: List):
+        """Разбить операции на подряд идущие группы одного вида для executemany"""
+        run: List = []
+        run_is_update = None
+        for op in ops:
+            is_update = isinstance(op, _Update)
+            if run and is_update != run_is_update:
+                yield run_is_update, run
+                run = []
+            run.append(op.params if is_update else op)
+            run_is_update = is_update
+        if run:
+            yield run_is_update, run
+
+    def _write_partition(self, key: int, records: List) -> bool:
+        for attempt in range(2):
+            conn = None
+            try:
+                conn = self._connection(key)
+                conn.execute("BEGIN")
+                for is_update, run in self._runs(records):
+                    conn.executemany(UPDATE_OUTCOME_SQL if is_update else INSERT_SQL, run)
+                conn.execute("COMMIT")
+                self.batches_written += 1
+                self.rows_written += len(records)
+                return True
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                if conn is not None and conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                if attempt == 0:
+                    print(f"⚠️ Ошибка записи пачки логов ({len(records)} шт.): {e}, повторяю")
+                    # Переоткрываем соединение: файл партиции мог быть удалён
+                    stale = self._connections.pop(key, None)
+                    if stale is not None:
+                        stale.close()
+                    time.sleep(0.05)
+                else:
+                    self.rows_dropped += len(records)
+                    print(f"❌ Пачка логов потеряна ({len(records)} шт.): {e}")
+                    traceback.print_exc()
+        return False
@@ -0,0 +1,30 @@
+# src/ingress.py
+"""Приложение ingress-процесса (запускается из launcher.py)"""
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from config.settings import settings
+from api.ingress import router as ingress_router
+from services.handoff import HandoffClient
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Соединение с диспетчером открывается при первом сигнале"""
+    app.state.handoff = HandoffClient(settings.dispatch_socket, settings.handoff_timeout_s)
+    yield
+    await app.state.handoff.close()
+
+
+def create_ingress_app() -> FastAPI:
+    app = FastAPI(
+        lifespan=lifespan,
+        title="Webhook Proxy Server — ingress",
+        version="1.0",
+        docs_url=None,
+        redoc_url=None,
+    )
+    app.include_router(ingress_router, prefix="/api/v1")
+    return app
+
+
+app = create_ingress_app()
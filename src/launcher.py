@@ -0,0 +1,103 @@
+# src/launcher.py
+"""
+Многопроцессный запуск: INGRESS_WORKERS ingress-процессов и один диспетчер.
+
+Ingress-процессы слушают PORT с SO_REUSEPORT (соединения распределяет ядро),
+проверяют сигналы и передают их диспетчеру через Unix-сокет DISPATCH_SOCKET.
+Диспетчер — обычное приложение main:app на DISPATCHER_PORT: очереди, лимиты,
+журналы и отправка в Finandy живут только в нём, поэтому порядок сигналов
+инструмента и ограничение частоты сохраняются. Логи, статистика, dead-letter
+и веб-интерфейс доступны на DISPATCHER_PORT.
+
+    cd src && python launcher.py
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+# До импорта настроек: дочерние процессы (spawn) прочитают тот же путь
+os.environ.setdefault(
+    "DISPATCH_SOCKET", os.path.join(os.path.dirname(os.getenv("DB_PATH", "signals.db")) or ".", "dispatch.sock")
+)
+
+import uvicorn
+from config.settings import settings
+
+HOST = "0.0.0.0"
+
+
+def _run_dispatcher() -> None:
+    uvicorn.run("main:app", host=HOST, port=settings.dispatcher_port, log_level="info")
+
+
+def _run_ingress() -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((HOST, settings.port))
+    config = uvicorn.Config("ingress:app", log_level="warning", access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _wait_for_socket(path: str, process: multiprocessing.Process, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if not process.is_alive():
+            raise SystemExit("❌ Диспетчер завершился при запуске")
+        if time.monotonic() > deadline:
+            raise SystemExit(f"❌ Диспетчер не открыл {path} за {timeout:g} с")
+        time.sleep(0.1)
+
+
+def _stop(processes) -> None:
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(10)
+
+
+def main() -> None:
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("❌ SO_REUSEPORT не поддерживается — используйте однопроцессный запуск (uvicorn main:app)")
+
+    context = multiprocessing.get_context("spawn")
+    # Старый сокет удалит сам диспетчер; ждём, пока он создаст новый
+    if os.path.exists(settings.dispatch_socket):
+        os.unlink(settings.dispatch_socket)
+    dispatcher = context.Process(target=_run_dispatcher, name="dispatcher")
+    dispatcher.start()
+    _wait_for_socket(settings.dispatch_socket, dispatcher)
+
+    ingress = [
+        context.Process(target=_run_ingress, name=f"ingress-{index}")
+        for index in range(settings.ingress_workers)
+    ]
+    for process in ingress:
+        process.start()
+    print(
+        f"🚀 Ingress-процессов: {len(ingress)} на :{settings.port}, "
+        f"диспетчер pid={dispatcher.pid} на :{settings.dispatcher_port}"
+    )
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    while not stopping and dispatcher.is_alive() and all(p.is_alive() for p in ingress):
+        time.sleep(0.5)
+
+    # Сначала перестаём принимать сигналы, затем диспетчер дописывает журналы
+    print("🛑 Останавливаем ingress-процессы и диспетчер...")
+    _stop(ingress)
+    _stop([dispatcher])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,194 @@
 # src/main.py
 import asyncio
+import math
+from typing import Optional
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
 from config import webhooks
-from database.repository import SignalRepository
+from database.backends import create_backend
 from services.webhook_service import WebhookClient
 from services.worker_service import SignalWorker
 from api.endpoints import router as api_router
+from api.ingress import dispatch_handler
 from services.queue_service import QueueManager
+from services.dispatch_threads import ThreadedQueueManager
+from services.journal import SignalJournal
+from services.rate_limiter import RateLimiter, parse_overrides
+from services.retry import RetryPolicy
+from services.backpressure import LoadShedder, parse_kinds
+from services.coalescing import Coalescer, parse_rules
+from services.priority import SignalPriority, parse_priorities
+from services.idempotency import IdempotencyCache
+from services.deadlines import DeadlinePolicy, parse_ttl_overrides
+from services.circuit_breaker import CircuitBreakers
+from services.handoff import HandoffServer
+from database.dead_letters import DeadLetterStore
+
+
+def _rate_limiter(shards: int = 1) -> RateLimiter:
+    """Лимиты отправки; общие для всех инструментов (host, global) делятся между потоками"""
+    rate = 1000.0 / settings.rate_limit_ms if settings.rate_limit_ms > 0 else 0.0
+    if settings.rate_limit_key == "host":
+        rate /= shards
+    return RateLimiter(
+        rate,
+        settings.rate_limit_burst,
+        settings.rate_limit_key,
+        parse_overrides(settings.rate_limit_overrides),
+        settings.global_rate_limit_per_s / shards,
+        settings.global_rate_limit_burst,
+    )
+
+
+def _deadline_policy() -> Optional[DeadlinePolicy]:
+    symbol_ttls, kind_ttls = parse_ttl_overrides(settings.signal_ttl_overrides)
+    if settings.signal_ttl_s <= 0 and not symbol_ttls and not kind_ttls:
+        return None
+    return DeadlinePolicy(settings.signal_ttl_s, symbol_ttls, kind_ttls, settings.expired_action)
+
+
+def _circuit_breakers() -> Optional[CircuitBreakers]:
+    if not settings.circuit_breaker:
+        return None
+    return CircuitBreakers(
+        settings.circuit_policy,
+        settings.circuit_key,
+        window_s=settings.circuit_window_s,
+        min_requests=settings.circuit_min_requests,
+        error_rate=settings.circuit_error_rate,
+        slow_ms=settings.circuit_slow_ms,
+        open_s=settings.circuit_open_s,
+        probes=settings.circuit_probes,
+    )
+
+
+def _queue_manager(repository, webhook_client, rate_limiter, retry_policy, dead_letters, deadlines,
+                   breakers, journal=None, journal_acks=None, shards: int = 1) -> QueueManager:
+    # Воркер создаётся при первом сигнале инструмента; состояние лимита
+    # хранится в rate_limiter и переживает остановку воркера по простою
+    queue_manager = QueueManager(
+        journal,
+        worker_factory=lambda symbol: SignalWorker(
+            symbol, queue_manager, repository, webhook_client,
+            rate_limiter, retry_policy, dead_letters, deadlines, breakers,
+        ),
+        idle_timeout=settings.worker_idle_timeout_s,
+        coalescer=Coalescer(parse_rules(settings.coalesce_rules), repository) if settings.coalesce_rules else None,
+        shedder=LoadShedder(
+            settings.queue_max_per_symbol,
+            math.ceil(settings.queue_max_total / shards),
+            settings.queue_overflow_policy,
+            parse_kinds(settings.queue_shed_kinds),
+            drain_interval=settings.rate_limit_ms / 1000.0,
+            repository=repository,
+        ),
+        priority=SignalPriority(parse_priorities(settings.queue_priorities)) if settings.queue_priorities else None,
+        journal_acks=journal_acks,
+    )
+    return queue_manager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
     # Инициализация зависимостей
-    repository = SignalRepository()
-    queue_manager = QueueManager()
-    webhook_client = WebhookClient()
-
-    # Инициализация БД
+    repository = create_backend(settings.storage_backend)
+    journal = None
+    if settings.durable_queue:
+        journal = SignalJournal(
+            settings.queue_journal_path,
+            settings.journal_flush_interval_ms,
+            settings.journal_wait_for_sync,
+        )
+    # В режиме потоков клиент цикла приёма нужен только для test-webhook: без прогрева
+    webhook_client = WebhookClient(warm_connections=0 if settings.dispatch_threads > 0 else None)
+    http_clients = [webhook_client]
+    retry_policy = RetryPolicy.from_settings(settings)
+    dead_letters = DeadLetterStore(settings.dead_letter_path, settings.log_response_excerpt)
+    deadlines = _deadline_policy()
+    # Общие для всех потоков: недоступность получателя видна всем воркерам сразу
+    breakers = _circuit_breakers()
+    rate_limiter = None
+    if settings.dispatch_threads > 0:
+        threads = settings.dispatch_threads
+
+        def shard(index, journal_acks):
+            # У потока своя сессия aiohttp: она привязана к циклу событий
+            shard_client = WebhookClient()
+            http_clients.append(shard_client)
+            shard_manager = _queue_manager(
+                repository, shard_client, _rate_limiter(threads), retry_policy, dead_letters, deadlines,
+                breakers, journal_acks=journal_acks, shards=threads,
+            )
+            return shard_manager, [shard_client.start], [shard_client.close]
+
+        queue_manager = ThreadedQueueManager(
+            threads, shard, journal, lag_interval=settings.loop_lag_interval_ms / 1000.0,
+        )
+    else:
+        rate_limiter = _rate_limiter()
+        queue_manager = _queue_manager(
+            repository, webhook_client, rate_limiter, retry_policy, dead_letters, deadlines, breakers,
+            journal=journal,
+        )
+
+    # Инициализация хранилища журнала и фоновой записи логов
+    print(f"💾 Хранилище журнала: {repository.name} ({repository.durability.note})")
     repository.init_db()
+    repository.start_writer(settings.log_batch_size, settings.log_flush_interval_ms)
+    dead_letters.init()
 
-    # Запуск воркеров
-    workers = []
-    worker_tasks = []
-    instruments = webhooks.get_supported_instruments()
-
-    for symbol in instruments:
-        try:
-            worker = SignalWorker(symbol, queue_manager, repository, webhook_client)
-            workers.append(worker)
-            task = asyncio.create_task(worker.run())
-            worker_tasks.append(task)
-            print(f"✅ Воркер запущен для {symbol}")
-        except Exception as e:
-            print(f"❌ Ошибка запуска воркера для {symbol}: {e}")
+    # Возвращаем в очереди сигналы, не отправленные до перезапуска
+    await queue_manager.start()
+    await webhook_client.start()
 
     # Сохраняем зависимости в состоянии приложения
     app.state.repository = repository
     app.state.queue_manager = queue_manager
     app.state.webhook_client = webhook_client
-    app.state.workers = workers
-    app.state.worker_tasks = worker_tasks
+    app.state.http_clients = http_clients
+    app.state.rate_limiter = rate_limiter
+    app.state.dead_letters = dead_letters
+    app.state.deadlines = deadlines
+    app.state.breakers = breakers
+    app.state.idempotency = (
+        IdempotencyCache(settings.idempotency_ttl_s, settings.idempotency_max_entries)
+        if settings.idempotency_ttl_s > 0 else None
+    )
 
-    print(f"🚀 Сервер запущен. Обрабатываем {len(workers)}/{len(instruments)} инструментов")
+    # Режим диспетчера: сигналы приходят и от ingress-процессов (launcher.py)
+    handoff = None
+    if settings.dispatch_socket:
+        handoff = HandoffServer(settings.dispatch_socket, dispatch_handler(app.state))
+        await handoff.start()
+
+    print(
+        f"🚀 Сервер запущен. Инструментов: {len(webhooks.FINANDY_WEBHOOKS)}, "
+        f"воркеры создаются по требованию (простой {queue_manager.idle_timeout:g} с)"
+    )
     print(f"🌐 Документация: http://0.0.0.0:{settings.port}/docs")
 
     yield
 
     # Graceful shutdown
+    if handoff is not None:
+        await handoff.close()
+
     print("🛑 Останавливаем воркеры...")
-    for task in worker_tasks:
-        task.cancel()
-
-    if worker_tasks:
-        try:
-            await asyncio.wait_for(
-                asyncio.gather(*worker_tasks, return_exceptions=True),
-                timeout=5.0
-            )
-        except asyncio.TimeoutError:
-            print("⚠️ Таймаут при остановке воркеров")
+    await queue_manager.stop_workers(timeout=5.0)
 
     print("✅ Все воркеры остановлены")
 
+    # Неподтверждённые сигналы остаются в журнале до следующего запуска
+    await queue_manager.close()
+
+    # Дописываем накопленные логи в БД
+    print(f"💾 Сбрасываем логи в БД (в очереди: {repository.log_backlog})...")
+    await asyncio.to_thread(repository.close)
+    await webhook_client.close()
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -1,6 +1,7 @@
 from services.queue_service import QueueManager  # ✅ Без точек
 from services.webhook_service import WebhookClient  # ✅ Без точек
 from services.worker_service import SignalWorker  # ✅ Без точек
+from services.rate_limiter import RateLimiter, TokenBucket  # ✅ Без точек
 
 
-__all__ = ["QueueManager", "WebhookClient", "SignalWorker"]
\ No newline at end of file
+__all__ = ["QueueManager", "WebhookClient", "SignalWorker", "RateLimiter", "TokenBucket"]
\ No newline at end of file
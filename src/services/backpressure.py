@@ -0,0 +1,148 @@
+# src/services/backpressure.py
+"""
+Ограничение длины очередей и сброс нагрузки.
+
+Ёмкость задаётся на инструмент и на все очереди вместе (0 — без предела).
+Когда места нет, новый сигнал обрабатывается по политике:
+    reject       — не принимать: ответ 429 с Retry-After (оценка времени,
+                   за которое очередь разойдётся при заданном лимите отправки);
+    drop_oldest  — вытеснить самый старый ожидающий сигнал;
+    drop_by_type — вытеснить самый старый сигнал первого найденного вида из
+                   shed_kinds (по умолчанию сначала перенос SL, затем вход);
+                   закрытия не вытесняются, и если вытеснять нечего — 429.
+Вытесненный сигнал получает в журнале статус DROPPED, отклонённый — REJECTED.
+"""
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.exceptions import QueueFullException
+from core.models import SignalStatus, QueuedSignal
+from services.coalescing import SIGNAL_KINDS, SignalQueue, classify_signal
+
+OVERFLOW_POLICIES = ("reject", "drop_oldest", "drop_by_type")
+
+
+def parse_kinds(spec: str) -> Tuple[str, ...]:
+    """Порядок вытеснения для drop_by_type: "sl,open" → ("sl", "open")"""
+    kinds = tuple(k.strip() for k in spec.split(",") if k.strip())
+    unknown = set(kinds) - set(SIGNAL_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown signal kinds {sorted(unknown)}, allowed: {list(SIGNAL_KINDS)}")
+    return kinds
+
+
+class LoadShedder:
+    """Проверяет ёмкость очередей перед постановкой сигнала"""
+
+    def __init__(
+        self,
+        max_per_symbol: int = 0,
+        max_total: int = 0,
+        policy: str = "reject",
+        shed_kinds: Iterable[str] = ("sl", "open"),
+        drain_interval: float = 0.3,
+        repository=None,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', allowed: {list(OVERFLOW_POLICIES)}")
+        self.max_per_symbol = max(0, max_per_symbol)
+        self.max_total = max(0, max_total)
+        self.policy = policy
+        self.shed_kinds = tuple(shed_kinds)
+        self.drain_interval = drain_interval
+        self.repository = repository
+        self.rejected = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_per_symbol or self.max_total)
+
+    def admit(
+        self, symbol: str, item: QueuedSignal, queues: Dict[str, SignalQueue]
+    ) -> List[QueuedSignal]:
+        """
+        Освободить место под item или отклонить его (QueueFullException).
+
+        Возвращает вытесненные сигналы — их нужно подтвердить в журнале.
+        """
+        queue = queues[symbol]
+        dropped: List[QueuedSignal] = []
+
+        if self.max_per_symbol and queue.qsize() >= self.max_per_symbol:
+            dropped.append(self._make_room(symbol, item, {symbol: queue}, "symbol"))
+
+        if self.max_total:
+            total = sum(q.qsize() for q in queues.values())
+            if total >= self.max_total:
+                dropped.append(self._make_room(symbol, item, queues, "total"))
+        return dropped
+
+    def _make_room(
+        self, symbol: str, item: QueuedSignal, queues: Dict[str, SignalQueue], scope: str
+    ) -> QueuedSignal:
+        victim = self._victim(queues)
+        if victim is None:
+            self._reject(symbol, item, queues, scope)
+
+        victim_symbol, victim_item = victim
+        queues[victim_symbol].discard(victim_item)
+        self.dropped += 1
+        self._record(
+            victim_item, SignalStatus.DROPPED,
+            f"dropped: {scope} queue limit, {self.policy} for signal #{item.signal_id}",
+        )
+        return victim_item
+
+    def _victim(self, queues: Dict[str, SignalQueue]) -> Optional[Tuple[str, QueuedSignal]]:
+        """Самый старый ожидающий сигнал, подходящий под политику"""
+        if self.policy == "drop_oldest":
+            return self._oldest(queues, lambda data: True)
+        if self.policy == "drop_by_type":
+            for kind in self.shed_kinds:
+                victim = self._oldest(queues, lambda data: classify_signal(data) == kind)
+                if victim is not None:
+                    return victim
+        return None
+
+    @staticmethod
+    def _oldest(queues: Dict[str, SignalQueue], accept) -> Optional[Tuple[str, QueuedSignal]]:
+        best: Optional[Tuple[str, QueuedSignal]] = None
+        for symbol, queue in queues.items():
+            # С классами приоритета порядок в очереди не совпадает с временем приёма
+            for pending in queue.pending_oldest_first():
+                if isinstance(pending, QueuedSignal) and accept(pending.data):
+                    if best is None or pending.created_at < best[1].created_at:
+                        best = (symbol, pending)
+        return best
+
+    def _reject(self, symbol: str, item: QueuedSignal, queues: Dict[str, SignalQueue], scope: str) -> None:
+        pending = queues[symbol].qsize() if scope == "symbol" else sum(q.qsize() for q in queues.values())
+        lanes = 1 if scope == "symbol" else max(1, len(queues))
+        retry_after = max(1, math.ceil(pending * self.drain_interval / lanes))
+        self.rejected += 1
+        message = f"Queue full for {symbol} ({scope} limit, policy {self.policy})"
+        self._record(item, SignalStatus.REJECTED, f"rejected: {scope} queue limit, retry after {retry_after}s")
+        raise QueueFullException(message, retry_after, self.policy)
+
+    def _record(self, item: QueuedSignal, status: SignalStatus, decision: str) -> None:
+        print(f"🚧 Сигнал {item.name} #{item.signal_id}: {decision}")
+        if self.repository is None or item.signal_id is None:
+            return
+        self.repository.update_signal(
+            item.signal_id, item.name, item.data, item.created_at, status,
+            dequeued_at=time.time(),
+            response_text=decision,
+            previous_status=item.log_status,
+        )
+        item.log_status = status
+
+    def stats(self, pending: int) -> dict:
+        return {
+            "policy": self.policy,
+            "max_per_symbol": self.max_per_symbol,
+            "max_total": self.max_total,
+            "pending": pending,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,167 @@
+# src/services/circuit_breaker.py
+"""
+Автоматический выключатель (circuit breaker) на получателя.
+
+Если Finandy недоступен, каждый сигнал иначе ждал бы полный REQUEST_TIMEOUT.
+Выключатель считает ошибки (таймауты, ошибки соединения, 5xx) и медленные
+ответы в скользящем окне. Когда их доля превышает порог, выключатель
+размыкается (open): отправки к этому получателю не выполняются — сигнал
+сразу уходит в dead-letter (fail_fast) или ждёт в очереди (hold). Через
+open_s выключатель пропускает до probes пробных отправок (half_open):
+успех замыкает его (closed), ошибка снова размыкает.
+
+Выключатели общие для всех воркеров и потоков-диспетчеров, поэтому
+защищены блокировкой.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+CIRCUIT_POLICIES = ("fail_fast", "hold")
+CIRCUIT_KEYS = ("host", "url")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Выключатель одного получателя: closed → open → half_open → closed"""
+
+    def __init__(
+        self,
+        key: str,
+        window_s: float = 30.0,
+        min_requests: int = 5,
+        error_rate: float = 0.5,
+        slow_ms: float = 5000.0,
+        open_s: float = 15.0,
+        probes: int = 1,
+    ):
+        self.key = key
+        self.window = window_s
+        self.min_requests = max(1, min_requests)
+        self.error_rate = error_rate
+        self.slow = slow_ms / 1000.0 if slow_ms > 0 else None
+        self.open_s = open_s
+        self.probes = max(1, probes)
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self.rejected = 0
+        self._events: deque = deque()
+        self._failures = 0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window
+        while self._events and self._events[0][0] < horizon:
+            _, failed = self._events.popleft()
+            self._failures -= failed
+
+    def _half_open_if_due(self, now: float) -> None:
+        if self.state == OPEN and now - self.opened_at >= self.open_s:
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            print(f"🔌 Выключатель {self.key}: half-open, пробные отправки")
+
+    def allow(self) -> bool:
+        """Можно ли отправлять сейчас; в half_open — занимает слот пробы"""
+        with self._lock:
+            self._half_open_if_due(time.monotonic())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes_in_flight < self.probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        """Сколько секунд до следующей пробы (0 — можно пробовать сейчас)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_s - (time.monotonic() - self.opened_at))
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Итог отправки: ошибка получателя или медленный ответ считаются неудачей"""
+        failed = failed or (self.slow is not None and latency >= self.slow)
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed:
+                    self._open(now, "проба не прошла")
+                else:
+                    self.state = CLOSED
+                    self._events.clear()
+                    self._failures = 0
+                    print(f"🔌 Выключатель {self.key}: closed, получатель снова доступен")
+                return
+            if self.state == OPEN:
+                return  # ответ отправки, начатой до размыкания
+
+            self._events.append((now, int(failed)))
+            self._failures += int(failed)
+            self._trim(now)
+            total = len(self._events)
+            if total >= self.min_requests and self._failures / total >= self.error_rate:
+                self._open(now, f"ошибок {self._failures}/{total} за {self.window:g} с")
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.opens += 1
+        print(f"🔌 Выключатель {self.key}: open на {self.open_s:g} с ({reason})")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._half_open_if_due(now)
+            self._trim(now)
+            total = len(self._events)
+            return {
+                "key": self.key,
+                "state": self.state,
+                "requests": total,
+                "failures": self._failures,
+                "error_rate": round(self._failures / total, 3) if total else 0.0,
+                "opens": self.opens,
+                "rejected": self.rejected,
+                "retry_in_s": round(
+                    max(0.0, self.open_s - (now - self.opened_at)), 3
+                ) if self.state == OPEN else None,
+            }
+
+
+class CircuitBreakers:
+    """
+    Выключатели по получателям: ключ — полный URL (по умолчанию) или хост.
+    По хосту ошибки одного аккаунта Finandy размыкали бы выключатель всем.
+    """
+
+    def __init__(self, policy: str = "fail_fast", key: str = "url", **breaker_options):
+        if policy not in CIRCUIT_POLICIES:
+            raise ValueError(f"Unknown circuit policy '{policy}', allowed: {list(CIRCUIT_POLICIES)}")
+        if key not in CIRCUIT_KEYS:
+            raise ValueError(f"Unknown circuit key '{key}', allowed: {list(CIRCUIT_KEYS)}")
+        self.policy = policy
+        self.key = key
+        self._options = breaker_options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        key = urlsplit(url).netloc if self.key == "host" else url
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(key, **self._options))
+        return breaker
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [breaker.stats() for breaker in list(self._breakers.values())]
@@ -0,0 +1,221 @@
+# src/services/coalescing.py
+"""
+Схлопывание сигналов в очереди инструмента (включается правилами).
+
+Пока сигнал ждёт отправки, следующий сигнал того же name может сделать его
+ненужным:
+    replace — новый сигнал того же вида и направления заменяет ожидающий
+              (например, важен только последний перенос SL);
+    net     — открытие в противоположную сторону на ту же сумму гасит
+              ожидающее открытие, если между ними нет других сигналов
+              этого name; не отправляются оба.
+Каждое решение записывается в журнал: строка убранного сигнала получает
+статус COALESCED и ссылку на сигнал, из-за которого он убран.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, Optional
+from core.models import SignalStatus, QueuedSignal
+
+SIGNAL_KINDS = ("open", "close", "sl")
+
+
+def classify_signal(data: Dict[str, Any]) -> str:
+    """Вид сигнала Finandy: open (вход/DCA), sl (только перенос стопа) или close"""
+    if (data.get("open") or {}).get("enabled"):
+        return "open"
+    if (data.get("sl") or {}).get("update"):
+        return "sl"
+    return "close"
+
+
+class _ClassedBuffer:
+    """
+    Буфер с классами приоритета вместо одного deque: меньший класс выходит
+    первым, внутри класса — FIFO. Поддерживает операции, которые asyncio.Queue
+    выполняет над self._queue.
+    """
+
+    def __init__(self, classify: Callable[[Any], int]):
+        self._classify = classify
+        self._classes: Dict[int, deque] = {}
+        self._order: list = []
+        self._size = 0
+
+    def append(self, item: Any) -> None:
+        key = self._classify(item)
+        bucket = self._classes.get(key)
+        if bucket is None:
+            bucket = self._classes[key] = deque()
+            self._order = sorted(self._classes)
+        bucket.append(item)
+        self._size += 1
+
+    def popleft(self) -> Any:
+        for key in self._order:
+            bucket = self._classes[key]
+            if bucket:
+                self._size -= 1
+                return bucket.popleft()
+        raise IndexError("pop from an empty queue")
+
+    def remove(self, item: Any) -> None:
+        for bucket in self._classes.values():
+            try:
+                bucket.remove(item)
+            except ValueError:
+                continue
+            self._size -= 1
+            return
+        raise ValueError("item not in queue")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        return itertools.chain.from_iterable(self._classes[key] for key in self._order)
+
+    def __reversed__(self) -> Iterator[Any]:
+        return itertools.chain.from_iterable(reversed(self._classes[key]) for key in reversed(self._order))
+
+
+class SignalQueue(asyncio.Queue):
+    """
+    asyncio.Queue с доступом к ожидающим элементам для схлопывания.
+
+    С priority (элемент → класс) элементы выдаются по классам приоритета,
+    внутри класса — в порядке поступления.
+    """
+
+    def __init__(self, maxsize: int = 0, priority: Optional[Callable[[Any], int]] = None):
+        self._priority = priority
+        super().__init__(maxsize)
+
+    def _init(self, maxsize: int) -> None:
+        if self._priority is None:
+            super()._init(maxsize)
+        else:
+            self._queue = _ClassedBuffer(self._priority)
+
+    def pending_newest_first(self) -> Iterator[Any]:
+        return reversed(self._queue)
+
+    def pending_oldest_first(self) -> Iterator[Any]:
+        return iter(self._queue)
+
+    def discard(self, item: Any) -> bool:
+        """Убрать ожидающий элемент (учитывается как выполненная задача)"""
+        try:
+            self._queue.remove(item)
+        except ValueError:
+            return False
+        self.task_done()
+        return True
+
+
+@dataclass(frozen=True)
+class CoalesceRules:
+    replace_kinds: FrozenSet[str] = field(default_factory=frozenset)
+    net: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replace_kinds) or self.net
+
+
+def parse_rules(spec: str) -> Dict[str, CoalesceRules]:
+    """
+    Правила по инструментам: "*=replace:sl|net,BOMEUSDT=replace:sl+close"
+    → {символ или "*": CoalesceRules}
+    """
+    rules: Dict[str, CoalesceRules] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        symbol, _, value = part.partition("=")
+        replace_kinds = set()
+        net = False
+        for rule in filter(None, (r.strip() for r in value.split("|"))):
+            name, _, kinds = rule.partition(":")
+            if name == "net":
+                net = True
+            elif name == "replace" and kinds:
+                replace_kinds.update(k.strip() for k in kinds.split("+"))
+            else:
+                raise ValueError(f"Invalid coalesce rule '{rule}', expected replace:KIND[+KIND] or net")
+        unknown = replace_kinds - set(SIGNAL_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown signal kinds {sorted(unknown)}, allowed: {list(SIGNAL_KINDS)}")
+        rules[symbol.strip().upper()] = CoalesceRules(frozenset(replace_kinds), net)
+    return rules
+
+
+class Coalescer:
+    """Применяет правила к очереди инструмента при постановке нового сигнала"""
+
+    def __init__(self, rules: Dict[str, CoalesceRules], repository=None):
+        self.rules = rules
+        self.repository = repository
+        self.replaced = 0
+        self.netted = 0
+
+    def rules_for(self, symbol: str) -> Optional[CoalesceRules]:
+        """Правила инструмента (не ключа очереди "SYMBOL#N") или "*" """
+        rules = self.rules.get(symbol) or self.rules.get("*")
+        return rules if rules is not None and rules.enabled else None
+
+    def offer(self, symbol: str, queue: SignalQueue, item: QueuedSignal) -> Optional[QueuedSignal]:
+        """
+        Применить правила к новому сигналу.
+
+        Возвращает убранный из очереди сигнал (его нужно подтвердить в журнале)
+        и выставляет item.coalesced, если сам новый сигнал ставить не нужно.
+        """
+        rules = self.rules_for(symbol)
+        if rules is None:
+            return None
+
+        kind = classify_signal(item.data)
+        side = item.data.get("side")
+        # От новых к старым; после discard цикл сразу завершается
+        nearest = True
+        for pending in queue.pending_newest_first():
+            if not isinstance(pending, QueuedSignal) or pending.name != item.name:
+                continue
+            pending_kind = classify_signal(pending.data)
+            pending_side = pending.data.get("side")
+
+            if kind in rules.replace_kinds and pending_kind == kind and pending_side == side:
+                queue.discard(pending)
+                self.replaced += 1
+                self._record(pending, f"replaced by signal #{item.signal_id} ({kind})")
+                return pending
+
+            if (rules.net and nearest and kind == "open" and pending_kind == "open"
+                    and side != pending_side and _same_amount(pending.data, item.data)):
+                queue.discard(pending)
+                self.netted += 1
+                item.coalesced = True
+                self._record(pending, f"netted with signal #{item.signal_id} ({side})")
+                self._record(item, f"netted with signal #{pending.signal_id} ({pending_side})")
+                return pending
+            nearest = False
+        return None
+
+    def _record(self, item: QueuedSignal, decision: str) -> None:
+        print(f"🧹 Сигнал {item.name} #{item.signal_id}: {decision}")
+        if self.repository is None or item.signal_id is None:
+            return
+        self.repository.update_signal(
+            item.signal_id, item.name, item.data, item.created_at, SignalStatus.COALESCED,
+            dequeued_at=time.time(),
+            response_text=f"coalesced: {decision}",
+            previous_status=item.log_status,
+        )
+        item.log_status = SignalStatus.COALESCED
+
+
+def _same_amount(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    open_a, open_b = a.get("open") or {}, b.get("open") or {}
+    return (open_a.get("amountType"), open_a.get("amount")) == (open_b.get("amountType"), open_b.get("amount"))
@@ -0,0 +1,80 @@
+# src/services/deadlines.py
+"""
+Срок жизни сигнала: устаревший сигнал не отправляется.
+
+Срок берётся по первому найденному источнику: поле ttl в теле сигнала,
+переопределение для инструмента, переопределение для вида сигнала
+(open / close / sl), общий SIGNAL_TTL_S. 0 — без срока. Дедлайн
+(created_at + ttl) фиксируется при приёме и хранится в журнале очереди;
+воркер проверяет его перед каждым токеном лимита и, если срок вышел,
+не отправляет сигнал, а отбрасывает его или кладёт в dead-letter.
+"""
+from typing import Any, Dict, Optional, Tuple
+from services.coalescing import SIGNAL_KINDS, classify_signal
+
+EXPIRED_ACTIONS = ("drop", "dead_letter")
+
+
+def parse_ttl_overrides(spec: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """"BOMEUSDT=10,sl=120" → ({символ: ttl}, {вид: ttl}); виды — open, close, sl"""
+    symbols: Dict[str, float] = {}
+    kinds: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        try:
+            ttl = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid TTL override '{part}', expected SYMBOL=SECONDS or KIND=SECONDS")
+        if key in SIGNAL_KINDS:
+            kinds[key] = ttl
+        else:
+            symbols[key.upper()] = ttl
+    return symbols, kinds
+
+
+class DeadlinePolicy:
+    """Сроки жизни сигналов и счётчики просроченных по инструментам"""
+
+    def __init__(
+        self,
+        default_ttl_s: float = 0.0,
+        symbol_ttls: Optional[Dict[str, float]] = None,
+        kind_ttls: Optional[Dict[str, float]] = None,
+        action: str = "drop",
+    ):
+        if action not in EXPIRED_ACTIONS:
+            raise ValueError(f"Unknown expired action '{action}', allowed: {list(EXPIRED_ACTIONS)}")
+        self.default_ttl = default_ttl_s
+        self.symbol_ttls = symbol_ttls or {}
+        self.kind_ttls = kind_ttls or {}
+        self.action = action
+        self.expired: Dict[str, int] = {}
+
+    def ttl_for(self, name: str, data: Dict[str, Any], payload_ttl: Optional[float] = None) -> float:
+        if payload_ttl is not None:
+            return payload_ttl
+        if name in self.symbol_ttls:
+            return self.symbol_ttls[name]
+        if self.kind_ttls:
+            kind = classify_signal(data)
+            if kind in self.kind_ttls:
+                return self.kind_ttls[kind]
+        return self.default_ttl
+
+    def deadline_for(self, name: str, data: Dict[str, Any], created_at: float,
+                     payload_ttl: Optional[float] = None) -> Optional[float]:
+        """Unix-время, после которого сигнал не отправляется; None — без срока"""
+        ttl = self.ttl_for(name, data, payload_ttl)
+        return created_at + ttl if ttl > 0 else None
+
+    def record_expired(self, name: str) -> None:
+        self.expired[name] = self.expired.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "default_ttl_s": self.default_ttl,
+            "action": self.action,
+            "expired_total": sum(self.expired.values()),
+            "expired_by_symbol": dict(self.expired),
+        }
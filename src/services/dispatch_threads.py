@@ -0,0 +1,251 @@
+# src/services/dispatch_threads.py
+"""
+Режим потоков-диспетчеров: инструменты делятся между K потоками, у каждого
+свой цикл событий, свой QueueManager с воркерами и своя сессия aiohttp.
+
+Инструмент закреплён за потоком консистентным хешированием, поэтому порядок
+и лимит отправки инструмента по-прежнему обслуживает один воркер. Цикл приёма
+(HTTP) передаёт сигнал в поток через run_coroutine_threadsafe (потокобезопасная
+очередь вызовов цикла) и ждёт результат постановки. Зависание одного цикла
+задерживает только его инструменты; задержку каждого цикла показывает
+LoopLagMonitor.
+
+Журнал очереди (если включён) остаётся в цикле приёма: сигнал записывается
+до передачи в поток, подтверждения из потоков приходят через call_soon_threadsafe.
+"""
+import asyncio
+import bisect
+import hashlib
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from core.exceptions import QueueFullException, QueueNotFoundException
+from core.models import QueuedSignal
+from services.journal import SignalJournal
+from services.queue_service import QueueManager
+
+
+class HashRing:
+    """Консистентное хеширование: при изменении числа узлов переезжает ~1/K ключей"""
+
+    def __init__(self, nodes: int, replicas: int = 64):
+        points = []
+        for node in range(nodes):
+            for replica in range(replicas):
+                points.append((self._hash(f"{node}:{replica}"), node))
+        points.sort()
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def node_for(self, key: str) -> int:
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+
+class LoopLagMonitor:
+    """Задержка цикла событий: насколько позже срока просыпается sleep(interval)"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag_ms = max(0.0, (time.monotonic() - started - self.interval) * 1000)
+            self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+class _JournalAcks:
+    """Подтверждения в журнал, который живёт в цикле приёма"""
+
+    def __init__(self, journal: SignalJournal, loop: asyncio.AbstractEventLoop):
+        self._journal = journal
+        self._loop = loop
+
+    def ack(self, item: QueuedSignal) -> None:
+        self._loop.call_soon_threadsafe(self._journal.ack, item)
+
+
+class DispatchThread:
+    """Поток со своим циклом событий и своим QueueManager"""
+
+    def __init__(self, index: int, lag_interval: float = 0.5):
+        self.index = index
+        self.name = f"dispatch-{index}"
+        self.loop = asyncio.new_event_loop()
+        self.queue_manager: Optional[QueueManager] = None
+        self.starters: List[Callable[[], Awaitable[Any]]] = []
+        self.closers: List[Callable[[], Awaitable[Any]]] = []
+        self.lag = LoopLagMonitor(lag_interval)
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def start(self) -> None:
+        self._thread.start()
+        self.loop.call_soon_threadsafe(self.lag.start)
+        for start in self.starters:
+            asyncio.run_coroutine_threadsafe(start(), self.loop)
+
+    async def call(self, coro: Awaitable[Any]) -> Any:
+        """Выполнить корутину в цикле потока и дождаться результата из текущего цикла"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def stop(self) -> None:
+        async def shutdown() -> None:
+            self.lag.stop()
+            for close in self.closers:
+                await close()
+
+        await self.call(shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        await asyncio.to_thread(self._thread.join, 10)
+
+
+class ThreadedQueueManager:
+    """
+    Тот же интерфейс, что у QueueManager, но очереди и воркеры распределены
+    по потокам-диспетчерам.
+
+    shard_factory(index, journal_acks) создаёт QueueManager потока и
+    возвращает его вместе со списками корутин запуска (прогрев соединений) и
+    закрытия (сессия aiohttp и т.п.), которые выполняются в цикле этого потока.
+    """
+
+    def __init__(
+        self,
+        threads: int,
+        shard_factory: Callable[[int, Any], Tuple[
+            QueueManager, List[Callable[[], Awaitable[Any]]], List[Callable[[], Awaitable[Any]]]
+        ]],
+        journal: Optional[SignalJournal] = None,
+        lag_interval: float = 0.5,
+    ):
+        self.journal = journal
+        self._shard_factory = shard_factory
+        self._ring = HashRing(threads)
+        self._threads = [DispatchThread(index, lag_interval) for index in range(threads)]
+        self.lag = LoopLagMonitor(lag_interval)
+
+    @property
+    def idle_timeout(self) -> float:
+        return self._threads[0].queue_manager.idle_timeout
+
+    @property
+    def overflow_policy(self) -> Optional[str]:
+        return self._threads[0].queue_manager.overflow_policy
+
+    accepts = QueueManager.accepts
+
+    def thread_for(self, symbol: str) -> DispatchThread:
+        return self._threads[self._ring.node_for(symbol)]
+
+    async def start(self) -> int:
+        """Запустить потоки и вернуть в очереди сигналы из журнала"""
+        loop = asyncio.get_running_loop()
+        acks = _JournalAcks(self.journal, loop) if self.journal is not None else None
+        for thread in self._threads:
+            thread.queue_manager, thread.starters, thread.closers = self._shard_factory(thread.index, acks)
+            thread.start()
+        self.lag.start()
+        print(f"🧵 Потоков-диспетчеров: {len(self._threads)}")
+
+        if self.journal is None:
+            return 0
+        restored = self.journal.recover()
+        for symbol, item in restored:
+            if not self.accepts(symbol):
+                print(f"⚠️ Журнал: очередь {symbol} больше не существует, сигнал {item.name} пропущен")
+                self.journal.ack(item)
+                continue
+            thread = self.thread_for(symbol)
+            thread.loop.call_soon_threadsafe(thread.queue_manager.restore, symbol, item)
+        self.journal.start()
+        if restored:
+            print(f"♻️ Из журнала восстановлено {len(restored)} неотправленных сигналов")
+        return len(restored)
+
+    async def put(self, symbol: str, item: Any) -> bool:
+        """Записать в журнал и передать сигнал в поток инструмента"""
+        if not self.accepts(symbol):
+            raise QueueNotFoundException(f"Queue not found for symbol: {symbol}")
+        journaled = self.journal is not None and isinstance(item, QueuedSignal)
+        if journaled:
+            await self.journal.append(symbol, item)
+
+        thread = self.thread_for(symbol)
+        try:
+            queued = await thread.call(thread.queue_manager.put(symbol, item))
+        except (QueueFullException, QueueNotFoundException):
+            if journaled:
+                self.journal.ack(item)
+            raise
+        if not queued and journaled:
+            self.journal.ack(item)
+        return queued
+
+    def ack(self, item: Any) -> None:
+        if self.journal is not None and isinstance(item, QueuedSignal):
+            self.journal.ack(item)
+
+    async def stop_workers(self, timeout: float = 5.0) -> None:
+        await asyncio.gather(*(
+            thread.call(thread.queue_manager.stop_workers(timeout)) for thread in self._threads
+        ))
+
+    async def close(self) -> None:
+        """Закрыть ресурсы потоков в их циклах, остановить потоки и дописать журнал"""
+        self.lag.stop()
+        await asyncio.gather(*(thread.stop() for thread in self._threads))
+        if self.journal is not None:
+            await self.journal.close()
+
+    def get_active_queues_count(self) -> int:
+        return sum(thread.queue_manager.get_active_queues_count() for thread in self._threads)
+
+    def get_pending_count(self) -> int:
+        return sum(thread.queue_manager.get_pending_count() for thread in self._threads)
+
+    def backpressure_stats(self) -> Optional[Dict[str, Any]]:
+        shards = [thread.queue_manager.backpressure_stats() for thread in self._threads]
+        if shards[0] is None:
+            return None
+        total = dict(shards[0])
+        for stats in shards[1:]:
+            for key in ("max_total", "pending", "rejected", "dropped"):
+                total[key] += stats[key]
+        return total
+
+    def loop_stats(self) -> List[Dict[str, Any]]:
+        stats = [{
+            "name": "ingress",
+            "lag_ms": round(self.lag.lag_ms, 3),
+            "max_lag_ms": round(self.lag.max_lag_ms, 3),
+        }]
+        for thread in self._threads:
+            stats.append({
+                "name": thread.name,
+                "lag_ms": round(thread.lag.lag_ms, 3),
+                "max_lag_ms": round(thread.lag.max_lag_ms, 3),
+                "queues_active": thread.queue_manager.get_active_queues_count(),
+                "pending": thread.queue_manager.get_pending_count(),
+            })
+        return stats
@@ -0,0 +1,185 @@
+# src/services/handoff.py
+"""
+Передача принятых сигналов от ingress-процессов диспетчеру через Unix-сокет.
+
+Кадр — 4 байта длины (big-endian) и JSON. Каждый запрос несёт id, ответ
+возвращается с тем же id; по одному соединению идёт много запросов
+одновременно, ответы могут приходить не по порядку.
+"""
+import asyncio
+import itertools
+import json
+import os
+import struct
+from typing import Any, Awaitable, Callable, Dict, Optional
+from core.exceptions import DispatcherUnavailableException
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """Следующее сообщение или None, если соединение закрыто"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Handoff frame too large: {size} bytes")
+    return json.loads(await reader.readexactly(size))
+
+
+class HandoffServer:
+    """Сторона диспетчера: принимает запросы и отвечает результатом handler"""
+
+    def __init__(self, path: str, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        self.path = path
+        self.handler = handler
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers = set()
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Сокет от прошлого запуска мешает bind
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o600)
+        print(f"🔌 Диспетчер принимает сигналы ingress-процессов: {self.path}")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message is None:
+                    break
+                self.requests += 1
+                task = asyncio.create_task(self._reply(message, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            print(f"⚠️ Handoff: соединение ingress закрыто с ошибкой: {e}")
+        finally:
+            self.connections -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _reply(self, message: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        try:
+            reply = await self.handler(message)
+        except Exception as e:
+            print(f"❌ Handoff: ошибка обработки запроса: {e}")
+            reply = {"error": {"status_code": 500, "detail": f"Dispatcher error: {e}"}}
+        reply["id"] = message.get("id")
+        try:
+            async with write_lock:
+                writer.write(encode_frame(reply))
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        # wait_closed ждёт и открытые соединения — закрываем их сами
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class HandoffClient:
+    """Сторона ingress-процесса: одно соединение, переподключение при обрыве"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self.connected:
+                return self._writer
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                raise DispatcherUnavailableException(f"Dispatcher is not reachable at {self.path}: {e}")
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_replies(reader, writer))
+            return writer
+
+    async def _read_replies(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        error = "connection closed"
+        try:
+            while True:
+                reply = await read_frame(reader)
+                if reply is None:
+                    break
+                future = self._pending.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError) as e:
+            error = str(e)
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(DispatcherUnavailableException(f"Dispatcher connection lost: {error}"))
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Отправить запрос и дождаться ответа.
+
+        По таймауту исход неизвестен: диспетчер мог уже поставить сигнал в очередь.
+        """
+        writer = await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message["id"] = request_id
+        try:
+            async with self._write_lock:
+                writer.write(encode_frame(message))
+                await writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise DispatcherUnavailableException(f"Dispatcher did not answer in {self.timeout:g}s")
+        except ConnectionError as e:
+            raise DispatcherUnavailableException(f"Dispatcher connection lost: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
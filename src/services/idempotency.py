@@ -0,0 +1,105 @@
+# src/services/idempotency.py
+"""
+Защита от повторной постановки одного и того же сигнала.
+
+Ключ — заголовок Idempotency-Key или хеш сырого тела запроса с номером
+временной корзины. Ответ на первый запрос хранится в памяти ttl секунд
+(LRU, не больше max_entries записей); повтор получает тот же ответ, не
+доходя до очереди и БД. Одновременные одинаковые запросы ждут результата
+первого, а не проходят оба.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+
+def body_digest(body: bytes) -> str:
+    """Хеш тела запроса для ключа дедупликации"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class IdempotencyCache:
+    """TTL-кэш ответов с LRU-вытеснением и счётчиками попаданий"""
+
+    def __init__(self, ttl_s: float = 60.0, max_entries: int = 10_000):
+        self.ttl = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, asyncio.Future]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys_for(self, header_key: Optional[str], body: bytes, scope: str = "",
+                 now: Optional[float] = None, digest: Optional[str] = None) -> List[str]:
+        """
+        Ключи для проверки: по заголовку — один; по телу — текущая и предыдущая
+        корзины, чтобы повтор на границе корзин тоже был найден. digest —
+        уже посчитанный body_digest(body), если самого тела нет.
+        """
+        if header_key:
+            return [f"key:{scope}:{header_key}"]
+        digest = digest or body_digest(body)
+        bucket = int((now if now is not None else time.time()) // self.ttl) if self.ttl > 0 else 0
+        return [f"body:{scope}:{digest}:{bucket}", f"body:{scope}:{digest}:{bucket - 1}"]
+
+    def _lookup(self, keys: List[str], now: float) -> Optional[asyncio.Future]:
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            expires_at, future = entry
+            if expires_at <= now:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            return future
+        return None
+
+    async def run(self, keys: List[str], handler: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Выполнить handler один раз на ключ. Возвращает (ответ, повтор ли это).
+
+        Ошибки handler не кэшируются: запись удаляется, исключение пробрасывается
+        и первому запросу, и тем, кто ждал его результата.
+        """
+        now = time.monotonic()
+        future = self._lookup(keys, now)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future), True
+
+        self.misses += 1
+        key = keys[0]
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (now + self.ttl, future)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        try:
+            result = await handler()
+        except BaseException as e:
+            if self._entries.get(key, (None, None))[1] is future:
+                del self._entries[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Исключение уже получит вызывающий; ждущие получат его из future
+                future.exception()
+            raise
+        future.set_result(result)
+        return result, False
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,218 @@
+# src/services/journal.py
+"""
+Журнал очереди сигналов на диске (append-only, fsync пачками).
+
+Каждый принятый сигнал дописывается строкой {"op": "put", ...}, после
+получения ответа Finandy — строкой {"op": "ack", "id": N}. При старте
+всё, что было положено и не подтверждено, возвращается в очереди.
+Гарантия — «хотя бы один раз»: сигнал, отправленный прямо перед падением,
+но не успевший получить ack, будет отправлен повторно.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from core.models import QueuedSignal, RawPayload, SignalStatus
+
+
+class SignalJournal:
+    """Журнал очереди с групповым fsync"""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval_ms: float = 2.0,
+        wait_for_sync: bool = True,
+        compact_after: int = 10000,
+    ):
+        self.path = path
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.wait_for_sync = wait_for_sync
+        self.compact_after = compact_after
+        self._file = None
+        self._next_id = 1
+        self._pending: Dict[int, bytes] = {}
+        self._buffer: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._acks_since_compact = 0
+        self.syncs = 0
+        self.last_sync_ms = 0.0
+
+    @property
+    def pending_count(self) -> int:
+        """Сигналы в журнале без подтверждения"""
+        return len(self._pending)
+
+    # === Восстановление ===
+
+    def recover(self) -> List[Tuple[str, QueuedSignal]]:
+        """
+        Прочитать журнал, вернуть неподтверждённые сигналы (queue, item)
+        в порядке поступления и переписать файл только с ними.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        entries: Dict[int, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line_no, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Оборванная последняя строка после падения
+                        print(f"⚠️ Журнал очереди: пропущена повреждённая строка {line_no}")
+                        continue
+                    if record.get("op") == "put":
+                        entries[record["id"]] = record
+                    elif record.get("op") == "ack":
+                        entries.pop(record["id"], None)
+                    self._next_id = max(self._next_id, record.get("id", 0) + 1)
+
+        self._pending = {
+            entry_id: self._encode(record) for entry_id, record in sorted(entries.items())
+        }
+        self._rewrite(list(self._pending.values()))
+
+        restored = []
+        for entry_id, record in sorted(entries.items()):
+            item = QueuedSignal(
+                name=record["name"],
+                data=RawPayload.from_body(record["body"].encode("utf-8")) if "body" in record else record["data"],
+                created_at=record["created_at"],
+                log_symbol=record.get("log_symbol", "universal"),
+                journal_id=entry_id,
+                signal_id=record.get("signal_id"),
+                deadline=record.get("deadline"),
+                log_status=SignalStatus(record.get("log_status", SignalStatus.RECEIVED)),
+            )
+            restored.append((record["queue"], item))
+        return restored
+
+    # === Запись ===
+
+    def start(self) -> None:
+        """Запустить фоновый fsync (после recover)"""
+        if self._file is None:
+            self._file = open(self.path, "ab", buffering=0)
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def append(self, queue: str, item: QueuedSignal) -> None:
+        """Записать сигнал; при wait_for_sync ждёт ближайшего fsync"""
+        entry_id = self._next_id
+        self._next_id += 1
+        item.journal_id = entry_id
+
+        record = {
+            "op": "put",
+            "id": entry_id,
+            "queue": queue,
+            "name": item.name,
+            "log_symbol": item.log_symbol,
+            "created_at": item.created_at,
+            "signal_id": item.signal_id,
+            "deadline": item.deadline,
+            "log_status": int(item.log_status),
+        }
+        # Тело passthrough хранится строкой как пришло, словарь не сериализуется
+        if isinstance(item.data, RawPayload):
+            record["body"] = item.data.raw.decode("utf-8")
+        else:
+            record["data"] = item.data
+        line = self._encode(record)
+        self._pending[entry_id] = line
+        self._buffer.append(line)
+        self._wakeup.set()
+
+        if self.wait_for_sync:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    def ack(self, item: QueuedSignal) -> None:
+        """Подтвердить обработку сигнала (без ожидания fsync)"""
+        if item.journal_id is None or self._pending.pop(item.journal_id, None) is None:
+            return
+        self._buffer.append(self._encode({"op": "ack", "id": item.journal_id}))
+        self._acks_since_compact += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self) -> None:
+        """Дописать буфер и закрыть файл"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._buffer or self._waiters:
+            await self._sync_once()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.flush_interval:
+                # Копим записи, пришедшие за интервал, в один fsync
+                await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self._sync_once()
+            except OSError as e:
+                print(f"❌ Журнал очереди: ошибка записи: {e}")
+
+    async def _sync_once(self) -> None:
+        lines, self._buffer = self._buffer, []
+        waiters, self._waiters = self._waiters, []
+        if lines:
+            started = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_sync, b"".join(lines))
+            except OSError as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                raise
+            self.syncs += 1
+            self.last_sync_ms = (time.perf_counter() - started) * 1000
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+        if self._acks_since_compact >= self.compact_after:
+            snapshot = list(self._pending.values())
+            await asyncio.get_running_loop().run_in_executor(None, self._rewrite, snapshot)
+
+    def _write_sync(self, data: bytes) -> None:
+        self._file.write(data)
+        os.fsync(self._file.fileno())
+
+    def _rewrite(self, lines: List[bytes]) -> None:
+        """Переписать журнал, оставив только неподтверждённые записи"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for line in lines:
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        reopen = self._file is not None
+        if reopen:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        if reopen:
+            self._file = open(self.path, "ab", buffering=0)
+        self._acks_since_compact = 0
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
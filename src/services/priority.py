@@ -0,0 +1,57 @@
+# src/services/priority.py
+"""
+Классы приоритета внутри очереди инструмента.
+
+Правила: "*=sl+close>open,XVGUSDT=sl>close>open" — для каждого инструмента
+(или "*" для всех) виды сигналов через ">" от срочных к обычным, виды одного
+класса через "+". Сигнал более срочного класса обгоняет ожидающие сигналы
+остальных классов; внутри класса порядок поступления сохраняется. Виды, не
+упомянутые в правиле, попадают в последний класс. Вид определяет classify
+(по умолчанию classify_signal по полям TradingSignal).
+
+Без правил (QUEUE_PRIORITIES пусто, по умолчанию) очереди остаются строго
+FIFO: перестановка меняет порядок входов и закрытий, поэтому включается явно.
+"""
+from typing import Any, Callable, Dict, Optional
+from core.models import QueuedSignal
+from services.coalescing import SIGNAL_KINDS, classify_signal
+
+
+def parse_priorities(spec: str) -> Dict[str, Dict[str, int]]:
+    """"*=sl+close>open" → {символ или "*": {вид: класс}}"""
+    rules: Dict[str, Dict[str, int]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        symbol, _, value = part.partition("=")
+        classes: Dict[str, int] = {}
+        for rank, group in enumerate(filter(None, (g.strip() for g in value.split(">")))):
+            for kind in filter(None, (k.strip() for k in group.split("+"))):
+                if kind not in SIGNAL_KINDS:
+                    raise ValueError(f"Unknown signal kind '{kind}' in priority '{part}', allowed: {list(SIGNAL_KINDS)}")
+                classes[kind] = rank
+        if not classes:
+            raise ValueError(f"Invalid priority rule '{part}', expected SYMBOL=KIND[+KIND]>KIND...")
+        rules[symbol.strip().upper()] = classes
+    return rules
+
+
+class SignalPriority:
+    """Выдаёт очередям инструментов функцию «сигнал → класс приоритета»"""
+
+    def __init__(self, rules: Dict[str, Dict[str, int]], classify: Callable[[Dict[str, Any]], str] = classify_signal):
+        self.rules = rules
+        self.classify = classify
+
+    def for_symbol(self, symbol: str) -> Optional[Callable[[Any], int]]:
+        """Функция для очереди инструмента (не ключа "SYMBOL#N"); None — очередь остаётся FIFO"""
+        classes = self.rules.get(symbol) or self.rules.get("*")
+        if not classes:
+            return None
+        lowest = max(classes.values()) + 1
+        classify = self.classify
+
+        def priority(item: Any) -> int:
+            if not isinstance(item, QueuedSignal):
+                return lowest
+            return classes.get(classify(item.data), lowest)
+
+        return priority
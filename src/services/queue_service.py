@@ -1,41 +1,224 @@
 import asyncio
-from typing import Dict, Any
-from config.webhooks import get_supported_instruments  # ✅ Правильный импорт
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from config import webhooks
 from core.exceptions import QueueNotFoundException
+from core.models import QueuedSignal
+from services.backpressure import LoadShedder
+from services.coalescing import Coalescer, SignalQueue
+from services.journal import SignalJournal
+from services.priority import SignalPriority
+
+
+def lane_key(symbol: str, destination: int = 0) -> str:
+    """Ключ очереди: символ для первого получателя, "SYMBOL#N" для остальных"""
+    return symbol if destination == 0 else f"{symbol}#{destination}"
+
+
+def split_lane_key(key: str) -> Tuple[str, int]:
+    """Обратное к lane_key: (символ, номер получателя)"""
+    symbol, _, destination = key.partition("#")
+    if not destination.isdigit():
+        return key, 0
+    return symbol, int(destination)
+
+
+@dataclass
+class _Lane:
+    """Очередь инструмента и обслуживающий её воркер"""
+    queue: SignalQueue = field(default_factory=SignalQueue)
+    task: Optional[asyncio.Task] = None
 
 
 class QueueManager:
-    """Менеджер очередей для обработки сигналов"""
+    """
+    Менеджер очередей для обработки сигналов.
+
+    Очередь — на пару (инструмент, получатель): у символа с несколькими
+    вебхуками каждый получатель обслуживается своим воркером, и медленный
+    аккаунт не задерживает остальные.
 
-    def __init__(self):
-        self.queues: Dict[str, asyncio.Queue] = {}
-        self._init_queues()
+    Очередь и воркер инструмента создаются при первом сигнале для него и
+    удаляются, когда очередь простояла пустой idle_timeout секунд. В каждый
+    момент у инструмента не больше одного воркера, поэтому порядок отправки
+    и его ограничение частоты сохраняются; время старта и память в простое
+    не зависят от количества инструментов.
 
-    def _init_queues(self) -> None:
-        """Инициализация очередей для всех инструментов"""
-        for symbol in get_supported_instruments():  # ✅ Теперь функция доступна
-            self.queues[symbol] = asyncio.Queue()
-        print(f"✅ Инициализировано {len(self.queues)} очередей")
+    С priority сигналы внутри очереди инструмента выдаются по классам
+    приоритета (защитные ордера вперёд), внутри класса — по порядку.
 
-    async def put(self, symbol: str, item: Any) -> None:
-        """Добавить элемент в очередь"""
-        if symbol not in self.queues:
+    Ёмкость очередей ограничивает shedder (если задан); сигналы из журнала
+    при старте возвращаются без проверки ёмкости.
+    """
+
+    def __init__(
+        self,
+        journal: Optional[SignalJournal] = None,
+        worker_factory: Optional[Callable[[str], Any]] = None,
+        idle_timeout: float = 300.0,
+        coalescer: Optional[Coalescer] = None,
+        shedder: Optional[LoadShedder] = None,
+        priority: Optional[SignalPriority] = None,
+        journal_acks: Any = None,
+    ):
+        self.journal = journal
+        # Куда подтверждать сигналы, если журнал ведёт другой цикл (режим потоков-диспетчеров)
+        self.journal_acks = journal if journal is not None else journal_acks
+        self.worker_factory = worker_factory
+        self.idle_timeout = idle_timeout
+        self.coalescer = coalescer
+        self.shedder = shedder if shedder is not None and shedder.enabled else None
+        self.priority = priority
+        self._lanes: Dict[str, _Lane] = {}
+        self.lanes_created = 0
+        self.lanes_reaped = 0
+
+    def accepts(self, symbol: Optional[str]) -> bool:
+        """Есть ли для инструмента (ключа очереди) вебхук, а значит, и очередь по требованию"""
+        if not symbol:
+            return False
+        name, destination = split_lane_key(symbol)
+        return name in webhooks.FINANDY_WEBHOOKS and destination < len(webhooks.get_destinations(name))
+
+    def _lane(self, symbol: str) -> _Lane:
+        """Очередь инструмента; создаётся вместе с воркером при первом обращении"""
+        lane = self._lanes.get(symbol)
+        if lane is not None:
+            return lane
+        if not self.accepts(symbol):
             raise QueueNotFoundException(f"Queue not found for symbol: {symbol}")
 
-        await self.queues[symbol].put(item)
+        # Правила — по инструменту: у очередей "SYMBOL#N" те же приоритеты и схлопывание, что у SYMBOL
+        name = split_lane_key(symbol)[0]
+        queue = SignalQueue(priority=self.priority.for_symbol(name) if self.priority else None)
+        lane = self._lanes[symbol] = _Lane(queue)
+        self.lanes_created += 1
+        if self.worker_factory is not None:
+            worker = self.worker_factory(symbol)
+            lane.task = asyncio.create_task(worker.run(), name=f"worker-{symbol}")
+            print(f"✅ Воркер запущен для {symbol}")
+        return lane
+
+    async def start(self) -> int:
+        """Восстановить неподтверждённые сигналы из журнала. Возвращает их количество"""
+        if self.journal is None:
+            return 0
+
+        restored = self.journal.recover()
+        for symbol, item in restored:
+            if not self.accepts(symbol):
+                print(f"⚠️ Журнал: очередь {symbol} больше не существует, сигнал {item.name} пропущен")
+                self.journal.ack(item)
+                continue
+            self.restore(symbol, item)
+        self.journal.start()
+
+        if restored:
+            print(f"♻️ Из журнала восстановлено {len(restored)} неотправленных сигналов")
+        return len(restored)
+
+    def restore(self, symbol: str, item: Any) -> None:
+        """Вернуть в очередь сигнал из журнала (без схлопывания и проверки ёмкости)"""
+        self._lane(symbol).queue.put_nowait(item)
+
+    async def stop_workers(self, timeout: float = 5.0) -> None:
+        """Остановить все воркеры"""
+        tasks = [lane.task for lane in self._lanes.values() if lane.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            try:
+                await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=timeout)
+            except asyncio.TimeoutError:
+                print("⚠️ Таймаут при остановке воркеров")
+
+    async def close(self) -> None:
+        """Дописать журнал на диск"""
+        if self.journal is not None:
+            await self.journal.close()
+
+    @property
+    def overflow_policy(self) -> Optional[str]:
+        return self.shedder.policy if self.shedder is not None else None
+
+    async def put(self, symbol: str, item: Any) -> bool:
+        """
+        Добавить элемент в очередь. False — сигнал погашен схлопыванием и не поставлен.
+
+        QueueFullException — очередь переполнена и политика не позволила освободить место.
+        """
+        lane = self._lane(symbol)
+
+        if self.coalescer is not None and isinstance(item, QueuedSignal):
+            removed = self.coalescer.offer(split_lane_key(symbol)[0], lane.queue, item)
+            if removed is not None:
+                self.ack(removed)
+            if item.coalesced:
+                return False
+
+        if self.shedder is not None and isinstance(item, QueuedSignal):
+            queues = {name: other.queue for name, other in self._lanes.items()}
+            for dropped in self.shedder.admit(symbol, item, queues):
+                self.ack(dropped)
+
+        if self.journal is not None and isinstance(item, QueuedSignal):
+            await self.journal.append(symbol, item)
+            # Пока ждали fsync журнала, простаивавшая очередь могла быть удалена
+            # вместе с воркером — кладём в текущую (при необходимости новую)
+            lane = self._lane(symbol)
+        await lane.queue.put(item)
+        return True
 
     async def get(self, symbol: str) -> Any:
-        """Получить элемент из очереди"""
-        if symbol not in self.queues:
+        """
+        Получить элемент из очереди.
+
+        Возвращает None, если очередь простояла пустой idle_timeout: очередь
+        к этому моменту уже удалена, и воркер должен завершиться.
+        """
+        lane = self._lanes.get(symbol)
+        if lane is None:
             raise QueueNotFoundException(f"Queue not found for symbol: {symbol}")
 
-        return await self.queues[symbol].get()
+        while True:
+            try:
+                return await asyncio.wait_for(lane.queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Между проверкой и удалением нет await; put после своего await
+                # заново берёт очередь через _lane — сигнал не попадёт в удалённую
+                if lane.queue.empty():
+                    self._reap(symbol, lane)
+                    return None
+
+    def _reap(self, symbol: str, lane: _Lane) -> None:
+        if self._lanes.get(symbol) is lane:
+            del self._lanes[symbol]
+            self.lanes_reaped += 1
+            print(f"💤 Очередь {symbol} простаивала {self.idle_timeout:g} с — воркер остановлен")
 
     def task_done(self, symbol: str) -> None:
         """Пометить задачу как выполненную"""
-        if symbol in self.queues:
-            self.queues[symbol].task_done()
+        lane = self._lanes.get(symbol)
+        if lane is not None:
+            lane.queue.task_done()
+
+    def ack(self, item: Any) -> None:
+        """Подтвердить в журнале, что по сигналу получен результат отправки"""
+        if self.journal_acks is not None and isinstance(item, QueuedSignal):
+            self.journal_acks.ack(item)
 
     def get_active_queues_count(self) -> int:
         """Получить количество активных очередей"""
-        return len(self.queues)
\ No newline at end of file
+        return len(self._lanes)
+
+    def get_pending_count(self) -> int:
+        """Количество сигналов, ожидающих в очередях"""
+        return sum(lane.queue.qsize() for lane in list(self._lanes.values()))
+
+    def backpressure_stats(self) -> Optional[Dict[str, Any]]:
+        """Ёмкость очередей и счётчики сброса нагрузки (None — очереди не ограничены)"""
+        return self.shedder.stats(self.get_pending_count()) if self.shedder is not None else None
+
+    def loop_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """Задержка циклов событий — есть только в режиме потоков-диспетчеров"""
+        return None
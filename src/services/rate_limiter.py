@@ -0,0 +1,129 @@
+# src/services/rate_limiter.py
+"""
+Ограничение частоты отправки в Finandy: token bucket на получателя.
+
+Ведро пополняется со скоростью rate токенов в секунду до burst, отправка
+забирает один токен. Пачка сигналов на закрытии бара уходит сразу, пока
+есть токены, дальше — с постоянной скоростью. Ожидающие обслуживаются по
+очереди (asyncio.Lock справедлив), время — монотонное.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Ведро токенов с FIFO-очередью ожидающих"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Забрать токен; возвращает время ожидания в секундах"""
+        started = self._clock()
+        waited = self._lock.locked()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1.0:
+                waited = True
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1.0
+        return self._clock() - started if waited else 0.0
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+def parse_overrides(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Переопределения для инструментов: "BOMEUSDT=5:10,XVGUSDT=1"
+    → {символ: (токенов в секунду, burst)}; burst по умолчанию 1
+    """
+    overrides: Dict[str, Tuple[float, float]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        symbol, _, value = part.partition("=")
+        rate, _, burst = value.partition(":")
+        try:
+            overrides[symbol.strip().upper()] = (float(rate), float(burst or 1))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit override '{part}', expected SYMBOL=RATE[:BURST]")
+    return overrides
+
+
+class RateLimiter:
+    """
+    Набор вёдер: по одному на получателя (URL вебхука или хост), отдельные
+    вёдра для инструментов с переопределением и общее ведро на весь исходящий
+    трафик (если задано). Скорость 0 отключает соответствующее ограничение.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        key_by: str = "url",
+        overrides: Optional[Dict[str, Tuple[float, float]]] = None,
+        global_rate: float = 0.0,
+        global_burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if key_by not in ("url", "host"):
+            raise ValueError(f"Unknown rate limit key '{key_by}', allowed: ['url', 'host']")
+        self.rate = rate
+        self.burst = burst
+        self.key_by = key_by
+        self.overrides = overrides or {}
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._global = TokenBucket(global_rate, global_burst, clock) if global_rate > 0 else None
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def key_for(self, symbol: str, url: str) -> str:
+        if symbol in self.overrides:
+            # У каждого получателя символа своё ведро с переопределённой скоростью
+            return f"symbol:{symbol}:{url}"
+        if self.key_by == "host":
+            return f"host:{urlsplit(url).netloc}"
+        return f"url:{url}"
+
+    def bucket(self, symbol: str, url: str) -> Optional[TokenBucket]:
+        key = self.key_for(symbol, url)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self.overrides.get(symbol, (self.rate, self.burst))
+            if rate <= 0:
+                return None
+            bucket = self._buckets[key] = TokenBucket(rate, burst, self._clock)
+        return bucket
+
+    async def acquire(self, symbol: str, url: str) -> float:
+        """Дождаться разрешения на отправку; возвращает суммарное ожидание в секундах"""
+        bucket = self.bucket(symbol, url)
+        waited = await bucket.acquire() if bucket is not None else 0.0
+        if self._global is not None:
+            waited += await self._global.acquire()
+        if waited > 0:
+            self.waits += 1
+            self.wait_seconds += waited
+        return waited
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,89 @@
+# src/services/retry.py
+"""Политика повторной отправки сигналов в Finandy"""
+import random
+import time
+from typing import Iterable, Optional
+from core.models import ErrorClass
+
+
+class RetryPolicy:
+    """
+    Какие ошибки повторять и сколько ждать между попытками.
+
+    Задержка — экспоненциальная с полным джиттером: случайная в
+    [0, min(max_delay, base_delay * 2^(attempt-1))]. Повтор запрещается, если
+    исчерпаны попытки, сигнал старше max_age или следующая пауза задержала
+    бы очередь инструмента дольше max_block (отсчёт от первой попытки).
+    """
+
+    RETRYABLE_ERRORS = frozenset({ErrorClass.TIMEOUT, ErrorClass.CONNECTION})
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_ms: float = 200.0,
+        max_delay_ms: float = 5000.0,
+        max_age_s: float = 60.0,
+        max_block_s: float = 15.0,
+        retry_statuses: Optional[Iterable[int]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = max(0.0, base_delay_ms) / 1000.0
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        self.max_age = max_age_s
+        self.max_block = max_block_s
+        self.retry_statuses = (
+            frozenset(retry_statuses) if retry_statuses is not None
+            else frozenset([429]) | frozenset(range(500, 600))
+        )
+        self._rng = rng or random.Random()
+
+    @classmethod
+    def from_settings(cls, settings) -> "RetryPolicy":
+        return cls(
+            max_attempts=settings.retry_max_attempts,
+            base_delay_ms=settings.retry_base_delay_ms,
+            max_delay_ms=settings.retry_max_delay_ms,
+            max_age_s=settings.retry_max_age_s,
+            max_block_s=settings.retry_max_block_s,
+            retry_statuses=parse_statuses(settings.retry_statuses) if settings.retry_statuses else None,
+        )
+
+    def is_retryable(self, error_class: ErrorClass, status_code: Optional[int] = None) -> bool:
+        if error_class == ErrorClass.HTTP:
+            return status_code in self.retry_statuses
+        return error_class in self.RETRYABLE_ERRORS
+
+    def backoff(self, attempt: int) -> float:
+        """Пауза перед попыткой attempt + 1, секунды"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+    def next_delay(self, attempt: int, created_at: float, first_attempt_at: float) -> Optional[float]:
+        """
+        Пауза перед следующей попыткой или None, если повторять нельзя.
+
+        created_at — unix-время приёма сигнала, first_attempt_at — time.monotonic()
+        первой попытки.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if time.time() + delay - created_at > self.max_age:
+            return None
+        if time.monotonic() + delay - first_attempt_at > self.max_block:
+            return None
+        return delay
+
+
+def parse_statuses(spec: str) -> frozenset:
+    """HTTP-коды для повтора: "429,500-599" → множество кодов"""
+    codes = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        low, _, high = part.partition("-")
+        try:
+            codes.update(range(int(low), int(high or low) + 1))
+        except ValueError:
+            raise ValueError(f"Invalid retry status '{part}', expected CODE or LOW-HIGH")
+    return frozenset(codes)
@@ -1,51 +1,235 @@
 # src/services/webhook_service.py
+"""
+HTTP-клиент отправки в Finandy.
+
+Сессия работает через явно настроенный пул соединений: размер пула и
+предел на хост, keep-alive, кэш DNS и один SSL-контекст на все соединения.
+При старте к каждому хосту получателей заранее открывается HTTP_WARM_CONNECTIONS
+соединений (HEAD к корню хоста), а если хост простаивал HTTP_WARM_INTERVAL_S,
+соединения открываются заново — первый сигнал после тишины не платит за
+DNS, TCP и TLS. Счётчики новых и переиспользованных соединений собирает
+TraceConfig; состояние пула видно в /health.
+"""
 import aiohttp
 import asyncio
-from typing import Tuple
+import ssl
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 from config.settings import settings
-from core.exceptions import WebhookSendException
+from core.models import RawPayload
+from core.exceptions import (
+    WebhookSendException,
+    WebhookTimeoutException,
+    WebhookConnectionException,
+)
+
+
+# Заголовки отправки собираются один раз, а не на каждый запрос
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class PoolStats:
+    """Счётчики пула по событиям TraceConfig"""
+
+    # Окно для скорости открытия новых соединений, секунды
+    RATE_WINDOW_S = 60.0
+
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self.queued = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+        self._created_at: deque = deque()
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_created)
+        trace.on_connection_reuseconn.append(self._on_reused)
+        trace.on_connection_queued_start.append(self._on_queued)
+        trace.on_dns_cache_hit.append(self._on_dns_hit)
+        trace.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace
+
+    async def _on_created(self, session, context, params) -> None:
+        self.created += 1
+        self._created_at.append(time.monotonic())
+
+    async def _on_reused(self, session, context, params) -> None:
+        self.reused += 1
+
+    async def _on_queued(self, session, context, params) -> None:
+        self.queued += 1
+
+    async def _on_dns_hit(self, session, context, params) -> None:
+        self.dns_hits += 1
+
+    async def _on_dns_miss(self, session, context, params) -> None:
+        self.dns_misses += 1
+
+    def new_per_min(self) -> int:
+        horizon = time.monotonic() - self.RATE_WINDOW_S
+        while self._created_at and self._created_at[0] < horizon:
+            self._created_at.popleft()
+        return len(self._created_at)
+
+
+def combined_pool_stats(clients: List["WebhookClient"]) -> Dict[str, Any]:
+    """Сумма состояния пулов нескольких клиентов (по одному на поток-диспетчер)"""
+    total: Dict[str, Any] = {}
+    for client in clients:
+        for key, value in client.pool_stats().items():
+            if key != "reuse_ratio":
+                total[key] = total.get(key, 0) + value
+    requests = total.get("created", 0) + total.get("reused", 0)
+    total["reuse_ratio"] = round(total["reused"] / requests, 3) if requests else None
+    return total
 
 
 class WebhookClient:
     """Клиент для надёжной отправки вебхуков в Finandy"""
 
-    def __init__(self, timeout: int = None):
+    def __init__(self, timeout: int = None, warm_connections: Optional[int] = None):
         self.timeout = timeout or settings.request_timeout
+        self.warm_connections = (
+            settings.http_warm_connections if warm_connections is None else warm_connections
+        )
+        self.warm_interval = settings.http_warm_interval_s
+        self.stats = PoolStats()
+        # Один контекст на все соединения: сертификаты грузятся один раз
+        self._ssl_context = ssl.create_default_context()
         self._session = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._last_used: Dict[str, float] = {}
+        self._warm_task: Optional[asyncio.Task] = None
 
     @property
     def session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            self._connector = aiohttp.TCPConnector(
+                limit=settings.http_pool_limit,
+                limit_per_host=settings.http_pool_limit_per_host,
+                keepalive_timeout=settings.http_keepalive_s,
+                use_dns_cache=True,
+                ttl_dns_cache=settings.http_dns_cache_ttl_s,
+                ssl=self._ssl_context,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                trace_configs=[self.stats.trace_config()],
+            )
         return self._session
 
+    async def start(self, urls: Optional[List[str]] = None) -> None:
+        """Прогреть соединения к хостам получателей и обновлять их при простое"""
+        if self.warm_connections <= 0:
+            return
+        if urls is None:
+            from config import webhooks
+            urls = [
+                url
+                for symbol in webhooks.FINANDY_WEBHOOKS
+                for url in webhooks.get_destinations(symbol)
+                if webhooks.is_valid_webhook(url)
+            ]
+        origins = sorted({_origin(url) for url in urls})
+        if not origins:
+            return
+        # Прогрев идёт в фоне: недоступный хост не задерживает старт сервера
+        self._warm_task = asyncio.create_task(self._keep_warm(origins))
+
+    async def _warm(self, origin: str) -> None:
+        """Открыть warm_connections соединений параллельными HEAD-запросами"""
+        async def probe() -> None:
+            async with self.session.head(
+                    origin,
+                    allow_redirects=False,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                await response.read()
+
+        results = await asyncio.gather(
+            *(probe() for _ in range(self.warm_connections)), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            print(f"⚠️ Прогрев {origin}: {len(errors)}/{len(results)} соединений не открыто ({errors[0]!r})")
+        self._last_used[origin] = time.monotonic()
+
+    async def _keep_warm(self, origins: List[str]) -> None:
+        await asyncio.gather(*(self._warm(origin) for origin in origins))
+        if self.warm_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.warm_interval)
+            now = time.monotonic()
+            idle = [o for o in origins if now - self._last_used.get(o, 0.0) >= self.warm_interval]
+            if idle:
+                await asyncio.gather(*(self._warm(origin) for origin in idle))
+
     async def close(self):
         """Закрыть сессию при завершении работы"""
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            self._warm_task = None
         if self._session and not self._session.closed:
             await self._session.close()
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Состояние пула: свободные и занятые соединения, новые и переиспользованные"""
+        connector = self._connector
+        # У TCPConnector нет публичного API для этого: читаем его внутренние поля
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values()) if connector else 0
+        active = len(getattr(connector, "_acquired", ())) if connector else 0
+        requests = self.stats.created + self.stats.reused
+        return {
+            "idle": idle,
+            "active": active,
+            "created": self.stats.created,
+            "reused": self.stats.reused,
+            "reuse_ratio": round(self.stats.reused / requests, 3) if requests else None,
+            "new_per_min": self.stats.new_per_min(),
+            "queued": self.stats.queued,
+            "dns_cache_hits": self.stats.dns_hits,
+            "dns_cache_misses": self.stats.dns_misses,
+        }
+
     async def send(self, url: str, data: dict) -> Tuple[int, str]:
         """
         Отправить POST-запрос на указанный URL с JSON-данными.
+        RawPayload уходит исходными байтами, без сериализации.
 
         Возвращает: (status_code, response_text)
         Выбрасывает: WebhookSendException в случае ошибки
         """
+        self._last_used[_origin(url)] = time.monotonic()
         try:
+            if isinstance(data, RawPayload):
+                body = {"data": data.raw}
+            else:
+                body = {"json": data}
             async with self.session.post(
                     url,
-                    json=data,
                     timeout=aiohttp.ClientTimeout(total=self.timeout),
-                    headers={"Content-Type": "application/json"}
+                    headers=JSON_HEADERS,
+                    **body,
             ) as response:
                 response_text = await response.text()
                 return response.status, response_text
 
         except asyncio.TimeoutError:
-            raise WebhookSendException(f"Timeout after {self.timeout} seconds")
+            raise WebhookTimeoutException(f"Timeout after {self.timeout} seconds")
 
         except aiohttp.ClientError as e:
-            raise WebhookSendException(f"Client error: {str(e)}")
+            raise WebhookConnectionException(f"Client error: {str(e)}")
 
         except Exception as e:
             raise WebhookSendException(f"Unexpected error: {str(e)}")
@@ -1,30 +1,50 @@
 # src/services/worker_service.py
 import asyncio
 import time
-import os
 import traceback
-from typing import Dict
+from typing import Dict, Optional
 from config import webhooks
-from database.repository import SignalRepository
+from core.models import SignalStatus, ErrorClass, QueuedSignal
+from core.exceptions import (
+    WebhookSendException,
+    WebhookTimeoutException,
+    WebhookConnectionException,
+)
+from database.backends import StorageBackend
+from database.dead_letters import DeadLetterStore
+from services.circuit_breaker import CircuitBreakers
+from services.deadlines import DeadlinePolicy
+from services.queue_service import split_lane_key
+from services.rate_limiter import RateLimiter
+from services.retry import RetryPolicy
 from services.webhook_service import WebhookClient
 
 
 class SignalWorker:
-    """Воркер для обработки сигналов конкретного инструмента"""
+    """Воркер очереди инструмента; symbol — ключ очереди (SYMBOL или SYMBOL#N для N-го получателя)"""
 
     def __init__(
         self,
         symbol: str,
         queue_manager: "QueueManager",
-        repository: SignalRepository,
+        repository: StorageBackend,
         webhook_client: WebhookClient,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        dead_letters: Optional[DeadLetterStore] = None,
+        deadlines: Optional[DeadlinePolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
     ):
         self.symbol = symbol
+        self.destination = split_lane_key(symbol)[1]
         self.queue_manager = queue_manager
         self.repository = repository
         self.webhook_client = webhook_client
-        self.last_sent = 0
-        self.rate_limit_ms = int(os.getenv("RATE_LIMIT_MS", "300"))
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.dead_letters = dead_letters
+        self.deadlines = deadlines
+        self.breakers = breakers
 
     async def run(self) -> None:
         """Основной цикл воркера"""
@@ -34,15 +54,18 @@ class SignalWorker:
             try:
                 print(f"[{self.symbol}] ⏳ Ожидаю задачу из очереди...")
                 item = await self.queue_manager.get(self.symbol)
+                if item is None:
+                    return  # очередь простаивала и удалена менеджером
                 print(f"[{self.symbol}] 🧵 Получен элемент из очереди")
 
-                if isinstance(item, tuple) and len(item) == 4:
-                    data, original_data, name, created_at = item
-                    await self._process_signal(data, original_data, name, created_at)
+                if isinstance(item, QueuedSignal):
+                    item.dequeued_at = time.time()
+                    await self._process_signal(item.data, item.data, item.name, item.created_at, item)
+                    self.queue_manager.ack(item)
                 else:
                     error_msg = f"Неверный формат элемента: {type(item)} (len={len(item) if hasattr(item, '__len__') else '?'})"
                     print(f"[{self.symbol}] ❌ {error_msg}")
-                    self._log_error("unknown", {}, time.time(), error_msg)
+                    self._log_error("unknown", {}, time.time(), error_msg, ErrorClass.CONFIG)
 
                 self.queue_manager.task_done(self.symbol)
 
@@ -63,6 +86,7 @@ class SignalWorker:
         original_data: Dict,
         name: str,
         created_at: float,
+        item: Optional[QueuedSignal] = None,
     ) -> None:
         """Отправка сигнала в Finandy"""
         try:
@@ -71,41 +95,159 @@ class SignalWorker:
                 f"[{self.symbol}] 🔎 raw name='{name}' (len={len(name)}), normalized='{normalized_name}'"
             )
 
-            raw_url = webhooks.get_webhook_url(normalized_name)
+            raw_url = webhooks.get_webhook_url(normalized_name, self.destination)
             webhook_url = raw_url.strip() if raw_url else None
 
             print(f"[{self.symbol}] 📤 Отправляю на URL: '{webhook_url}'")
 
             if not webhook_url or not webhooks.is_valid_webhook(webhook_url):
                 error_msg = f"Недопустимый вебхук для '{normalized_name}': '{raw_url}'"
-                self._log_error(normalized_name, original_data, created_at, error_msg)
+                self._log_error(
+                    normalized_name, original_data, created_at, error_msg, ErrorClass.CONFIG, item
+                )
                 return
 
-            await self._rate_limit()
+            # Повторы идут здесь же, чтобы не нарушить порядок сигналов инструмента;
+            # сколько они могут задержать очередь, ограничивает RetryPolicy.max_block
+            attempt = 0
+            first_attempt_at = time.monotonic()
+            breaker = self.breakers.for_url(webhook_url) if self.breakers is not None else None
+            while True:
+                attempt += 1
+                # Просроченный сигнал не тратит токен лимита и не задерживает свежие
+                if item is not None and item.deadline is not None and time.time() > item.deadline:
+                    await self._expire(normalized_name, original_data, created_at, attempt - 1, item)
+                    return
+                if breaker is not None and not breaker.allow():
+                    if self.breakers.policy == "hold":
+                        # Сигнал ждёт пробы в голове очереди; срок жизни проверяется на каждом круге
+                        attempt -= 1
+                        await asyncio.sleep(max(breaker.retry_in(), 0.05))
+                        continue
+                    error_msg = f"circuit open: {breaker.key}, fast-fail"
+                    print(f"[{self.symbol}] 🔌 Выключатель {breaker.key} разомкнут — сигнал {normalized_name} не отправляем")
+                    await self._dead_letter(
+                        normalized_name, original_data, created_at, attempt - 1,
+                        ErrorClass.CIRCUIT_OPEN, None, error_msg, item,
+                    )
+                    return
+                await self._rate_limit(normalized_name, webhook_url)
+                started = time.monotonic()
+                try:
+                    status_code, response_text = await self.webhook_client.send(
+                        webhook_url, original_data
+                    )
+                    error_class = ErrorClass.NONE if status_code == 200 else ErrorClass.HTTP
+                    error_msg = f"{status_code} — {response_text[:200]}"
+                except WebhookSendException as e:
+                    status_code, response_text = None, None
+                    error_class = self._error_class(e)
+                    error_msg = f"Ошибка при отправке сигнала: {e}"
+                if breaker is not None:
+                    # 4xx — ошибка сигнала, а не получателя
+                    breaker.record(
+                        status_code is None or status_code >= 500, time.monotonic() - started
+                    )
+
+                if error_class == ErrorClass.NONE or not self._retryable(error_class, status_code):
+                    break
+
+                delay = self.retry_policy.next_delay(attempt, created_at, first_attempt_at)
+                if delay is None:
+                    await self._dead_letter(
+                        normalized_name, original_data, created_at, attempt,
+                        error_class, status_code, response_text or error_msg, item,
+                    )
+                    return
+                print(f"[{self.symbol}] 🔁 Попытка {attempt} не удалась ({error_msg}), повтор через {delay:.2f} сек")
+                await asyncio.sleep(delay)
+
+            if status_code is None:
+                print(f"[{self.symbol}] ❌ {error_msg}")
+                self._log_error(normalized_name, original_data, created_at, error_msg, error_class, item)
+                return
 
-            status_code, response_text = await self.webhook_client.send(
-                webhook_url, original_data
-            )
             await self._handle_response(
-                normalized_name, original_data, created_at, status_code, response_text
+                normalized_name, original_data, created_at, status_code, response_text, item
             )
 
         except Exception as e:
             error_msg = f"Ошибка при отправке сигнала: {e}"
             print(f"[{self.symbol}] ❌ {error_msg}")
-            self._log_error(name, original_data, created_at, error_msg)
+            self._log_error(name, original_data, created_at, error_msg, self._error_class(e), item)
 
-    async def _rate_limit(self) -> None:
-        """Ограничение частоты запросов (минимум 300 мс между отправками)"""
-        now = time.time()
-        delay = self.rate_limit_ms / 1000.0
+    def _retryable(self, error_class: ErrorClass, status_code: Optional[int]) -> bool:
+        return self.retry_policy is not None and self.retry_policy.is_retryable(error_class, status_code)
 
-        if now - self.last_sent < delay:
-            sleep_time = delay - (now - self.last_sent)
-            print(f"[{self.symbol}] ⏸️ Спим {sleep_time:.3f} сек")
-            await asyncio.sleep(sleep_time)
+    async def _dead_letter(
+        self,
+        name: str,
+        original_data: Dict,
+        created_at: float,
+        attempts: int,
+        error_class: ErrorClass,
+        status_code: Optional[int],
+        error_msg: str,
+        item: Optional[QueuedSignal],
+    ) -> None:
+        """Повторы исчерпаны: сохранить сигнал в dead-letter и записать итог в журнал"""
+        if self.dead_letters is None or item is None:
+            self._log_error(name, original_data, created_at, error_msg, error_class, item)
+            return
 
-        self.last_sent = time.time()
+        dead_letter_id = await asyncio.to_thread(
+            self.dead_letters.add, self.symbol, item, attempts, error_class, status_code, error_msg
+        )
+        self._record_outcome(
+            item, name, original_data, created_at, SignalStatus.DEAD_LETTER,
+            response_code=status_code,
+            response_text=f"{error_msg} (попыток: {attempts}, dead-letter #{dead_letter_id})",
+            error_class=error_class,
+        )
+        print(f"[{self.symbol}] 🪦 Сигнал {name} отправлен в dead-letter #{dead_letter_id} после {attempts} попыток")
+
+    async def _expire(
+        self,
+        name: str,
+        original_data: Dict,
+        created_at: float,
+        attempts: int,
+        item: QueuedSignal,
+    ) -> None:
+        """Срок жизни истёк до отправки: отбросить или сохранить в dead-letter"""
+        age = time.time() - created_at
+        reason = f"expired: age {age:.1f}s, ttl {item.deadline - created_at:g}s, attempts {attempts}"
+        if self.deadlines is not None:
+            self.deadlines.record_expired(name)
+        print(f"[{self.symbol}] ⌛ Сигнал {name} просрочен ({reason}) — не отправляем")
+
+        if self.deadlines is not None and self.deadlines.action == "dead_letter":
+            await self._dead_letter(
+                name, original_data, created_at, attempts, ErrorClass.EXPIRED, None, reason, item,
+            )
+            return
+        self._record_outcome(
+            item, name, original_data, created_at, SignalStatus.EXPIRED,
+            response_text=reason,
+            error_class=ErrorClass.EXPIRED,
+        )
+
+    @staticmethod
+    def _error_class(error: Exception) -> ErrorClass:
+        """Класс ошибки для записи в БД"""
+        if isinstance(error, WebhookTimeoutException):
+            return ErrorClass.TIMEOUT
+        if isinstance(error, WebhookConnectionException):
+            return ErrorClass.CONNECTION
+        return ErrorClass.UNEXPECTED
+
+    async def _rate_limit(self, name: str, webhook_url: str) -> None:
+        """Дождаться токена в ведре получателя (и в общем ведре, если оно задано)"""
+        if self.rate_limiter is None:
+            return
+        waited = await self.rate_limiter.acquire(name, webhook_url)
+        if waited:
+            print(f"[{self.symbol}] ⏸️ Ждали лимита {waited:.3f} сек")
 
     async def _handle_response(
         self,
@@ -114,28 +256,28 @@ class SignalWorker:
         created_at: float,
         status_code: int,
         response_text: str,
+        item: Optional[QueuedSignal] = None,
     ) -> None:
         """Обработка ответа от Finandy"""
         sent_at = time.time()
 
         if status_code == 200:
-            status = "sent"
+            status = SignalStatus.SENT
+            error_class = ErrorClass.NONE
             print(f"[{self.symbol}] ✅ Успешно отправлен: {status_code}")
         else:
-            status = "error"
+            status = SignalStatus.ERROR
+            error_class = ErrorClass.HTTP
             print(
                 f"[{self.symbol}] ⚠️ Ошибка: {status_code} — {response_text[:200]}"
             )
 
-        self.repository.log_signal(
-            symbol=self.symbol,
-            name=name,
-            data=original_data,
-            status=status,
-            created_at=created_at,
+        self._record_outcome(
+            item, name, original_data, created_at, status,
             sent_at=sent_at,
             response_code=status_code,
             response_text=response_text,
+            error_class=error_class,
         )
 
     def _log_error(
@@ -144,16 +286,55 @@ class SignalWorker:
         original_data: Dict,
         created_at: float,
         error_msg: str,
+        error_class: ErrorClass = ErrorClass.UNEXPECTED,
+        item: Optional[QueuedSignal] = None,
     ) -> None:
         """Запись ошибки в БД и консоль"""
+        self._record_outcome(
+            item, name, original_data, created_at, SignalStatus.ERROR,
+            response_text=error_msg,
+            error_class=error_class,
+        )
+        print(f"[{self.symbol}] ❌ Записана ошибка в БД: {error_msg}")
+
+    def _record_outcome(
+        self,
+        item: Optional[QueuedSignal],
+        name: str,
+        original_data: Dict,
+        created_at: float,
+        status: SignalStatus,
+        sent_at: Optional[float] = None,
+        response_code: Optional[int] = None,
+        response_text: Optional[str] = None,
+        error_class: ErrorClass = ErrorClass.NONE,
+    ) -> None:
+        """Обновить строку, созданную при приёме сигнала, или добавить новую, если её нет"""
+        if item is not None and item.signal_id is not None:
+            self.repository.update_signal(
+                signal_id=item.signal_id,
+                name=name,
+                data=original_data,
+                created_at=created_at,
+                status=status,
+                dequeued_at=item.dequeued_at,
+                sent_at=sent_at,
+                response_code=response_code,
+                response_text=response_text,
+                error_class=error_class,
+                previous_status=item.log_status,
+            )
+            item.log_status = status
+            return
+
         self.repository.log_signal(
             symbol=self.symbol,
             name=name,
             data=original_data,
-            status="error",
+            status=status,
             created_at=created_at,
-            sent_at=None,
-            response_code=None,
-            response_text=error_msg,
+            sent_at=sent_at,
+            response_code=response_code,
+            response_text=response_text,
+            error_class=error_class,
         )
-        print(f"[{self.symbol}] ❌ Записана ошибка в БД: {error_msg}")